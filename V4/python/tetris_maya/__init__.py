@@ -25,22 +25,27 @@
 #
 
 from pathlib import Path
-
-import maya.mel as mel
-import pkg_resources
+from typing import Any
 
 from . import rlib
-from .game import Game
 
 __doc__ = rlib.__doc__
 if hasattr(rlib, "__all__"):
     __all__ = rlib.__all__
 
+# Maya is only imported when needed, so `rlib.GameState` can be used from a plain python interpreter.
+
 
-def launch():
-    Game.start()
+def launch(**kwargs: Any):
+    """Keyword arguments are forwarded to `Game`, e.g. `launch(column_count=30, row_count=40)`."""
+    from .game import Game  # noqa: PLC0415 the game imports Maya
+
+    Game.start(**kwargs)
 
 
 def install_shelf():
+    import maya.mel as mel  # noqa: PLC0415 only available in Maya
+    import pkg_resources  # noqa: PLC0415 slow import, only needed once
+
     shelf_location = Path(pkg_resources.resource_filename("tetris_maya", "resources/shelf_Tetris.mel"))
     mel.eval(f'loadNewShelf "{shelf_location.as_posix()}"')
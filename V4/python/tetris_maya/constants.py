@@ -16,4 +16,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+from enum import IntEnum
+
 PREFIX: str = "MayaTetris"
+
+
+class Hold(IntEnum):
+    CANT = 0
+    PUSH = 1
+    SWAP = 2
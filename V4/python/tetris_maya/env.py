@@ -0,0 +1,88 @@
+# Copyright (c) 2025 Mathieu Bouzard.
+#
+# This file is part of Tetris For Maya
+# (see https://gitlab.com/mathbou/TetrisMaya).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Vectorized environment over the rlib engine, to train placement policies on the game rules. Needs NumPy."""
+
+from __future__ import annotations
+
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+from .rlib import Strategy, VecEngine
+
+__all__ = ["Observation", "VecEnv"]
+
+
+class Observation(NamedTuple):
+    cells: np.ndarray
+    """`uint8` locked cells, `[env, y, x]` with the bottom row first. A cell is its tetrimino letter value plus one."""
+    pieces: np.ndarray
+    """`uint8` active, next and held tetriminos, `[env, 3]`, encoded like the cells. 0 is an empty hold."""
+
+
+class VecEnv:
+    """`count` games stepped together, one placement per step.
+
+    An action is `rotation * column_count + x`: the active tetrimino is turned `rotation` times left and moved
+    towards the `x` root column with the game kicks, as far as it goes, then hard dropped. The reward is the score
+    earned, drop and line clears. A game that ends is restarted at once, its `done` flag is set for that step.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        column_count: int = 10,
+        row_count: int = 20,
+        strategy: Strategy = Strategy.Bag,
+        seed: int = 0,
+    ):
+        self.column_count = column_count
+        self.row_count = row_count
+        self._seeds = list(range(seed, seed + count))
+        self._engine = VecEngine(self._seeds, column_count, row_count, strategy)
+
+    def __len__(self) -> int:
+        return len(self._engine)
+
+    @property
+    def action_count(self) -> int:
+        return self._engine.action_count
+
+    def reset(self, seeds: Sequence[int] | None = None) -> Observation:
+        """Restart every game, from the previous seeds by default. The number of `seeds` can change the game count."""
+        if seeds is not None:
+            self._seeds = [int(seed) for seed in seeds]
+        self._engine.reset(self._seeds)
+        return self._observe()
+
+    def step(self, actions: Sequence[int] | np.ndarray) -> tuple[Observation, np.ndarray, np.ndarray]:
+        """Play one action per game. Return the new observation, the `float64` rewards and the `bool` done flags.
+        The arrays are read-only.
+        """
+        self._engine.step(np.ascontiguousarray(actions, dtype=np.int64).tobytes())
+
+        rewards = np.frombuffer(self._engine.rewards(), dtype=np.float64)
+        dones = np.frombuffer(self._engine.dones(), dtype=np.bool_)
+        return self._observe(), rewards, dones
+
+    def _observe(self) -> Observation:
+        count = len(self._engine)
+        cells = np.frombuffer(self._engine.cells(), dtype=np.uint8).reshape(count, self.row_count, self.column_count)
+        pieces = np.frombuffer(self._engine.pieces(), dtype=np.uint8).reshape(count, VecEngine.PIECE_COLUMNS)
+        return Observation(cells, pieces)
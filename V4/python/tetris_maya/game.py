@@ -18,30 +18,33 @@
 
 from __future__ import annotations
 
-import random
-import time
 from enum import IntEnum
-from typing import ClassVar
+from typing import TYPE_CHECKING, Any, Callable, ClassVar
 
 import maya.cmds as mc
 import maya.mel as mel
 
 from . import maya2
-from .constants import PREFIX
-from .grid import Grid, Hold
-from .rlib import Turn
+from .constants import PREFIX, Hold
+from .grid import Grid
+from .policy import PolicyPlayer
+from .rlib import GravityClock, Input, Randomizer, Recorder, Strategy
 from .tetrimino import TetriminoType
-from .time2 import timer_precision
 
 try:
-    from PySide2.QtCore import QEvent, QObject, Qt, QThread, Signal, Slot
+    from PySide2.QtCore import QEvent, QObject, Qt, QTimer, Signal, Slot
     from PySide2.QtGui import QKeySequence
     from PySide2.QtWidgets import QWidget
 except ImportError:
-    from PySide6.QtCore import QEvent, QObject, Qt, QThread, Signal, Slot
+    from PySide6.QtCore import QEvent, QObject, Qt, QTimer, Signal, Slot
     from PySide6.QtGui import QKeySequence
     from PySide6.QtWidgets import QWidget
 
+if TYPE_CHECKING:
+    from os import PathLike
+
+    from .policy import Policy
+
 __all__ = ["Game"]
 
 
@@ -56,82 +59,90 @@ class Action(IntEnum):
     EXIT = Qt.Key.Key_Escape
 
 
-class LoopWorker(QObject):
-    """The game 'clock'. It sends a signal when the tetrimino should move down.
-
-    Warnings:
-        It must run in a separate thread, otherwise it blocks the main thread and the keyboard catcher won't work.
-
-    """
-
-    step = Signal()
-    finished = Signal()
-    canceled = Signal()
-
-    def __init__(self, row_count: int, time_step: float, max_frequency: int = 60):
-        self.__loop_count = row_count
-        self.__time_step = time_step
-        self.__max_frequency = max_frequency
-        super().__init__()
+ACTION_INPUTS: dict[Action, Input] = {
+    Action.LEFT: Input.Left,
+    Action.RIGHT: Input.Right,
+    Action.SOFT_DROP: Input.SoftDrop,
+    Action.HARD_DROP: Input.HardDrop,
+    Action.ROTATE_LEFT: Input.RotateLeft,
+    Action.ROTATE_RIGHT: Input.RotateRight,
+    Action.HOLD: Input.Hold,
+}
 
-        self.finished.connect(self.deleteLater)
-        self.canceled.connect(self.deleteLater)
 
-    def run(self):
-        self._is_stopped = False
-        self._is_canceled = False
+class ClockSignals(QObject):
+    """Steps of the `GravityClock`. They are emitted from its thread, so the slots are queued to the main one.
 
-        f_step = self.__time_step / self.__max_frequency
-
-        with timer_precision():
-            for _ in range(self.__loop_count):
-                duration = 0
-
-                while duration < self.__time_step:
-                    start = time.perf_counter()
-                    if self._is_stopped:
-                        self.finished.emit()
-                        return
-                    if self._is_canceled:
-                        self.canceled.emit()
-                        return
-                    time.sleep(f_step)
-                    duration += time.perf_counter() - start
-
-                self.step.emit()
-
-        self.finished.emit()
-
-    def stop(self):
-        self._is_stopped = True
+    Each one carries the generation of the clock that sent it, the ones of a replaced clock are ignored.
+    """
 
-    def cancel(self):
-        self._is_canceled = True
+    step = Signal(int)
+    finished = Signal(int)
 
 
 class Game(QWidget):
     TIME_STEP: ClassVar[float] = 0.5
-    SCORE_TABLE: ClassVar[dict[int, int]] = {1: 100, 2: 300, 3: 500, 4: 800}
 
-    def __init__(self):
+    def __init__(
+        self,
+        *,
+        column_count: int = Grid.DEFAULT_COLUMN_COUNT,
+        row_count: int = Grid.DEFAULT_ROW_COUNT,
+        ghost: bool = True,
+        seed: int | None = None,
+        strategy: Strategy = Strategy.Bag,
+        record: str | PathLike | None = None,
+        policy: Policy | None = None,
+        policy_budget: float = 0.05,
+    ):
+        """Without a seed, one is picked from the clock and can be read back from `randomizer.seed`.
+
+        Args:
+            record: Replay file path, see `rlib.Replay`.
+            policy: Bot playing instead of the keyboard, called once per spawned tetrimino.
+            policy_budget: Time given to the policy for each decision, in seconds.
+
+        Raises:
+            ValueError: If both a policy and a replay file are given, replays store key presses only.
+        """
+        if policy and record:
+            raise ValueError("A policy game can't be recorded")
+
         self._score = 0
         self._level = 0
         self._lines = 0
         self._loop_counter = 0
 
         self._game_huds: list[maya2.HeadsUpDisplay] = []
-        self._tetrimino_type_queue: list[TetriminoType] = []
+        self._randomizer = Randomizer(seed, strategy)
+        self._recorder = Recorder(record, self._randomizer.seed, column_count, row_count, strategy) if record else None
+        # Gravity steps still queued once the tetrimino has landed must not be played nor recorded:
+        # they come from a previous clock generation.
+        self._has_landed = False
+        self._clock_generation = 0
+        # Played together by the next `tick`.
+        self._inputs: list[Input] = []
+        self._gravity_steps = 0
+        self._is_tick_queued = False
+
+        self._is_over = False
+        self._player = PolicyPlayer(policy, policy_budget) if policy else None
 
         self.update_time_step()
 
-        self.grid = Grid()
-        self._thread = QThread()
+        self.grid = Grid(column_count, row_count)
+        if ghost:
+            self.grid.make_ghost()
+        self._clock = GravityClock()
 
         super().__init__(parent=maya2.get_main_window())
 
+        self._clock_signals = ClockSignals()
+        self._clock_signals.step.connect(self.step)
+        self._clock_signals.finished.connect(self.post_clock)
+
     def close(self) -> bool:
-        self._thread.quit()
-        self._thread.deleteLater()
+        self._clock.cancel()
 
         self.parent().removeEventFilter(self)
 
@@ -190,6 +201,19 @@ class Game(QWidget):
         )
         self._game_huds.append(hud_lines)
 
+        if self._player:
+            hud_decision = maya2.HeadsUpDisplay.add(
+                f"{PREFIX}_decision_hud",
+                block=14,
+                section=0,
+                label="Decision (ms) :",
+                command=self.get_decision_time,
+                labelFontSize="large",
+                dataFontSize="large",
+                attachToRefresh=True,
+            )
+            self._game_huds.append(hud_decision)
+
         for idx, action in enumerate(Action):
             name = action.name.replace("_", " ").title()
             key_str = QKeySequence(action.value).toString()
@@ -250,9 +274,12 @@ class Game(QWidget):
     def eventFilter(self, watched: QWidget, event: QEvent) -> bool:  # noqa: N802
         if event.type() == QEvent.KeyPress:
             if event.key() == Action.EXIT:
-                self.cancel_loop_worker()
+                if not self._player:
+                    self.cancel_clock()
                 self.game_over()
                 return False
+            if self._player:
+                return True
 
             self.move(event.key())
             return True  # Avoid pickWalk trigger
@@ -260,46 +287,15 @@ class Game(QWidget):
 
     # ---------------------- Game Actions ----------------------
 
-    def move(self, value: Action):  # noqa: C901
-        x, y = 0, 0
-
-        if value == Action.LEFT:
-            x, y = -1, 0
-        elif value == Action.RIGHT:
-            x, y = 1, 0
-        elif value == Action.SOFT_DROP:
-            x, y = 0, -1
-            self._score += 1
-
-        elif value == Action.ROTATE_RIGHT:
-            self.grid.rotate(angle=Turn.Right)
-        elif value == Action.ROTATE_LEFT:
-            self.grid.rotate(angle=Turn.Left)
-        elif value == Action.HARD_DROP:
-            while self.grid.move(0, -1):
-                pass
-            self._score += 20
-            self.stop_loop_worker()
-
-        elif value == Action.HOLD:
-            hold_code = self.grid.hold()
-            if hold_code in {Hold.SWAP, Hold.PUSH}:
-                self.cancel_loop_worker()
-                self.post_hold(hold_code)
-
-        if x or y:
-            self.grid.move(x, y)
-
-    def update_tetrimino_type_queue(self):
-        types = TetriminoType.get_all()
-
-        if len(self._tetrimino_type_queue) <= len(types):
-            new_queue = random.sample(types, len(types))
-            self._tetrimino_type_queue.extend(new_queue)
+    def move(self, value: Action):
+        """Queue the action, it's played along with the gravity steps of the frame by `tick`."""
+        if value in ACTION_INPUTS:
+            self._inputs.append(ACTION_INPUTS[value])
+            self._queue_tick()
 
     @property
-    def tetrimino_type_queue(self) -> list[TetriminoType]:
-        return self._tetrimino_type_queue
+    def randomizer(self) -> Randomizer:
+        return self._randomizer
 
     @property
     def time_step(self) -> float:
@@ -317,9 +313,6 @@ class Game(QWidget):
         """
         return self._score
 
-    def update_score(self, rows: int):
-        self._score += self.SCORE_TABLE.get(rows, 0)
-
     def get_lines(self) -> int:
         """Should be used for ui only.
 
@@ -337,11 +330,29 @@ class Game(QWidget):
         # For programming purposes, the first level is 0, so it needs an +1 offset for the ui.
         return self._level + 1
 
+    @property
+    def decision_times(self) -> list[float]:
+        """Duration of each policy decision, in seconds."""
+        return self._player.decision_times if self._player else []
+
+    def get_decision_time(self) -> float:
+        """Should be used for ui only.
+
+        Returns:
+            Duration of the last policy decision, in milliseconds.
+        """
+        times = self.decision_times
+        return round(times[-1] * 1000, 1) if times else 0.0
+
     def update_level(self, line_count: int):
         self._lines += line_count
         self._level = self._lines // 10
 
     def game_over(self):
+        self._is_over = True
+        if self._recorder:
+            self._recorder.close()
+
         mc.confirmDialog(
             title="Score",
             button="Ok",
@@ -357,36 +368,24 @@ class Game(QWidget):
 
     # ---------------------- Game Loop ----------------------
 
-    def launch_loop_worker(self):
-        self.loop_worker = LoopWorker(self.grid.ROW_COUNT, self.time_step)
-        self.loop_worker.step.connect(self.step)
-        self.loop_worker.moveToThread(self._thread)
-
-        self._thread.started.connect(self.loop_worker.run)
-
-        self.loop_worker.finished.connect(self._thread.quit)
-        self.loop_worker.finished.connect(self.post_loop)
-
-        self._thread.start()
-
-    def stop_loop_worker(self):
-        self.loop_worker.stop()
-        self.stop_thread()
-
-    def cancel_loop_worker(self):
-        self.loop_worker.cancel()
-        self.stop_thread()
+    def start_clock(self):
+        """Gravity steps of the active tetrimino, one per `time_step`. Row count steps are enough for it to land."""
+        self._has_landed = False
+        self._clock_generation += 1
+        generation = self._clock_generation
+        self._clock.start(
+            self.time_step,
+            self.grid.row_count,
+            lambda: self._clock_signals.step.emit(generation),
+            lambda: self._clock_signals.finished.emit(generation),
+        )
 
-    def stop_thread(self):
-        self._thread.quit()
-        with timer_precision():
-            while not self._thread.isFinished():
-                time.sleep(0.02)
+    def cancel_clock(self):
+        self._clock_generation += 1
+        self._clock.cancel()
 
     def init_loop(self):
-        self.update_tetrimino_type_queue()
-
-        tetrimino_type = self.tetrimino_type_queue.pop(0)
+        tetrimino_type = TetriminoType.get(self._randomizer.next())
         next_tetrimino = tetrimino_type.make(id=self._loop_counter)
         self.grid.put_to_next(next_tetrimino)
 
@@ -397,41 +396,112 @@ class Game(QWidget):
             self.init_loop()
         elif self.grid.inplace_collision():
             self.game_over()
+        elif self._player:
+            self.play_policy()
         else:
-            self.launch_loop_worker()
+            self.start_clock()
+
+    @Slot(int)
+    def step(self, generation: int):
+        """Queue a gravity step of the current tetrimino."""
+        if generation != self._clock_generation:
+            return
+        self._gravity_steps += 1
+        self._queue_tick()
+
+    @Slot(int)
+    def post_clock(self, generation: int):
+        """The clock sent all its steps. A tetrimino still falling once they are played is dropped by gravity."""
+        if generation != self._clock_generation or self.tick():
+            return
+        self._gravity_steps = self.grid.row_count
+        self.tick()
+
+    def _queue_tick(self):
+        if not self._is_tick_queued:
+            self._is_tick_queued = True
+            self._queue(self.tick)
+
+    def tick(self) -> bool:
+        """Play the queued key presses then the gravity steps, in a single call to the grid.
+
+        The inputs queued after the tetrimino has landed or was held are dropped, they are neither played nor recorded.
 
-    @Slot()
-    def step(self):
-        """Try to move down the current tetrimino. Stop the loop worker if it can't."""
-        if not self.grid.move(0, -1):
-            self.stop_loop_worker()
-
-    @Slot()
-    def post_loop(self):
-        """Update the grid and the score, then launch the next loop."""
+        Returns:
+            If the tetrimino landed or was held, the next one is already playing.
+        """
+        self._is_tick_queued = False
+        inputs, self._inputs = self._inputs, []
+        gravity_steps, self._gravity_steps = self._gravity_steps, 0
+        if self._has_landed or not (inputs or gravity_steps):
+            return False
+
+        tick = self.grid.tick(inputs, gravity_steps)
+        if self._recorder:
+            for value in [*inputs[: tick.inputs], *[Input.Gravity] * tick.gravity_steps]:
+                self._recorder.record(value)
+        self._score += tick.score
+
+        if tick.hold:
+            hold_code = self.grid.hold()
+            if hold_code in {Hold.SWAP, Hold.PUSH}:
+                self.cancel_clock()
+                self.post_hold(hold_code)
+                return True
+        elif tick.landed:
+            self._has_landed = True
+            self.cancel_clock()
+            self.post_loop(tick.completed_rows)
+            return True
+        return False
+
+    def post_loop(self, completed_rows: int):
+        """Update the level, then launch the next loop. The grid and the score are already up to date."""
         self.grid.reset_hold()
-        self.grid.update_cells()
-
-        completed_rows = self.grid.process_completed_rows()
 
-        self.update_score(completed_rows)
         self.update_level(completed_rows)
         self.update_time_step()
 
-        maya2.remove_empty_groups(f"{PREFIX}_*_grp")
-
         self.init_loop()
 
+    def play_policy(self):
+        """Ask the policy where the active tetrimino goes, and drop it there without any key press.
+
+        The next steps are queued in the event loop, so Maya keeps refreshing and the game can be escaped.
+        """
+        placement = self._player.decide(self.grid)
+
+        duration, budget = self._player.decision_times[-1], self._player.budget
+        if duration > budget:
+            mc.warning(f"Policy decision took {duration * 1000:.1f} ms, over its {budget * 1000:.1f} ms budget")
+
+        if placement is None:
+            # Held without a swap, the next tetrimino spawns.
+            self._queue(self.init_loop)
+            return
+
+        if not self.grid.place(placement.x, placement.rotation, placement.y):
+            mc.warning(f"Unreachable placement {placement}, the tetrimino is dropped instead")
+        tick = self.grid.tick([Input.HardDrop])
+        self._score += tick.score
+
+        self._queue(lambda: self.post_loop(tick.completed_rows))
+
+    def _queue(self, callback: Callable[[], Any]):
+        """Run the callback from the event loop, unless the game is over by then."""
+        QTimer.singleShot(0, lambda: self._is_over or callback())
+
     def post_hold(self, value: Hold):
         """Depending on the hold type, relaunch a worker (swap) or the full loop (push)."""
         if value is Hold.SWAP:
-            self.launch_loop_worker()
+            self.start_clock()
         elif value is Hold.PUSH:
             self.init_loop()
 
     @classmethod
-    def start(cls):
-        self = cls()
+    def start(cls, **kwargs: Any):
+        """Keyword arguments are forwarded to `Game`."""
+        self = cls(**kwargs)
         self.prepare_viewport()
         self.showMinimized()
         self.parent().installEventFilter(self)  # install keyboardCatcher
@@ -18,33 +18,35 @@
 
 from __future__ import annotations
 
-from enum import IntEnum
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, ClassVar
 from unittest.mock import patch
 
 import maya.cmds as mc
 from maya.app.type import typeToolSetup
 
-from .constants import PREFIX
+from .constants import PREFIX, Hold
 from .rlib import Grid as BaseGrid
+from .rlib import Tetrimino, TetriminoLetter
+from .tetrimino import Cube
 
 if TYPE_CHECKING:
-    from .tetrimino import Tetrimino
+    from .tetrimino import Color
 
 __all__ = ["Grid", "Hold"]
 
 
-class Hold(IntEnum):
-    CANT = 0
-    PUSH = 1
-    SWAP = 2
-
-
 class Grid(BaseGrid):
-    def __init__(self):
+    GHOST_COLOR: ClassVar[Color] = (0.3, 0.3, 0.3)
+
+    def __init__(
+        self,
+        column_count: int = BaseGrid.DEFAULT_COLUMN_COUNT,  # noqa: ARG002
+        row_count: int = BaseGrid.DEFAULT_ROW_COUNT,  # noqa: ARG002
+    ):
+        # The size is consumed by `__new__`, it can already be read from here.
         self._make_background()
-        self._make_square("Next", self.NEXT_POS)
-        self._make_square("Hold", self.HOLD_POS)
+        self._make_square("Next", self.next_pos)
+        self._make_square("Hold", self.hold_pos)
         mc.refresh()
 
         super().__init__()
@@ -53,33 +55,42 @@ class Grid(BaseGrid):
         self._hold_tetrimino: Tetrimino | None = None
         self._can_hold: bool = True
 
-    @classmethod
-    def _make_background(cls):
+    def _make_background(self):
+        """One cube per cell. They are instances of a single mesh, so large grids stay cheap to build."""
         bg_group = mc.group(name=f"{PREFIX}_background_grp", empty=1)
-        for x in range(cls.COLUMN_COUNT):
-            for y in range(cls.ROW_COUNT):
-                bg_cube = mc.polyCube(
-                    width=1,
-                    height=1,
-                    depth=1,
-                    subdivisionsX=1,
-                    subdivisionsY=1,
-                    subdivisionsZ=1,
-                    createUVs=False,
-                    constructionHistory=False,
-                    name=f"{PREFIX}_background{x:02}{y:02}_geo",
-                )[0]
-                mc.polyBevel3(
-                    f"{bg_cube}.e[0:11]",
-                    segments=1,
-                    constructionHistory=False,
-                    offset=0.05,
-                    offsetAsFraction=False,
-                    worldSpace=True,
-                    angleTolerance=30,
-                )
+
+        bg_source = mc.polyCube(
+            width=1,
+            height=1,
+            depth=1,
+            subdivisionsX=1,
+            subdivisionsY=1,
+            subdivisionsZ=1,
+            createUVs=False,
+            constructionHistory=False,
+            name=f"{PREFIX}_background_0_0_geo",
+        )[0]
+        mc.polyBevel3(
+            f"{bg_source}.e[0:11]",
+            segments=1,
+            constructionHistory=False,
+            offset=0.05,
+            offsetAsFraction=False,
+            worldSpace=True,
+            angleTolerance=30,
+        )
+        mc.move(0, 0, -1, bg_source, absolute=1)
+        bg_cubes = [bg_source]
+
+        for x in range(self.column_count):
+            for y in range(self.row_count):
+                if x == y == 0:
+                    continue
+                bg_cube = mc.instance(bg_source, name=f"{PREFIX}_background_{x}_{y}_geo")[0]
                 mc.move(x, y, -1, bg_cube, absolute=1)
-                mc.parent(bg_cube, bg_group)
+                bg_cubes.append(bg_cube)
+
+        mc.parent(bg_cubes, bg_group)
 
     @classmethod
     def _make_square(cls, text: str, position: tuple[float, float, float]):
@@ -114,27 +125,52 @@ class Grid(BaseGrid):
         mc.move(0, 3, 0, type_transform, relative=True)
         mc.rename(type_transform, f"{PREFIX}_{type_transform}")
 
-    def _move_to_start(self, tetrimino: Tetrimino):
-        mc.move(self.COLUMN_COUNT / 2 - 1, self.TOP, 0, tetrimino.root, absolute=True)
-        mc.scale(1, 1, 1, tetrimino.root, absolute=True)
+    def make_ghost(self):
+        """Preview where the active tetrimino will land. The rlib keeps its shape and position up to date."""
+        name = f"{PREFIX}_ghost"
+        root_position, *positions = TetriminoLetter.T.cells
+
+        root_cube = Cube.make(name, position=root_position, color=self.GHOST_COLOR)
+        cubes = [root_cube]
+
+        for tx, ty in positions:
+            instance_cube = root_cube.instance()
+            instance_cube.move(tx, ty)
+            cubes.append(instance_cube)
+
+        mc.scale(0.5, 0.5, 0.5, list(map(str, cubes)), absolute=True)
+
+        group = mc.group(map(str, cubes), name=f"{name}_grp")
+        mc.xform(group, pivots=(0, 0, 0), worldSpace=True)
+        mc.select(clear=True)
+
+        self.ghost_tetrimino = Tetrimino(type=TetriminoLetter.T, root=group, cubes=cubes)
 
     def _move_to_next(self, tetrimino: Tetrimino):
-        translation = [h - t for t, h in zip(mc.objectCenter(tetrimino.root), self.NEXT_POS)]
+        translation = [h - t for t, h in zip(mc.objectCenter(tetrimino.root), self.next_pos)]
         mc.move(*translation, tetrimino.root, absolute=True)
         mc.scale(0.85, 0.85, 0.85, tetrimino.root, absolute=True)
 
     def put_to_next(self, tetrimino: Tetrimino):
         if self._next_tetrimino:
-            self.active_tetrimino = self._next_tetrimino
-            self._move_to_start(self.active_tetrimino)
+            self.spawn(self._next_tetrimino)
 
         self._next_tetrimino = tetrimino
         self._move_to_next(self._next_tetrimino)
         mc.refresh()
 
+    @property
+    def next_tetrimino(self) -> Tetrimino | None:
+        """Tetrimino shown in the next preview, spawned after the active one."""
+        return self._next_tetrimino
+
+    @property
+    def held_tetrimino(self) -> Tetrimino | None:
+        return self._hold_tetrimino
+
     def _move_to_hold(self, tetrimino: Tetrimino):
         local_center = [c - p for c, p in zip(mc.objectCenter(tetrimino.root), tetrimino.position)]  # only return x, y
-        translation = [h - c for h, c in zip(self.HOLD_POS, local_center)]
+        translation = [h - c for h, c in zip(self.hold_pos, local_center)]
         mc.move(*translation, 0, tetrimino.root, absolute=True)
         mc.scale(0.85, 0.85, 0.85, tetrimino.root, absolute=True)
 
@@ -147,8 +183,7 @@ class Grid(BaseGrid):
             backup = self.active_tetrimino
 
             if self._hold_tetrimino:
-                self.active_tetrimino = self._hold_tetrimino
-                self._move_to_start(self.active_tetrimino)
+                self.spawn(self._hold_tetrimino)
                 exit_code = Hold.SWAP
 
             self._hold_tetrimino = backup
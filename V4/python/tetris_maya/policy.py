@@ -0,0 +1,111 @@
+# Copyright (c) 2025 Mathieu Bouzard.
+#
+# This file is part of Tetris For Maya
+# (see https://gitlab.com/mathbou/TetrisMaya).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, NamedTuple, Protocol, Tuple, Union
+
+from .constants import Hold
+
+if TYPE_CHECKING:
+    from .rlib import BoardView, Tetrimino, TetriminoLetter
+
+__all__ = ["Decision", "Placement", "Policy", "PolicyPlayer"]
+
+
+class Placement(NamedTuple):
+    """Root position of the active tetrimino, one of `BoardView.placements`.
+
+    With `hold`, the tetrimino is held first and the placement applies to the held one that replaces it.
+    If nothing was held yet, the next tetrimino spawns instead: the placement is ignored and the policy is called
+    again for it, like for any spawn. A tetrimino can only be held once until the next one locks: until then the
+    hold is ignored and the placement applies to the active tetrimino.
+    """
+
+    x: int
+    rotation: int
+    y: int
+    hold: bool = False
+
+
+Decision = Union[Placement, Tuple[int, int, int]]
+
+
+class Policy(Protocol):
+    """Bot called by `Game` once per spawned tetrimino, instead of the keyboard."""
+
+    def __call__(
+        self,
+        board: BoardView,
+        active: TetriminoLetter,
+        next: TetriminoLetter,  # noqa: A002
+        held: TetriminoLetter | None,
+        budget: float,
+    ) -> Decision:
+        """Decide where the active tetrimino goes.
+
+        Args:
+            board: Locked cells, `numpy.asarray(board)` is a read-only `[y, x]` matrix.
+            budget: Time the decision should take, in seconds. Slower decisions are reported.
+        """
+
+
+class PolicyGrid(Protocol):
+    """Part of `grid.Grid` driven by a `PolicyPlayer`."""
+
+    @property
+    def active_tetrimino(self) -> Tetrimino | None: ...
+    @property
+    def next_tetrimino(self) -> Tetrimino | None: ...
+    @property
+    def held_tetrimino(self) -> Tetrimino | None: ...
+    def view(self) -> BoardView: ...
+    def hold(self) -> Hold: ...
+
+
+class PolicyPlayer:
+    """Ask a policy where each spawned tetrimino goes, exactly once per spawn."""
+
+    def __init__(self, policy: Policy, budget: float):
+        self.policy = policy
+        self.budget = budget
+        self.decision_times: list[float] = []
+
+    def decide(self, grid: PolicyGrid) -> Placement | None:
+        """Decision for the active tetrimino, held first if the policy asks for it.
+
+        Returns:
+            The placement of the active tetrimino, the one out of the hold after a swap.
+            `None` if the tetrimino was held without a swap: the next one spawns and gets its own decision.
+        """
+        held = grid.held_tetrimino
+        start = time.perf_counter()
+        decision = self.policy(
+            grid.view(),
+            grid.active_tetrimino.type,
+            grid.next_tetrimino.type,
+            held.type if held else None,
+            self.budget,
+        )
+        self.decision_times.append(time.perf_counter() - start)
+
+        placement = decision if isinstance(decision, Placement) else Placement(*decision)
+        if placement.hold and grid.hold() is Hold.PUSH:
+            return None
+        return placement
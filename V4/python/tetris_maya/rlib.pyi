@@ -1,25 +1,84 @@
 # This file is automatically generated by pyo3_stub_gen
 # ruff: noqa: E501, F401
 from enum import Enum
+from os import PathLike
+from typing import Any, Callable
 
 class Grid:
-    ROW_COUNT: int
-    COLUMN_COUNT: int
-    TOP: int
+    DEFAULT_COLUMN_COUNT: int
+    DEFAULT_ROW_COUNT: int
+    MIN_SIZE: int
     BOTTOM: int
     LEFT: int
-    RIGHT: int
-    NEXT_POS: tuple[float, float, float]
-    HOLD_POS: tuple[float, float, float]
     JIGGLE_MOVES: list[int]
 
-    def __new__(cls) -> Grid: ...
+    def __new__(cls, column_count: int = 10, row_count: int = 20) -> Grid: ...
+    @property
+    def column_count(self) -> int: ...
+    @property
+    def row_count(self) -> int: ...
+    @property
+    def top(self) -> int: ...
+    @property
+    def right(self) -> int: ...
+    @property
+    def next_pos(self) -> tuple[float, float, float]:
+        """Center of the next tetrimino preview, on the right of the grid."""
+
+    @property
+    def hold_pos(self) -> tuple[float, float, float]:
+        """Center of the hold tetrimino preview, on the left of the grid."""
+
+    @property
+    def __array_interface__(self) -> dict[str, Any]:
+        """Locked cells for `numpy.asarray(grid)`, see `GameState.__array_interface__`."""
+
+    @property
+    def row_fill(self) -> list[int]:
+        """Filled cells of each row, bottom row first."""
+
+    @property
+    def column_heights(self) -> list[int]:
+        """Row above the highest filled cell of each column."""
+
+    @property
+    def aggregate_height(self) -> int:
+        """Sum of the column heights."""
+
+    @property
+    def holes(self) -> int:
+        """Empty cells under the top of their column."""
+
+    @property
+    def bumpiness(self) -> int:
+        """Sum of the height differences between neighbour columns."""
+
+    @property
+    def hash(self) -> int:
+        """Zobrist hash of the locked cells, whatever their type. Key of a `TranspositionTable`."""
+
     def move(self, x: int, y: int) -> bool:
         """Move the active tetrimino"""
 
+    def hard_drop(self) -> int:
+        """Drop the active tetrimino to the lowest free position in one move. Return the number of rows it fell."""
+
     def rotate(self, angle: Turn) -> bool:
         """Rotate the active tetrimino"""
 
+    def placements(self, letter: TetriminoLetter | None = None) -> list[tuple[int, int, int]]:
+        """Every resting position reachable with the game moves and kicks, as `(x, rotation, y)` root positions.
+        By default from the active tetrimino, otherwise from the spawn of `letter`.
+        """
+
+    def view(self) -> BoardView:
+        """Frozen copy of the locked cells."""
+
+    def place(self, x: int, rotation: int, y: int) -> bool:
+        """Move the active tetrimino straight to one of its `placements`, with a single batch of Maya edits.
+        Return `False` and leave it untouched if the placement can't be reached.
+        """
+
     def inplace_collision(self) -> bool:
         """Check if the active tetrimino collides with another one"""
 
@@ -29,17 +88,87 @@ class Grid:
     def process_completed_rows(self) -> int:
         """Check the grid for completed rows. Delete them and move down the others if possible."""
 
+    def tick(self, inputs: list[Input], gravity_steps: int = 0) -> Tick:
+        """Play a frame: the `inputs` then `gravity_steps` gravity steps, with a single batch of Maya edits.
+
+        Once the tetrimino lands it's locked and the completed rows are cleared, along with the emptied tetrimino
+        groups. The remaining inputs are dropped, as well as the ones after a hold, which is left to the caller.
+        """
+
     @property
     def active_tetrimino(self) -> Tetrimino | None: ...
     @active_tetrimino.setter
     def active_tetrimino(self, tetrimino: Tetrimino) -> None: ...
+    def update_ghost(self):
+        """Move the ghost tetrimino where the active one would land."""
+
+    def spawn(self, tetrimino: Tetrimino):
+        """Make `tetrimino` the active one, full size at the top of the grid, with a single batch of Maya edits.
+        Its rotation is kept, the way a held tetrimino comes back.
+        """
+
+    @property
+    def ghost_tetrimino(self) -> Tetrimino | None: ...
+    @ghost_tetrimino.setter
+    def ghost_tetrimino(self, tetrimino: Tetrimino) -> None: ...
+
+class Tick:
+    """What is left to the Python side after a `Grid.tick`."""
+
+    @property
+    def inputs(self) -> int:
+        """Inputs played, the next ones were dropped."""
+
+    @property
+    def gravity_steps(self) -> int:
+        """Gravity steps played."""
+
+    @property
+    def score(self) -> int:
+        """Points of the soft drops, the hard drop and the completed rows."""
+
+    @property
+    def completed_rows(self) -> int: ...
+    @property
+    def landed(self) -> bool:
+        """The active tetrimino was locked, the next one must be spawned."""
+
+    @property
+    def hold(self) -> bool:
+        """The last input played is a hold, still to be done."""
+
+class GravityClock:
+    """Gravity steps of the falling tetrimino, timed by a native thread.
+
+    The thread waits without the GIL and only takes it to call `on_step` when a step is due. With the `emit` of a
+    Qt signal connected to the main thread, each step posts a queued event, so the Maya UI only pays for the steps.
+    """
+
+    def __new__(cls) -> GravityClock: ...
+    @property
+    def is_running(self) -> bool: ...
+    def start(
+        self, time_step: float, steps: int, on_step: Callable[[], Any], on_finished: Callable[[], Any]
+    ) -> None:
+        """Call `on_step` `steps` times, every `time_step` seconds, then `on_finished`, from the clock thread.
+        A running clock is canceled first.
+        """
+
+    def cancel(self) -> None:
+        """Stop the clock, no callback is called once it returns. The clock thread isn't waited for, it ends on its
+        own within a millisecond.
+        """
 
 class Tetrimino:
     def __new__(cls, type: TetriminoLetter, root: str, cubes: tuple[Cube, Cube, Cube, Cube]) -> Tetrimino: ...
     @property
+    def type(self) -> TetriminoLetter: ...
+    @property
     def root(self) -> str: ...
     @property
     def position(self) -> tuple[float, float]: ...
+    def place(self, x: int, y: int):
+        """Move the tetrimino root to the desired grid coordinates."""
 
 class TetriminoLetter(Enum):
     T = ...
@@ -50,6 +179,12 @@ class TetriminoLetter(Enum):
     S = ...
     I = ...
 
+    @property
+    def name(self) -> str: ...
+    @property
+    def cells(self) -> list[tuple[int, int]]:
+        """Cube offsets of the spawn state, the first one being the root."""
+
 class Turn(Enum):
     Left = ...
     Right = ...
@@ -61,3 +196,429 @@ class Cube:
 
     @property
     def name(self) -> str: ...
+
+class Strategy(Enum):
+    Bag = ...
+    """Shuffled bags of the 7 tetriminos."""
+    Random = ...
+    """Every tetrimino is equally likely, independently of the previous ones."""
+    History = ...
+    """Rerolls the tetriminos found in the last 4 ones, up to 6 times."""
+
+class GameState:
+    """Full game without any Maya dependency, driven by a seed."""
+
+    SCORE_TABLE: list[int]
+    SOFT_DROP_SCORE: int
+    HARD_DROP_SCORE: int
+
+    def __new__(
+        cls,
+        column_count: int = 10,
+        row_count: int = 20,
+        seed: int = 0,
+        strategy: Strategy = Strategy.Bag,
+        undo_limit: int = 0,
+    ) -> GameState: ...
+    def copy(self) -> GameState: ...
+    def snapshot(self) -> Snapshot:
+        """Copy of the game state, immutable so it can be kept and restored any number of times."""
+
+    def restore(self, snapshot: Snapshot):
+        """Go back to a snapshot of this game. The undo history is reset."""
+
+    def undo(self) -> bool:
+        """Go back to the spawn of the previous tetrimino, up to `undo_limit` times. Return `False` if there is none."""
+
+    @property
+    def undo_count(self) -> int:
+        """Number of placements that can be undone."""
+
+    @property
+    def seed(self) -> int: ...
+    @property
+    def column_count(self) -> int: ...
+    @property
+    def row_count(self) -> int: ...
+    @property
+    def score(self) -> int: ...
+    @property
+    def lines(self) -> int: ...
+    @property
+    def level(self) -> int:
+        """Starts at 0."""
+
+    @property
+    def pieces(self) -> int:
+        """Number of locked tetriminos."""
+
+    @property
+    def is_over(self) -> bool: ...
+    @property
+    def time_step(self) -> float:
+        """Gravity delay of the current level, in seconds."""
+
+    @property
+    def active(self) -> tuple[TetriminoLetter, int, tuple[int, int]]:
+        """Type, rotation and root position of the active tetrimino."""
+
+    @property
+    def active_cells(self) -> list[tuple[int, int]]:
+        """Grid coordinates of the active tetrimino cubes."""
+
+    @property
+    def next(self) -> TetriminoLetter: ...
+    def preview(self, count: int) -> list[TetriminoLetter]:
+        """The `count` coming tetriminos, starting with `next`."""
+
+    @property
+    def held(self) -> TetriminoLetter | None: ...
+    @property
+    def cells(self) -> list[int]:
+        """Row-major locked cells, bottom row first. `0` is empty, otherwise the `TetriminoLetter` value + 1."""
+
+    @property
+    def row_fill(self) -> list[int]:
+        """Filled cells of each row, bottom row first."""
+
+    @property
+    def column_heights(self) -> list[int]:
+        """Row above the highest filled cell of each column."""
+
+    @property
+    def aggregate_height(self) -> int:
+        """Sum of the column heights."""
+
+    @property
+    def holes(self) -> int:
+        """Empty cells under the top of their column."""
+
+    @property
+    def bumpiness(self) -> int:
+        """Sum of the height differences between neighbour columns."""
+
+    @property
+    def hash(self) -> int:
+        """Zobrist hash of the locked cells, whatever their type. Key of a `TranspositionTable`."""
+
+    @property
+    def __array_interface__(self) -> dict[str, Any]:
+        """Live read-only view of the locked cells: `numpy.asarray(state)` is a `uint8` matrix indexed `[y, x]`,
+        bottom row first, without any copy. `0` is empty, otherwise the `TetriminoLetter` value + 1,
+        so `numpy.asarray(state) > 0` is the occupancy.
+        """
+
+    def view(self) -> BoardView:
+        """Frozen copy of the locked cells."""
+
+    def placements(self, letter: TetriminoLetter | None = None) -> list[tuple[int, int, int]]:
+        """Every resting position reachable with the game moves and kicks, as `(x, rotation, y)` root positions.
+        By default from the active tetrimino, otherwise from the spawn of `letter`.
+        """
+
+    def features(
+        self, placements: list[tuple[int, int, int]], letter: TetriminoLetter | None = None
+    ) -> FeatureMatrix:
+        """Evaluation features of the `(x, rotation, y)` placements, see `FeatureMatrix`.
+        By default of the active tetrimino, otherwise of `letter`.
+        A placement that doesn't fit raises a `ValueError`.
+        """
+
+    def move(self, x: int, y: int) -> bool:
+        """Move the active tetrimino"""
+
+    def rotate(self, angle: Turn) -> bool:
+        """Rotate the active tetrimino"""
+
+    def soft_drop(self) -> bool:
+        """Move the active tetrimino one row down, for `SOFT_DROP_SCORE` points."""
+
+    def hard_drop(self) -> int:
+        """Drop and lock the active tetrimino, for `HARD_DROP_SCORE` points. Return the number of completed rows."""
+
+    def step(self) -> bool:
+        """Gravity step: move the active tetrimino down, or lock it if it has landed. Return `True` if it moved."""
+
+    def lock(self) -> int:
+        """Store the active tetrimino where it is. Return the number of completed rows."""
+
+    def hold(self) -> int:
+        """Store the active tetrimino, once per spawned tetrimino. Return a `grid.Hold` value."""
+
+class Snapshot:
+    """Frozen game state from `GameState.snapshot`, shared until it is restored."""
+
+    @property
+    def score(self) -> int: ...
+    @property
+    def pieces(self) -> int:
+        """Number of locked tetriminos."""
+
+class PerfectClear:
+    """Perfect clear hints, see `solve`. Keep one per game: the dead ends found by a query speed up the next ones."""
+
+    def __new__(cls, max_nodes: int = 2000) -> PerfectClear:
+        """`max_nodes` bounds the positions visited by a query, the default keeps it within a frame."""
+
+    @property
+    def nodes(self) -> int:
+        """Positions visited by the last query."""
+
+    def solve(
+        self, state: GameState, preview: int = 6, max_height: int = 4
+    ) -> list[tuple[bool, TetriminoLetter, tuple[int, int, int]]] | None:
+        """Placements emptying the board within `max_height` rows, with the active tetrimino, the held one and
+        the `preview` next ones, as `(hold, letter, (x, rotation, y))`. `hold` means the tetrimino is played
+        after pressing hold. `None` if there is no solution, or none was found within `max_nodes`:
+        asking again carries on the search.
+        """
+
+class Lookahead:
+    """Expected value of placements over sampled continuations of the piece sequence, see `submit`.
+    The rollouts are played on native threads without the GIL, so the Maya UI keeps running meanwhile.
+    """
+
+    def __new__(cls, rollouts: int = 32, depth: int = 3, seed: int | None = None) -> Lookahead:
+        """Each placement is valued over `rollouts` continuations of `depth` tetriminos, the next one included.
+        The continuations are drawn again from the hidden state of the game randomizer, from `seed`.
+        Without a seed one is picked from the clock.
+        """
+
+    @property
+    def rollouts(self) -> int: ...
+    @property
+    def depth(self) -> int: ...
+    @property
+    def seed(self) -> int: ...
+    @property
+    def is_running(self) -> bool:
+        """Check if the last submitted placements are still being played."""
+
+    def submit(self, state: GameState, placements: list[tuple[int, int, int]]) -> None:
+        """Start valuing the `(x, rotation, y)` placements of the active tetrimino and return at once.
+        A previous submission still running is canceled. A placement that doesn't fit raises a `ValueError`.
+        """
+
+    def poll(self) -> list[float] | None:
+        """Values of the last submitted placements, in their order.
+        `None` while they are being played, or once they were returned.
+        """
+
+    def wait(self) -> list[float] | None:
+        """Like `poll`, but waits for the values with the GIL released."""
+
+class VecEngine:
+    """Games stepped together, one placement per step, see `tetris_maya.env.VecEnv`.
+    The arrays are exchanged as native-endian `bytes`, so a step doesn't create any object per game.
+    """
+
+    PIECE_COLUMNS: int
+
+    def __new__(
+        cls, seeds: list[int], column_count: int = 10, row_count: int = 20, strategy: Strategy = Strategy.Bag
+    ) -> VecEngine:
+        """One game per seed."""
+
+    def __len__(self) -> int: ...
+    @property
+    def action_count(self) -> int:
+        """`rotation * column_count + x`, see `step`."""
+
+    def reset(self, seeds: list[int]) -> None:
+        """Restart the games from new seeds, their number can change."""
+
+    def step(self, actions: bytes) -> None:
+        """Play one `int64` action per game, without the GIL. The active tetrimino is turned `rotation` times left,
+        moved towards the `x` root column as far as it goes, then hard dropped.
+        A game that ends is restarted at once, from a seed derived from the previous one.
+        """
+
+    def cells(self) -> bytes:
+        """`uint8` locked cells, `[game, y, x]` with the bottom row first."""
+
+    def pieces(self) -> bytes:
+        """`uint8` active, next and held tetriminos, `[game, PIECE_COLUMNS]`.
+        Like the cells, a tetrimino is its letter value plus one and 0 is an empty hold.
+        """
+
+    def rewards(self) -> bytes:
+        """`float64` score earned by each game during the last step, the hard drop included."""
+
+    def dones(self) -> bytes:
+        """`bool` games that ended during the last step, they have been restarted since."""
+
+class Policy(Enum):
+    """How a simulated game chooses where to drop each tetrimino."""
+
+    Random = ...
+    """Any landing position, uniformly."""
+    Heuristic = ...
+    """The landing position with the best height, holes, bumpiness and lines evaluation."""
+
+class EndReason(Enum):
+    PieceLimit = ...
+    """`max_pieces` tetriminos were locked."""
+    BlockOut = ...
+    """A new tetrimino didn't fit at the top of the grid."""
+
+class GameResult:
+    @property
+    def seed(self) -> int: ...
+    @property
+    def score(self) -> int: ...
+    @property
+    def lines(self) -> int: ...
+    @property
+    def pieces(self) -> int: ...
+    @property
+    def end_reason(self) -> EndReason: ...
+
+def simulate_batch(
+    seeds: list[int],
+    policy: Policy = Policy.Heuristic,
+    max_pieces: int = 1000,
+    column_count: int = 10,
+    row_count: int = 20,
+    strategy: Strategy = Strategy.Bag,
+) -> list[GameResult]:
+    """Play one game per seed with a built-in policy, on all the cores and without the GIL.
+    The results are in the seeds order.
+    """
+
+class Randomizer:
+    """Generate the tetriminos ahead of time in a ring buffer, `peek` and `next` are constant time."""
+
+    def __new__(cls, seed: int | None = None, strategy: Strategy = Strategy.Bag) -> Randomizer:
+        """Without a seed, one is picked from the clock and can be read back from `seed`."""
+
+    @property
+    def seed(self) -> int: ...
+    @property
+    def strategy(self) -> Strategy: ...
+    def peek(self, n: int) -> TetriminoLetter:
+        """Tetrimino coming after `n` others, without consuming it."""
+
+    def preview(self, count: int) -> list[TetriminoLetter]:
+        """The `count` coming tetriminos."""
+
+    def next(self) -> TetriminoLetter: ...
+
+class Input(Enum):
+    """Player actions and gravity, enough to replay a game from its seed."""
+
+    Left = ...
+    Right = ...
+    SoftDrop = ...
+    HardDrop = ...
+    RotateLeft = ...
+    RotateRight = ...
+    Hold = ...
+    Gravity = ...
+
+class Recorder:
+    """Stream the inputs of a game to a replay file."""
+
+    def __new__(
+        cls,
+        path: str | PathLike,
+        seed: int,
+        column_count: int = 10,
+        row_count: int = 20,
+        strategy: Strategy = Strategy.Bag,
+    ) -> Recorder: ...
+    def record(self, value: Input):
+        """Append the input, timed from the creation of the recorder."""
+
+    def close(self):
+        """Write the remaining inputs and close the file."""
+
+class Replay:
+    """Replay file, read as a stream so large recordings are never loaded at once."""
+
+    def __new__(cls, path: str | PathLike) -> Replay: ...
+    @property
+    def seed(self) -> int: ...
+    @property
+    def strategy(self) -> Strategy: ...
+    @property
+    def column_count(self) -> int: ...
+    @property
+    def row_count(self) -> int: ...
+    def events(self) -> list[tuple[int, Input]]:
+        """Inputs with their time in microseconds since the start of the game."""
+
+    def play(self) -> GameState:
+        """Play the inputs on a new game, without the GIL. The final state matches the recorded game."""
+
+class TranspositionTable:
+    """Evaluations cached by `GameState.hash`, for lookahead searches written in Python."""
+
+    def __new__(cls, capacity: int = 1048576) -> TranspositionTable:
+        """Room for at least `capacity` entries, rounded up to a power of two."""
+
+    @property
+    def capacity(self) -> int: ...
+    def __len__(self) -> int: ...
+    def get(self, key: int) -> float | None: ...
+    def insert(self, key: int, value: float): ...
+    def new_generation(self):
+        """Age the stored entries by one, they are replaced first once a bucket is full."""
+
+    def clear(self): ...
+
+class BoardView:
+    """Frozen copy of the locked cells, handed to the bot policies: `numpy.asarray(view)` is a read-only
+    matrix of the cells, see `GameState.__array_interface__`.
+    """
+
+    @property
+    def column_count(self) -> int: ...
+    @property
+    def row_count(self) -> int: ...
+    @property
+    def __array_interface__(self) -> dict[str, Any]: ...
+    @property
+    def row_fill(self) -> list[int]:
+        """Filled cells of each row, bottom row first."""
+
+    @property
+    def column_heights(self) -> list[int]:
+        """Row above the highest filled cell of each column."""
+
+    @property
+    def aggregate_height(self) -> int:
+        """Sum of the column heights."""
+
+    @property
+    def holes(self) -> int:
+        """Empty cells under the top of their column."""
+
+    @property
+    def bumpiness(self) -> int:
+        """Sum of the height differences between neighbour columns."""
+
+    @property
+    def hash(self) -> int:
+        """Zobrist hash of the locked cells, whatever their type. Key of a `TranspositionTable`."""
+
+    def fits(self, letter: TetriminoLetter, x: int, rotation: int, y: int) -> bool:
+        """Check if the tetrimino fits at the `(x, rotation, y)` root position."""
+
+    def placements(self, letter: TetriminoLetter) -> list[tuple[int, int, int]]:
+        """Every resting position of `letter` reachable from its spawn, as `(x, rotation, y)` root positions."""
+
+    def features(self, letter: TetriminoLetter, placements: list[tuple[int, int, int]]) -> FeatureMatrix:
+        """Evaluation features of the `(x, rotation, y)` placements of `letter`, see `FeatureMatrix`.
+        A placement that doesn't fit raises a `ValueError`.
+        """
+
+class FeatureMatrix:
+    """Evaluation features of candidate placements, one row per placement in the `NAMES` order.
+    `numpy.asarray(matrix)` is a read-only `float64` array, without any copy.
+    """
+
+    NAMES: list[str]
+
+    def __len__(self) -> int: ...
+    @property
+    def __array_interface__(self) -> dict[str, Any]: ...
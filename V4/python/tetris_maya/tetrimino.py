@@ -36,7 +36,6 @@ Color = tuple[float, float, float]
 @dataclass(frozen=True)
 class TetriminoType:
     name: TetriminoLetter
-    cubes: tuple[Point, Point, Point, Point]
     color: Color
     _types: ClassVar[list[TetriminoType]] = field(default=[], init=False)
 
@@ -48,17 +47,26 @@ class TetriminoType:
     def get_all(cls) -> list[TetriminoType]:
         return cls._types
 
+    @classmethod
+    def get(cls, name: TetriminoLetter) -> TetriminoType:
+        return next(t_type for t_type in cls._types if t_type.name == name)
+
+    @property
+    def cubes(self) -> list[Point]:
+        """Spawn state offsets, shared with the rotation tables of the rlib."""
+        return self.name.cells
+
     def make(self, id: int) -> Tetrimino:
         return tetrimino_maker(self, id)
 
 
-TetriminoType(name=TetriminoLetter.T, cubes=((0, 0), (1, 0), (-1, 0), (0, -1)), color=(0.23, 0.0, 0.27))
-TetriminoType(name=TetriminoLetter.O, cubes=((0, 0), (0, -1), (1, 0), (1, -1)), color=(0.7, 0.65, 0.02))
-TetriminoType(name=TetriminoLetter.L, cubes=((0, 0), (-1, -1), (1, 0), (-1, 0)), color=(0.75, 0.25, 0))
-TetriminoType(name=TetriminoLetter.J, cubes=((0, 0), (1, -1), (1, 0), (-1, 0)), color=(0.02, 0.02, 0.65))
-TetriminoType(name=TetriminoLetter.Z, cubes=((0, 0), (0, -1), (-1, 0), (1, -1)), color=(0.65, 0.02, 0.02))
-TetriminoType(name=TetriminoLetter.S, cubes=((0, 0), (0, -1), (1, 0), (-1, -1)), color=(0.02, 0.65, 0.02))
-TetriminoType(name=TetriminoLetter.I, cubes=((0, 0), (-1, 0), (1, 0), (2, 0)), color=(0, 0.5, 1))
+TetriminoType(name=TetriminoLetter.T, color=(0.23, 0.0, 0.27))
+TetriminoType(name=TetriminoLetter.O, color=(0.7, 0.65, 0.02))
+TetriminoType(name=TetriminoLetter.L, color=(0.75, 0.25, 0))
+TetriminoType(name=TetriminoLetter.J, color=(0.02, 0.02, 0.65))
+TetriminoType(name=TetriminoLetter.Z, color=(0.65, 0.02, 0.02))
+TetriminoType(name=TetriminoLetter.S, color=(0.02, 0.65, 0.02))
+TetriminoType(name=TetriminoLetter.I, color=(0, 0.5, 1))
 
 
 class Cube(BaseCube):
@@ -0,0 +1,219 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Many games stepped together, one placement per step, for training placement policies.
+
+use super::engine::Engine;
+use super::parallel::parallel_for_each;
+use super::point::Turn;
+use super::randomizer::{Randomizer, Strategy};
+use super::rng::mix;
+use super::rotation::ROTATION_COUNT;
+
+/// Columns of `EngineBatch::pieces`.
+pub const PIECE_COLUMNS: usize = 3;
+/// Games stepped by each thread at least: a step takes about half a microsecond, spawning a thread is only worth
+/// it for a few hundred of them.
+const MIN_GAMES_PER_THREAD: usize = 256;
+
+/// Games of the same size and strategy. Each action is `rotation * width + x`: the active tetrimino is turned
+/// `rotation` times left and moved towards the `x` root column with the game kicks, as far as it goes, then hard
+/// dropped. A game that ends is restarted at once, from a seed derived from the previous one.
+#[derive(Debug, Clone)]
+pub struct EngineBatch {
+    width: usize,
+    height: usize,
+    strategy: Strategy,
+    engines: Vec<Engine>,
+    rewards: Vec<f64>,
+    dones: Vec<bool>,
+}
+
+impl EngineBatch {
+    pub fn new(seeds: &[u64], width: usize, height: usize, strategy: Strategy) -> Self {
+        let mut batch = EngineBatch {
+            width,
+            height,
+            strategy,
+            engines: Vec::with_capacity(seeds.len()),
+            rewards: vec![0.0; seeds.len()],
+            dones: vec![false; seeds.len()],
+        };
+        batch.reset(seeds);
+        batch
+    }
+
+    pub fn len(&self) -> usize {
+        self.engines.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.engines.is_empty()
+    }
+
+    pub fn action_count(&self) -> usize {
+        ROTATION_COUNT * self.width
+    }
+
+    pub fn engines(&self) -> &[Engine] {
+        &self.engines
+    }
+
+    /// Score earned by each game during the last step, the hard drop included.
+    pub fn rewards(&self) -> &[f64] {
+        &self.rewards
+    }
+
+    /// Games that ended during the last step, they have been restarted since.
+    pub fn dones(&self) -> &[bool] {
+        &self.dones
+    }
+
+    /// Restart every game, the batch takes the size of `seeds`.
+    pub fn reset(&mut self, seeds: &[u64]) {
+        self.engines = seeds
+            .iter()
+            .map(|&seed| new_engine(self.width, self.height, self.strategy, seed))
+            .collect();
+        self.rewards = vec![0.0; seeds.len()];
+        self.dones = vec![false; seeds.len()];
+    }
+
+    /// Play one action per game, there must be one per game. Large batches are stepped on every core.
+    pub fn step(&mut self, actions: &[usize]) {
+        assert_eq!(actions.len(), self.engines.len(), "one action per game");
+
+        let (width, height, strategy) = (self.width, self.height, self.strategy);
+        let mut games: Vec<_> = self.engines.iter_mut().zip(&mut self.rewards).zip(&mut self.dones).collect();
+
+        parallel_for_each(&mut games, MIN_GAMES_PER_THREAD, |idx, ((engine, reward), done)| {
+            let score = engine.score();
+            play(engine, actions[idx] / width, (actions[idx] % width) as i32);
+
+            **reward = (engine.score() - score) as f64;
+            **done = engine.is_over();
+            if engine.is_over() {
+                **engine = new_engine(width, height, strategy, mix(engine.seed()));
+            }
+        });
+    }
+
+    /// Locked cells of every game, `len * height * width` bytes laid out like `Board::cells`.
+    pub fn cells(&self, out: &mut Vec<u8>) {
+        out.clear();
+        for engine in &self.engines {
+            out.extend_from_slice(engine.board().cells());
+        }
+    }
+
+    /// Active, next and held tetriminos of every game, `len * PIECE_COLUMNS` bytes.
+    /// Like the cells, a tetrimino is its letter plus one and 0 is an empty hold.
+    pub fn pieces(&self, out: &mut Vec<u8>) {
+        out.clear();
+        for engine in &self.engines {
+            out.push(engine.active().letter as u8 + 1);
+            out.push(engine.next() as u8 + 1);
+            out.push(engine.held().map_or(0, |piece| piece.letter as u8 + 1));
+        }
+    }
+}
+
+fn new_engine(width: usize, height: usize, strategy: Strategy, seed: u64) -> Engine {
+    Engine::with_randomizer(width, height, Randomizer::new(Some(seed), strategy))
+}
+
+/// Turn the active tetrimino `rotation` times left, move it towards `x` and hard drop it.
+fn play(engine: &mut Engine, rotation: usize, x: i32) {
+    for _ in 0..rotation {
+        if !engine.rotate(Turn::Left) {
+            break;
+        }
+    }
+    let direction = (x - engine.active().position.x).signum();
+    while engine.active().position.x != x && engine.r#move(direction, 0) {}
+    engine.hard_drop();
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::engine::{HARD_DROP_SCORE, SCORE_TABLE};
+    use crate::tetrimino::TetriminoLetter;
+
+    #[test]
+    fn test_step() {
+        let mut batch = EngineBatch::new(&[1, 2, 3], 10, 20, Strategy::Bag);
+        let active: Vec<TetriminoLetter> = batch.engines().iter().map(|engine| engine.active().letter).collect();
+
+        // Rotated once, against the left wall.
+        batch.step(&[10, 10, 10]);
+        assert_eq!(batch.rewards(), [HARD_DROP_SCORE as f64; 3]);
+        assert_eq!(batch.dones(), [false; 3]);
+        for (engine, letter) in batch.engines().iter().zip(active) {
+            assert_eq!(engine.pieces(), 1);
+            let x = (0..10).find(|&x| engine.board().heights()[x] > 0).unwrap();
+            assert_eq!(x, 0, "{letter:?}");
+        }
+
+        let mut cells = Vec::new();
+        batch.cells(&mut cells);
+        assert_eq!(cells.len(), 3 * 20 * 10);
+        let mut pieces = Vec::new();
+        batch.pieces(&mut pieces);
+        assert_eq!(pieces.len(), 3 * PIECE_COLUMNS);
+        assert!(pieces.chunks(PIECE_COLUMNS).all(|row| row[0] > 0 && row[1] > 0 && row[2] == 0));
+    }
+
+    #[test]
+    fn test_parallel_step() {
+        // Enough games for several threads, each one plays as if alone.
+        let seeds: Vec<u64> = (0..4 * MIN_GAMES_PER_THREAD as u64).collect();
+        let mut batch = EngineBatch::new(&seeds, 10, 20, Strategy::Bag);
+        let mut alone: Vec<EngineBatch> = seeds
+            .iter()
+            .map(|&seed| EngineBatch::new(&[seed], 10, 20, Strategy::Bag))
+            .collect();
+
+        for step in 0..20 {
+            let actions: Vec<usize> = (0..seeds.len()).map(|idx| (idx * 7 + step * 3) % 40).collect();
+            batch.step(&actions);
+            for (idx, game) in alone.iter_mut().enumerate() {
+                game.step(&actions[idx..=idx]);
+                assert_eq!(batch.rewards()[idx], game.rewards()[0]);
+                assert_eq!(batch.dones()[idx], game.dones()[0]);
+                assert_eq!(batch.engines()[idx].board(), game.engines()[0].board());
+            }
+        }
+    }
+
+    #[test]
+    fn test_restart() {
+        let mut batch = EngineBatch::new(&[5], 10, 20, Strategy::Bag);
+        let mut steps = 0;
+        // Every tetrimino dropped in the middle column tops out quickly.
+        while !batch.dones()[0] {
+            batch.step(&[4]);
+            steps += 1;
+            assert!(steps < 100);
+        }
+        assert_eq!(batch.engines()[0].pieces(), 0);
+        assert_eq!(batch.engines()[0].seed(), mix(5));
+        assert!(batch.rewards()[0] >= HARD_DROP_SCORE as f64);
+        assert!(batch.rewards()[0] < (HARD_DROP_SCORE + SCORE_TABLE[1]) as f64);
+    }
+}
@@ -0,0 +1,317 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+use super::point::Point;
+
+const WORD_BITS: usize = u64::BITS as usize;
+
+/// Occupancy of a tetrimino, stored as one small bitmask per row.
+///
+/// Bit `n` of `rows[r]` is the cell at `(left + n, bottom + r)`, relative to the tetrimino origin.
+#[derive(Debug, Default, Clone, Copy, PartialEq)]
+pub struct PieceMask {
+    pub left: i32,
+    pub bottom: i32,
+    pub width: i32,
+    pub height: i32,
+    pub rows: [u64; 4],
+}
+
+impl PieceMask {
+    pub fn from_points(points: &[Point; 4]) -> Self {
+        let left = points.iter().map(|p| p.x).min().unwrap_or_default();
+        let bottom = points.iter().map(|p| p.y).min().unwrap_or_default();
+        let right = points.iter().map(|p| p.x).max().unwrap_or_default();
+        let top = points.iter().map(|p| p.y).max().unwrap_or_default();
+
+        let mut rows = [0; 4];
+        for point in points {
+            rows[(point.y - bottom) as usize] |= 1 << (point.x - left);
+        }
+
+        PieceMask {
+            left,
+            bottom,
+            width: right - left + 1,
+            height: top - bottom + 1,
+            rows,
+        }
+    }
+}
+
+/// Grid occupancy, one bit per cell.
+///
+/// Each row is stored as `words` consecutive `u64`, so a collision test only costs a couple of AND/shift
+/// per tetrimino row whatever the grid width is.
+#[derive(Debug, PartialEq)]
+pub struct Bitboard {
+    width: usize,
+    height: usize,
+    words: usize,
+    rows: Vec<u64>,
+}
+
+impl Clone for Bitboard {
+    fn clone(&self) -> Self {
+        Bitboard {
+            width: self.width,
+            height: self.height,
+            words: self.words,
+            rows: self.rows.clone(),
+        }
+    }
+
+    /// Reuse the allocation, to evaluate many placements on a scratch copy.
+    fn clone_from(&mut self, source: &Self) {
+        self.width = source.width;
+        self.height = source.height;
+        self.words = source.words;
+        self.rows.clone_from(&source.rows);
+    }
+}
+
+impl Bitboard {
+    pub fn new(width: usize, height: usize) -> Self {
+        let words = width.div_ceil(WORD_BITS).max(1);
+
+        Bitboard {
+            width,
+            height,
+            words,
+            rows: vec![0; words * height],
+        }
+    }
+
+    pub fn width(&self) -> usize {
+        self.width
+    }
+
+    pub fn height(&self) -> usize {
+        self.height
+    }
+
+    fn row(&self, y: usize) -> &[u64] {
+        &self.rows[y * self.words..(y + 1) * self.words]
+    }
+
+    fn row_mut(&mut self, y: usize) -> &mut [u64] {
+        &mut self.rows[y * self.words..(y + 1) * self.words]
+    }
+
+    /// Mask of the valid bits of the word `idx` of a row.
+    fn word_mask(&self, idx: usize) -> u64 {
+        let used = self.width - idx * WORD_BITS;
+        if used >= WORD_BITS {
+            u64::MAX
+        } else {
+            (1 << used) - 1
+        }
+    }
+
+    pub fn is_inside(&self, x: i32, y: i32) -> bool {
+        0 <= x && (x as usize) < self.width && 0 <= y && (y as usize) < self.height
+    }
+
+    pub fn get(&self, x: usize, y: usize) -> bool {
+        self.row(y)[x / WORD_BITS] >> (x % WORD_BITS) & 1 == 1
+    }
+
+    pub fn set(&mut self, x: usize, y: usize) {
+        self.row_mut(y)[x / WORD_BITS] |= 1 << (x % WORD_BITS);
+    }
+
+    /// Check if the piece, moved to `(x, y)`, overlaps a filled cell or goes outside the grid.
+    pub fn collides(&self, mask: &PieceMask, x: i32, y: i32) -> bool {
+        let left = x + mask.left;
+        let bottom = y + mask.bottom;
+
+        let is_outside = left < 0
+            || bottom < 0
+            || left + mask.width > self.width as i32
+            || bottom + mask.height > self.height as i32;
+        if is_outside {
+            return true;
+        }
+
+        let word = left as usize / WORD_BITS;
+        let shift = left as usize % WORD_BITS;
+
+        for (r, piece_row) in mask.rows[..mask.height as usize].iter().enumerate() {
+            let row = self.row(bottom as usize + r);
+
+            if row[word] & (piece_row << shift) != 0 {
+                return true;
+            }
+            // The piece row straddles two words
+            if shift != 0 && word + 1 < self.words && row[word + 1] & (piece_row >> (WORD_BITS - shift)) != 0 {
+                return true;
+            }
+        }
+        false
+    }
+
+    /// Number of rows the piece at `(x, y)` can fall before landing.
+    pub fn drop_distance(&self, mask: &PieceMask, x: i32, y: i32) -> i32 {
+        let mut distance = 0;
+        while !self.collides(mask, x, y - distance - 1) {
+            distance += 1;
+        }
+        distance
+    }
+
+    /// Fill the cells of the piece moved to `(x, y)`. The piece must be inside the grid.
+    pub fn put(&mut self, mask: &PieceMask, x: i32, y: i32) {
+        let left = (x + mask.left) as usize;
+        let bottom = (y + mask.bottom) as usize;
+
+        let word = left / WORD_BITS;
+        let shift = left % WORD_BITS;
+        let words = self.words;
+
+        for (r, piece_row) in mask.rows[..mask.height as usize].iter().enumerate() {
+            let row = self.row_mut(bottom + r);
+
+            row[word] |= piece_row << shift;
+            if shift != 0 && word + 1 < words {
+                row[word + 1] |= piece_row >> (WORD_BITS - shift);
+            }
+        }
+    }
+
+    pub fn is_row_full(&self, y: usize) -> bool {
+        self.row(y)
+            .iter()
+            .enumerate()
+            .all(|(idx, word)| *word == self.word_mask(idx))
+    }
+
+    pub fn is_row_empty(&self, y: usize) -> bool {
+        self.row(y).iter().all(|word| *word == 0)
+    }
+
+    /// Changes between filled and empty cells along the row, the walls counting as filled.
+    pub fn row_transitions(&self, y: usize) -> u32 {
+        let mut transitions = 0;
+        // Last cell of the previous word, the left wall first
+        let mut previous = 1;
+
+        for (idx, word) in self.row(y).iter().enumerate() {
+            let used = (self.width - idx * WORD_BITS).min(WORD_BITS);
+            transitions += ((word ^ (word << 1 | previous)) & self.word_mask(idx)).count_ones();
+            previous = word >> (used - 1) & 1;
+        }
+        transitions + (previous == 0) as u32
+    }
+
+    pub fn clear_row(&mut self, y: usize) {
+        self.row_mut(y).fill(0);
+    }
+
+    /// Overwrite the row `to` with the content of the row `from`.
+    pub fn copy_row(&mut self, from: usize, to: usize) {
+        let words = self.words;
+        self.rows.copy_within(from * words..(from + 1) * words, to * words);
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn t_mask() -> PieceMask {
+        PieceMask::from_points(&[
+            Point::new(0, 0),
+            Point::new(1, 0),
+            Point::new(-1, 0),
+            Point::new(0, -1),
+        ])
+    }
+
+    #[test]
+    fn test_piece_mask() {
+        let mask = t_mask();
+
+        assert_eq!((mask.left, mask.bottom, mask.width, mask.height), (-1, -1, 3, 2));
+        assert_eq!(mask.rows, [0b010, 0b111, 0, 0]);
+    }
+
+    #[test]
+    fn test_collides_with_walls() {
+        let board = Bitboard::new(10, 20);
+        let mask = t_mask();
+
+        assert!(!board.collides(&mask, 1, 1));
+        assert!(board.collides(&mask, 0, 1));
+        assert!(board.collides(&mask, 9, 1));
+        assert!(board.collides(&mask, 4, 0));
+        assert!(board.collides(&mask, 4, 20));
+    }
+
+    #[test]
+    fn test_collides_with_cells() {
+        let mut board = Bitboard::new(10, 20);
+        let mask = t_mask();
+        board.set(4, 0);
+
+        assert!(board.collides(&mask, 4, 1));
+        assert!(!board.collides(&mask, 4, 2));
+        assert!(!board.collides(&mask, 6, 1));
+    }
+
+    #[test]
+    fn test_drop_distance() {
+        let mut board = Bitboard::new(10, 20);
+        let mask = t_mask();
+        assert_eq!(board.drop_distance(&mask, 4, 19), 18);
+
+        board.set(5, 3);
+        assert_eq!(board.drop_distance(&mask, 4, 19), 15);
+        assert_eq!(board.drop_distance(&mask, 4, 1), 0);
+    }
+
+    #[test]
+    fn test_wide_board() {
+        let mut board = Bitboard::new(200, 4);
+        let mask = t_mask();
+        board.put(&mask, 64, 1);
+
+        assert!(board.get(63, 1) && board.get(64, 1) && board.get(65, 1) && board.get(64, 0));
+        assert!(board.collides(&mask, 63, 2));
+        assert!(!board.collides(&mask, 60, 2));
+        assert!(board.collides(&mask, 199, 1));
+        assert!(!board.collides(&mask, 198, 1));
+    }
+
+    #[test]
+    fn test_full_rows() {
+        let mut board = Bitboard::new(70, 2);
+        (0..70).for_each(|x| board.set(x, 0));
+        board.set(3, 1);
+
+        assert!(board.is_row_full(0));
+        assert!(!board.is_row_full(1));
+
+        assert_eq!(board.row_transitions(0), 0);
+        assert_eq!(board.row_transitions(1), 4);
+
+        board.copy_row(1, 0);
+        board.clear_row(1);
+        assert!(board.get(3, 0) && !board.get(4, 0));
+        assert!(board.is_row_empty(1));
+    }
+}
@@ -0,0 +1,478 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Game rules shared by the Maya grid and the headless game state.
+
+use super::bitboard::Bitboard;
+use super::point::{Point, Turn};
+use super::rotation;
+use super::tetrimino::TetriminoLetter;
+use super::zobrist;
+
+/// Logical state of a tetrimino: its type, rotation and root position.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub struct Piece {
+    pub letter: TetriminoLetter,
+    pub rotation: usize,
+    pub position: Point,
+}
+
+impl Piece {
+    pub fn new(letter: TetriminoLetter, rotation: usize, position: Point) -> Self {
+        Piece {
+            letter,
+            rotation,
+            position,
+        }
+    }
+
+    pub fn cells(&self) -> [Point; 4] {
+        let shape = rotation::shape(self.letter, self.rotation);
+
+        std::array::from_fn(|i| Point::new(self.position.x + shape[i].x, self.position.y + shape[i].y))
+    }
+
+    pub fn offset(&self, x: i32, y: i32) -> Self {
+        Piece::new(self.letter, self.rotation, Point::new(self.position.x + x, self.position.y + y))
+    }
+
+    /// `(x, rotation, y)` as seen from Python.
+    pub fn as_placement(&self) -> (i32, usize, i32) {
+        (self.position.x, self.rotation, self.position.y)
+    }
+}
+
+/// What happened to a row during a line clear.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum RowChange {
+    Cleared,
+    /// The row fell by this number of rows.
+    Dropped(usize),
+}
+
+/// Locked cells of a grid, with the tetrimino type of each cell.
+///
+/// The surface features used to evaluate a position are kept up to date on each lock and line clear,
+/// so reading them is free.
+#[derive(Debug, PartialEq)]
+pub struct Board {
+    bits: Bitboard,
+    /// Row-major, `0` is an empty cell, otherwise the `TetriminoLetter` index + 1.
+    /// Never reallocated, Python holds views on it.
+    cells: Vec<u8>,
+    /// Filled cells of each row.
+    row_fill: Vec<u32>,
+    /// Row above the highest filled cell of each column.
+    heights: Vec<u32>,
+    cell_count: usize,
+    aggregate_height: usize,
+    bumpiness: usize,
+    /// Zobrist hash of the filled cells of each row, see `zobrist`.
+    row_hashes: Vec<u64>,
+    hash: u64,
+}
+
+impl Clone for Board {
+    fn clone(&self) -> Self {
+        Board {
+            bits: self.bits.clone(),
+            cells: self.cells.clone(),
+            row_fill: self.row_fill.clone(),
+            heights: self.heights.clone(),
+            row_hashes: self.row_hashes.clone(),
+            ..*self
+        }
+    }
+
+    fn clone_from(&mut self, source: &Self) {
+        self.bits.clone_from(&source.bits);
+        self.cells.clone_from(&source.cells);
+        self.row_fill.clone_from(&source.row_fill);
+        self.heights.clone_from(&source.heights);
+        self.cell_count = source.cell_count;
+        self.aggregate_height = source.aggregate_height;
+        self.bumpiness = source.bumpiness;
+        self.row_hashes.clone_from(&source.row_hashes);
+        self.hash = source.hash;
+    }
+}
+
+impl Board {
+    pub fn new(width: usize, height: usize) -> Self {
+        Board {
+            bits: Bitboard::new(width, height),
+            cells: vec![0; width * height],
+            row_fill: vec![0; height],
+            heights: vec![0; width],
+            cell_count: 0,
+            aggregate_height: 0,
+            bumpiness: 0,
+            row_hashes: vec![0; height],
+            hash: 0,
+        }
+    }
+
+    pub fn width(&self) -> usize {
+        self.bits.width()
+    }
+
+    pub fn height(&self) -> usize {
+        self.bits.height()
+    }
+
+    pub fn bits(&self) -> &Bitboard {
+        &self.bits
+    }
+
+    pub fn cells(&self) -> &[u8] {
+        &self.cells
+    }
+
+    pub fn cell(&self, x: usize, y: usize) -> u8 {
+        self.cells[y * self.width() + x]
+    }
+
+    pub fn row_fill(&self) -> &[u32] {
+        &self.row_fill
+    }
+
+    pub fn heights(&self) -> &[u32] {
+        &self.heights
+    }
+
+    /// Row above the highest filled cell.
+    pub fn stack_height(&self) -> usize {
+        self.heights.iter().max().copied().unwrap_or_default() as usize
+    }
+
+    /// Sum of the column heights.
+    pub fn aggregate_height(&self) -> usize {
+        self.aggregate_height
+    }
+
+    /// Empty cells under the top of their column.
+    pub fn holes(&self) -> usize {
+        self.aggregate_height - self.cell_count
+    }
+
+    /// Sum of the height differences between neighbour columns.
+    pub fn bumpiness(&self) -> usize {
+        self.bumpiness
+    }
+
+    /// Zobrist hash of the occupancy, equal for boards with the same filled cells whatever their type.
+    pub fn hash(&self) -> u64 {
+        self.hash
+    }
+
+    /// Root position of a new tetrimino.
+    pub fn spawn_position(&self) -> Point {
+        Point::new(self.width() as i32 / 2 - 1, self.height() as i32 - 1)
+    }
+
+    pub fn fits(&self, piece: &Piece) -> bool {
+        let mask = rotation::mask(piece.letter, piece.rotation);
+        !self.bits.collides(mask, piece.position.x, piece.position.y)
+    }
+
+    pub fn moved(&self, piece: &Piece, x: i32, y: i32) -> Option<Piece> {
+        let moved = piece.offset(x, y);
+        self.fits(&moved).then_some(moved)
+    }
+
+    /// Turn the piece, pushing it back inside the grid if needed, then try each kick until one fits.
+    pub fn rotated(&self, piece: &Piece, angle: Turn) -> Option<Piece> {
+        let to = rotation::turn(piece.rotation, angle);
+        let mask = rotation::mask(piece.letter, to);
+
+        let left = piece.position.x + mask.left;
+        let right = left + mask.width - 1;
+        let bottom = piece.position.y + mask.bottom;
+        let top = bottom + mask.height - 1;
+
+        let inside_offset = Point::new(
+            (-left).max(0) + (self.width() as i32 - 1 - right).min(0),
+            (-bottom).max(0) + (self.height() as i32 - 1 - top).min(0),
+        );
+
+        rotation::kicks(piece.letter, piece.rotation, to)
+            .iter()
+            .map(|kick| {
+                Piece::new(
+                    piece.letter,
+                    to,
+                    Point::new(
+                        piece.position.x + inside_offset.x + kick.x,
+                        piece.position.y + inside_offset.y + kick.y,
+                    ),
+                )
+            })
+            .find(|rotated| self.fits(rotated))
+    }
+
+    /// Number of rows the piece can fall before landing.
+    pub fn drop_distance(&self, piece: &Piece) -> i32 {
+        let mask = rotation::mask(piece.letter, piece.rotation);
+        self.bits.drop_distance(mask, piece.position.x, piece.position.y)
+    }
+
+    /// Store the piece cells. The piece must fit.
+    /// Return true if one of its rows is completed, only those rows are checked.
+    pub fn lock(&mut self, piece: &Piece) -> bool {
+        let width = self.width();
+        let mut completed = false;
+
+        for point in piece.cells() {
+            self.fill(point.x as usize, point.y as usize, piece.letter as u8 + 1);
+            completed |= self.row_fill[point.y as usize] as usize == width;
+        }
+        completed
+    }
+
+    fn fill(&mut self, x: usize, y: usize, value: u8) {
+        let width = self.width();
+        self.bits.set(x, y);
+        self.cells[y * width + x] = value;
+        self.row_fill[y] += 1;
+        self.cell_count += 1;
+
+        let row_hash = self.row_hashes[y] ^ zobrist::cell_key(x);
+        self.hash ^= zobrist::row_key(y, self.row_hashes[y]) ^ zobrist::row_key(y, row_hash);
+        self.row_hashes[y] = row_hash;
+
+        if y as u32 >= self.heights[x] {
+            self.set_height(x, y as u32 + 1);
+        }
+    }
+
+    fn set_height(&mut self, x: usize, height: u32) {
+        let previous = self.heights[x];
+        let neighbours = [x.checked_sub(1), Some(x + 1).filter(|n| *n < self.width())];
+
+        for neighbour in neighbours.into_iter().flatten() {
+            let other = self.heights[neighbour];
+            self.bumpiness = self.bumpiness - previous.abs_diff(other) as usize + height.abs_diff(other) as usize;
+        }
+        self.aggregate_height = self.aggregate_height - previous as usize + height as usize;
+        self.heights[x] = height;
+    }
+
+    /// Remove the completed rows and drop the others, in a single bottom-up pass.
+    ///
+    /// `on_change` is called with the original index of every cleared row and of every non-empty row that fell,
+    /// so a view can mirror the compaction.
+    pub fn clear_completed_rows(&mut self, mut on_change: impl FnMut(usize, RowChange)) -> usize {
+        let width = self.width();
+        let mut completed_rows = 0;
+
+        // Rows above the stack are empty
+        for row_idx in 0..self.stack_height() {
+            let fill = self.row_fill[row_idx] as usize;
+
+            if fill == width {
+                on_change(row_idx, RowChange::Cleared);
+
+                self.bits.clear_row(row_idx);
+                self.cells[row_idx * width..(row_idx + 1) * width].fill(0);
+                self.row_fill[row_idx] = 0;
+                self.row_hashes[row_idx] = 0;
+                completed_rows += 1;
+            } else if completed_rows > 0 && fill > 0 {
+                on_change(row_idx, RowChange::Dropped(completed_rows));
+
+                // The destination row is always empty
+                let destination = row_idx - completed_rows;
+                self.bits.copy_row(row_idx, destination);
+                self.bits.clear_row(row_idx);
+                self.cells
+                    .copy_within(row_idx * width..(row_idx + 1) * width, destination * width);
+                self.cells[row_idx * width..(row_idx + 1) * width].fill(0);
+                self.row_fill[destination] = self.row_fill[row_idx];
+                self.row_fill[row_idx] = 0;
+                self.row_hashes[destination] = self.row_hashes[row_idx];
+                self.row_hashes[row_idx] = 0;
+            }
+        }
+
+        if completed_rows > 0 {
+            self.update_features(completed_rows);
+        }
+        completed_rows
+    }
+
+    /// Recompute the column features and the hash after a line clear.
+    ///
+    /// A completed row has a cell in every column, so each column lost at least `completed_rows` in height.
+    /// The uncovered holes are then skipped.
+    fn update_features(&mut self, completed_rows: usize) {
+        self.cell_count -= completed_rows * self.width();
+
+        for x in 0..self.width() {
+            let mut height = self.heights[x] as usize - completed_rows;
+            while height > 0 && !self.bits.get(x, height - 1) {
+                height -= 1;
+            }
+            self.heights[x] = height as u32;
+        }
+
+        self.aggregate_height = self.heights.iter().map(|h| *h as usize).sum();
+        self.bumpiness = self.heights.windows(2).map(|w| w[0].abs_diff(w[1]) as usize).sum();
+
+        // Every row above the first cleared one moved
+        self.hash = (0..self.stack_height()).fold(0, |hash, y| hash ^ zobrist::row_key(y, self.row_hashes[y]));
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn fill_row(board: &mut Board, y: usize, skip: &[usize]) {
+        for x in (0..board.width()).filter(|x| !skip.contains(x)) {
+            board.fill(x, y, 1);
+        }
+    }
+
+    /// Surface features computed from scratch.
+    fn features(board: &Board) -> (Vec<u32>, usize, usize) {
+        let heights: Vec<u32> = (0..board.width())
+            .map(|x| (0..board.height()).rev().find(|y| board.bits.get(x, *y)).map_or(0, |y| y as u32 + 1))
+            .collect();
+        let holes = (0..board.width())
+            .map(|x| (0..heights[x] as usize).filter(|y| !board.bits.get(x, *y)).count())
+            .sum();
+        let bumpiness = heights.windows(2).map(|w| w[0].abs_diff(w[1]) as usize).sum();
+        (heights, holes, bumpiness)
+    }
+
+    #[test]
+    fn test_lock() {
+        let mut board = Board::new(10, 20);
+        let piece = Piece::new(TetriminoLetter::T, 0, Point::new(4, 1));
+        board.lock(&piece);
+
+        assert_eq!(board.cell(4, 0), TetriminoLetter::T as u8 + 1);
+        assert_eq!(board.cell(3, 1), TetriminoLetter::T as u8 + 1);
+        assert_eq!(board.cell(4, 2), 0);
+        assert!(!board.fits(&piece));
+    }
+
+    #[test]
+    fn test_rotate_against_wall() {
+        let board = Board::new(10, 20);
+        let piece = Piece::new(TetriminoLetter::I, 1, Point::new(0, 10));
+
+        let rotated = board.rotated(&piece, Turn::Right).unwrap();
+        assert_eq!(rotated.rotation, 0);
+        assert_eq!(rotated.position, Point::new(1, 10));
+    }
+
+    #[test]
+    fn test_rotate_with_kick() {
+        let mut board = Board::new(10, 20);
+        board.fill(4, 11, 1);
+        let piece = Piece::new(TetriminoLetter::T, 0, Point::new(4, 10));
+
+        let rotated = board.rotated(&piece, Turn::Left).unwrap();
+        assert_eq!(rotated.position, Point::new(3, 10));
+    }
+
+    #[test]
+    fn test_rotate_blocked() {
+        let mut board = Board::new(10, 20);
+        fill_row(&mut board, 11, &[]);
+        fill_row(&mut board, 9, &[]);
+        let piece = Piece::new(TetriminoLetter::I, 0, Point::new(4, 10));
+
+        assert!(board.rotated(&piece, Turn::Left).is_none());
+        assert!(board.rotated(&Piece::new(TetriminoLetter::O, 0, Point::new(4, 15)), Turn::Left).is_none());
+    }
+
+    #[test]
+    fn test_clear_completed_rows() {
+        let mut board = Board::new(4, 6);
+        fill_row(&mut board, 0, &[]);
+        fill_row(&mut board, 1, &[2]);
+        fill_row(&mut board, 2, &[]);
+        fill_row(&mut board, 3, &[0]);
+
+        let mut changes = Vec::new();
+        let cleared = board.clear_completed_rows(|row, change| changes.push((row, change)));
+
+        assert_eq!(cleared, 2);
+        assert_eq!(
+            changes,
+            [
+                (0, RowChange::Cleared),
+                (1, RowChange::Dropped(1)),
+                (2, RowChange::Cleared),
+                (3, RowChange::Dropped(2)),
+            ]
+        );
+        assert_eq!(&board.cells()[..8], &[1, 1, 0, 1, 0, 1, 1, 1]);
+        assert!(board.cells()[8..].iter().all(|c| *c == 0));
+        assert!(board.bits().get(1, 1) && !board.bits().get(0, 1));
+        assert!((2..6).all(|y| board.bits().is_row_empty(y)));
+        assert_eq!(board.row_fill(), [3, 3, 0, 0, 0, 0]);
+    }
+
+    #[test]
+    fn test_incremental_features() {
+        let mut board = Board::new(4, 8);
+        fill_row(&mut board, 0, &[1]);
+        fill_row(&mut board, 1, &[]);
+        fill_row(&mut board, 2, &[0]);
+        board.fill(3, 5, 1);
+        assert_eq!((board.heights().to_vec(), board.holes(), board.bumpiness()), features(&board));
+        assert_eq!(board.heights(), [2, 3, 3, 6]);
+        assert_eq!(board.holes(), 1 + 2);
+
+        let piece = Piece::new(TetriminoLetter::I, 1, Point::new(0, 3));
+        assert!(board.lock(&piece));
+        assert_eq!(board.clear_completed_rows(|_, _| {}), 2);
+
+        assert_eq!((board.heights().to_vec(), board.holes(), board.bumpiness()), features(&board));
+        assert_eq!(board.heights(), [4, 0, 1, 4]);
+        assert_eq!((board.aggregate_height(), board.holes(), board.bumpiness()), (9, 2, 8));
+        assert_eq!(board.row_fill(), [3, 1, 1, 2, 0, 0, 0, 0]);
+    }
+
+    #[test]
+    fn test_hash() {
+        let mut board = Board::new(4, 8);
+        assert_eq!(board.hash(), 0);
+
+        fill_row(&mut board, 0, &[]);
+        fill_row(&mut board, 1, &[2]);
+        let before_clear = board.hash();
+        assert_ne!(before_clear, 0);
+        board.clear_completed_rows(|_, _| {});
+
+        let mut expected = Board::new(4, 8);
+        fill_row(&mut expected, 0, &[2]);
+        assert_eq!(board.hash(), expected.hash());
+        assert_ne!(board.hash(), before_clear);
+
+        // Same cells, another order and other types
+        let mut other = Board::new(4, 8);
+        for x in [3, 1, 0] {
+            other.fill(x, 0, 5);
+        }
+        assert_eq!(other.hash(), expected.hash());
+    }
+}
@@ -0,0 +1,149 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Steps at a fixed period on a native thread, until canceled.
+
+use std::sync::{Condvar, Mutex};
+use std::thread;
+use std::time::{Duration, Instant};
+
+/// Condition variable timeouts follow the coarse system tick on some platforms, 15.6 ms on Windows,
+/// while `thread::sleep` uses a high resolution timer. The end of each wait is slept instead.
+const SLEEP_MARGIN: Duration = Duration::from_millis(20);
+/// The sleep is sliced to notice a cancellation meanwhile.
+const SLEEP_SLICE: Duration = Duration::from_millis(1);
+
+/// Cancellation shared between the thread running the steps and the one owning it.
+#[derive(Debug, Default)]
+pub struct Clock {
+    canceled: Mutex<bool>,
+    wake: Condvar,
+}
+
+impl Clock {
+    pub fn new() -> Self {
+        Clock::default()
+    }
+
+    /// Stop `run` as soon as possible, no step is called afterwards.
+    pub fn cancel(&self) {
+        *self.canceled.lock().unwrap_or_else(|err| err.into_inner()) = true;
+        self.wake.notify_all();
+    }
+
+    pub fn is_canceled(&self) -> bool {
+        *self.canceled.lock().unwrap_or_else(|err| err.into_inner())
+    }
+
+    /// Call `on_step` `steps` times, every `period`. Return `false` if canceled before the end.
+    ///
+    /// The steps are scheduled from the start time rather than from the previous step, so a late step doesn't
+    /// delay the next ones. The thread doesn't wake up between the steps.
+    pub fn run(&self, period: Duration, steps: usize, mut on_step: impl FnMut()) -> bool {
+        let start = Instant::now();
+        for step in 1..=steps {
+            if !self.wait_until(start + period * step as u32) {
+                return false;
+            }
+            on_step();
+        }
+        !self.is_canceled()
+    }
+
+    /// Block until `deadline`. Return `false` if canceled meanwhile.
+    fn wait_until(&self, deadline: Instant) -> bool {
+        let mut canceled = self.canceled.lock().unwrap_or_else(|err| err.into_inner());
+        loop {
+            if *canceled {
+                return false;
+            }
+            let remaining = deadline.saturating_duration_since(Instant::now());
+            if remaining <= SLEEP_MARGIN {
+                break;
+            }
+            canceled = self
+                .wake
+                .wait_timeout(canceled, remaining - SLEEP_MARGIN)
+                .unwrap_or_else(|err| err.into_inner())
+                .0;
+        }
+        drop(canceled);
+
+        loop {
+            let remaining = deadline.saturating_duration_since(Instant::now());
+            if remaining.is_zero() {
+                return !self.is_canceled();
+            }
+            thread::sleep(remaining.min(SLEEP_SLICE));
+            if self.is_canceled() {
+                return false;
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::sync::Arc;
+
+    #[test]
+    fn test_run() {
+        let clock = Clock::new();
+        let period = Duration::from_millis(5);
+        let start = Instant::now();
+        let mut times = Vec::new();
+
+        assert!(clock.run(period, 4, || times.push(start.elapsed())));
+        assert_eq!(times.len(), 4);
+        for (idx, time) in times.iter().enumerate() {
+            assert!(*time >= period * (idx as u32 + 1), "{times:?}");
+        }
+    }
+
+    #[test]
+    fn test_cancel() {
+        let clock = Arc::new(Clock::new());
+        let runner = Arc::clone(&clock);
+        let thread = thread::spawn(move || {
+            let mut steps = 0;
+            let completed = runner.run(Duration::from_secs(60), 10, || steps += 1);
+            (completed, steps)
+        });
+
+        let start = Instant::now();
+        clock.cancel();
+        assert_eq!(thread.join().unwrap(), (false, 0));
+        assert!(start.elapsed() < Duration::from_secs(1));
+    }
+
+    #[test]
+    fn test_cancel_while_sleeping() {
+        // The whole wait is within the sleep margin.
+        let period = SLEEP_MARGIN - Duration::from_millis(1);
+        let clock = Arc::new(Clock::new());
+        let runner = Arc::clone(&clock);
+        let start = Instant::now();
+        let thread = thread::spawn(move || runner.run(period, 1, || {}));
+
+        thread::sleep(Duration::from_millis(2));
+        clock.cancel();
+        assert!(!thread.join().unwrap());
+        assert!(start.elapsed() < period, "{:?}", start.elapsed());
+    }
+}
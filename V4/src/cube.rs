@@ -18,7 +18,7 @@
 
 use super::maya;
 use super::point::Point;
-use pyo3::{pyclass, pymethods};
+use pyo3::{pyclass, pymethods, PyResult, Python};
 use stubgen_macro::stubgen;
 
 #[stubgen]
@@ -38,17 +38,13 @@ impl Cube {
 
     /// Move the cube to the desired coordinates.
     #[pyo3(name = "move")]
-    pub fn py_move(&self, x: i32, y: i32) {
-        self.r#move(Point::new(x, y), maya::Move::Absolute);
+    pub fn py_move(&self, py: Python<'_>, x: i32, y: i32) -> PyResult<()> {
+        self.r#move(py, Point::new(x, y), maya::Move::Absolute)
     }
 }
 
 impl Cube {
-    pub fn get_position(&self) -> Point {
-        Point::from(maya::get_position(self.name.as_str()))
-    }
-
-    pub fn r#move(&self, position: Point, mode: maya::Move) {
-        maya::r#move(self.name.as_str(), position.x, position.y, 0, mode)
+    pub fn r#move(&self, py: Python<'_>, position: Point, mode: maya::Move) -> PyResult<()> {
+        maya::r#move(py, self.name.as_str(), position.x, position.y, 0, mode)
     }
 }
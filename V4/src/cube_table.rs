@@ -0,0 +1,188 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Compact handles on the Maya cubes locked in a grid.
+
+use std::num::NonZeroU32;
+
+/// Handle of a cube name in a `CubeTable`.
+///
+/// Never zero, so an `Option<CubeId>` cell is still 4 plain bytes.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub struct CubeId(NonZeroU32);
+
+impl CubeId {
+    fn index(self) -> usize {
+        self.0.get() as usize - 1
+    }
+}
+
+/// Handle of a tetrimino group node in a `CubeTable`.
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub struct GroupId(usize);
+
+/// Strings indexed by slot. Released slots are reused, along with their string allocation.
+#[derive(Debug, Default)]
+struct Names {
+    names: Vec<String>,
+    free: Vec<usize>,
+}
+
+impl Names {
+    fn insert(&mut self, name: &str) -> usize {
+        match self.free.pop() {
+            Some(idx) => {
+                let slot = &mut self.names[idx];
+                slot.clear();
+                slot.push_str(name);
+                idx
+            }
+            None => {
+                self.names.push(name.to_string());
+                self.names.len() - 1
+            }
+        }
+    }
+
+    fn release(&mut self, idx: usize) {
+        self.free.push(idx);
+    }
+
+    fn len(&self) -> usize {
+        self.names.len() - self.free.len()
+    }
+}
+
+/// Node names of the locked cubes, indexed by `CubeId`, and of the tetrimino groups holding them.
+///
+/// A group is released along with its last cube, so the emptied group nodes can be deleted from the scene.
+#[derive(Debug, Default)]
+pub struct CubeTable {
+    cubes: Names,
+    /// Group of each cube slot.
+    cube_groups: Vec<GroupId>,
+    groups: Names,
+    /// Live cubes of each group slot.
+    group_sizes: Vec<u32>,
+}
+
+impl CubeTable {
+    pub fn new() -> Self {
+        CubeTable::default()
+    }
+
+    /// Empty group, released with the last of its cubes: it must get at least one.
+    pub fn insert_group(&mut self, name: &str) -> GroupId {
+        let idx = self.groups.insert(name);
+        if idx == self.group_sizes.len() {
+            self.group_sizes.push(0);
+        }
+        GroupId(idx)
+    }
+
+    pub fn insert(&mut self, name: &str, group: GroupId) -> CubeId {
+        let idx = self.cubes.insert(name);
+        if idx == self.cube_groups.len() {
+            self.cube_groups.push(group);
+        } else {
+            self.cube_groups[idx] = group;
+        }
+        self.group_sizes[group.0] += 1;
+        CubeId(NonZeroU32::new(idx as u32 + 1).unwrap())
+    }
+
+    pub fn name(&self, id: CubeId) -> &str {
+        &self.cubes.names[id.index()]
+    }
+
+    /// Free the handle. It must not be used afterwards.
+    /// Return the name of its group if it was the last cube in it, the group is released too.
+    pub fn release(&mut self, id: CubeId) -> Option<&str> {
+        self.cubes.release(id.index());
+
+        let group = self.cube_groups[id.index()].0;
+        self.group_sizes[group] -= 1;
+        if self.group_sizes[group] > 0 {
+            return None;
+        }
+        self.groups.release(group);
+        Some(&self.groups.names[group])
+    }
+
+    /// Number of live handles.
+    pub fn len(&self) -> usize {
+        self.cubes.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.len() == 0
+    }
+
+    /// Number of groups holding live handles.
+    pub fn group_count(&self) -> usize {
+        self.groups.len()
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_option_is_compact() {
+        assert_eq!(size_of::<Option<CubeId>>(), size_of::<u32>());
+    }
+
+    #[test]
+    fn test_reuse_released_slot() {
+        let mut table = CubeTable::new();
+        let group = table.insert_group("tetris_tetrimino_T0_grp");
+        let a = table.insert("tetris_cube_1", group);
+        let b = table.insert("tetris_cube_2", group);
+        assert_ne!(a, b);
+        assert_eq!(table.name(b), "tetris_cube_2");
+
+        assert_eq!(table.release(a), None);
+        assert_eq!(table.len(), 1);
+
+        let c = table.insert("tetris_cube_3", group);
+        assert_eq!(c, a);
+        assert_eq!(table.name(c), "tetris_cube_3");
+        assert_eq!(table.len(), 2);
+    }
+
+    #[test]
+    fn test_release_empty_group() {
+        let mut table = CubeTable::new();
+        let first = table.insert_group("tetris_tetrimino_T0_grp");
+        let second = table.insert_group("tetris_tetrimino_I1_grp");
+        let cubes: Vec<CubeId> = (0..4).map(|idx| table.insert(&format!("tetris_cube_{idx}"), first)).collect();
+        let other = table.insert("tetris_cube_4", second);
+        assert_eq!(table.group_count(), 2);
+
+        for id in &cubes[..3] {
+            assert_eq!(table.release(*id), None);
+        }
+        assert_eq!(table.release(cubes[3]), Some("tetris_tetrimino_T0_grp"));
+        assert_eq!(table.group_count(), 1);
+
+        // The group slot is reused.
+        assert_eq!(table.insert_group("tetris_tetrimino_O2_grp"), first);
+        assert_eq!(table.release(other), Some("tetris_tetrimino_I1_grp"));
+    }
+}
@@ -0,0 +1,452 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Game rules without any display: spawn, moves, hold, lock, line clears, score and level.
+
+use super::board::{Board, Piece};
+use super::point::Turn;
+use super::randomizer::{Randomizer, Strategy};
+use super::tetrimino::TetriminoLetter;
+use pyo3::pyclass;
+use stubgen_macro::stubgen;
+
+/// Points for 0 to 4 rows completed at once.
+pub const SCORE_TABLE: [u64; 5] = [0, 100, 300, 500, 800];
+pub const SOFT_DROP_SCORE: u64 = 1;
+pub const HARD_DROP_SCORE: u64 = 20;
+pub const LINES_PER_LEVEL: u32 = 10;
+/// Gravity delay of the first level, in seconds.
+pub const TIME_STEP: f64 = 0.5;
+pub const TIME_STEP_MULTIPLIER: f64 = 0.66;
+
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum Hold {
+    Cant,
+    /// The active tetrimino was stored, the next one is spawned.
+    Push,
+    /// The active and the held tetriminos were exchanged.
+    Swap,
+}
+
+/// Player actions and gravity, enough to replay a game from its seed.
+#[stubgen]
+#[pyclass(eq, eq_int)]
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub enum Input {
+    Left,
+    Right,
+    SoftDrop,
+    HardDrop,
+    RotateLeft,
+    RotateRight,
+    Hold,
+    Gravity,
+}
+
+impl Input {
+    pub const ALL: [Input; 8] = [
+        Input::Left,
+        Input::Right,
+        Input::SoftDrop,
+        Input::HardDrop,
+        Input::RotateLeft,
+        Input::RotateRight,
+        Input::Hold,
+        Input::Gravity,
+    ];
+}
+
+#[derive(Debug)]
+pub struct Engine {
+    board: Board,
+    randomizer: Randomizer,
+    active: Piece,
+    next: TetriminoLetter,
+    /// The held tetrimino keeps its rotation.
+    held: Option<Piece>,
+    can_hold: bool,
+    score: u64,
+    lines: u32,
+    pieces: u64,
+    is_over: bool,
+}
+
+impl Clone for Engine {
+    fn clone(&self) -> Self {
+        Engine {
+            board: self.board.clone(),
+            randomizer: self.randomizer.clone(),
+            ..*self
+        }
+    }
+
+    /// The board is copied in place, views on its cells stay valid when restoring a snapshot.
+    fn clone_from(&mut self, source: &Self) {
+        self.board.clone_from(&source.board);
+        self.randomizer.clone_from(&source.randomizer);
+        self.active = source.active;
+        self.next = source.next;
+        self.held = source.held;
+        self.can_hold = source.can_hold;
+        self.score = source.score;
+        self.lines = source.lines;
+        self.pieces = source.pieces;
+        self.is_over = source.is_over;
+    }
+}
+
+impl Engine {
+    pub fn new(width: usize, height: usize, seed: u64) -> Self {
+        Self::with_randomizer(width, height, Randomizer::new(Some(seed), Strategy::Bag))
+    }
+
+    pub fn with_randomizer(width: usize, height: usize, randomizer: Randomizer) -> Self {
+        let board = Board::new(width, height);
+        let active = Piece::new(TetriminoLetter::T, 0, board.spawn_position());
+
+        let mut engine = Engine {
+            board,
+            randomizer,
+            active,
+            next: TetriminoLetter::T,
+            held: None,
+            can_hold: true,
+            score: 0,
+            lines: 0,
+            pieces: 0,
+            is_over: false,
+        };
+        engine.next = engine.randomizer.py_next();
+        engine.spawn();
+        engine
+    }
+
+    pub fn board(&self) -> &Board {
+        &self.board
+    }
+
+    pub fn active(&self) -> &Piece {
+        &self.active
+    }
+
+    pub fn next(&self) -> TetriminoLetter {
+        self.next
+    }
+
+    /// The `count` coming tetriminos, starting with `next`.
+    pub fn preview(&mut self, count: usize) -> Vec<TetriminoLetter> {
+        let mut preview = Vec::with_capacity(count);
+        if count > 0 {
+            preview.push(self.next);
+            preview.extend(self.randomizer.preview(count - 1));
+        }
+        preview
+    }
+
+    pub fn seed(&self) -> u64 {
+        self.randomizer.seed()
+    }
+
+    /// Draws the tetriminos after `next`.
+    pub fn randomizer(&self) -> &Randomizer {
+        &self.randomizer
+    }
+
+    pub fn held(&self) -> Option<&Piece> {
+        self.held.as_ref()
+    }
+
+    /// False once the active tetrimino was swapped with the held one.
+    pub fn can_hold(&self) -> bool {
+        self.can_hold
+    }
+
+    pub fn score(&self) -> u64 {
+        self.score
+    }
+
+    pub fn lines(&self) -> u32 {
+        self.lines
+    }
+
+    /// Starts at 0.
+    pub fn level(&self) -> u32 {
+        self.lines / LINES_PER_LEVEL
+    }
+
+    /// Number of locked tetriminos.
+    pub fn pieces(&self) -> u64 {
+        self.pieces
+    }
+
+    pub fn is_over(&self) -> bool {
+        self.is_over
+    }
+
+    /// Gravity delay of the current level, in seconds.
+    pub fn time_step(&self) -> f64 {
+        TIME_STEP * TIME_STEP_MULTIPLIER.powi(self.level() as i32)
+    }
+
+    /// Put the piece at the top of the grid. The game is over if it doesn't fit.
+    fn start(&mut self, piece: Piece) {
+        self.active = Piece::new(piece.letter, piece.rotation, self.board.spawn_position());
+        self.is_over = !self.board.fits(&self.active);
+    }
+
+    fn spawn(&mut self) {
+        let letter = self.next;
+        self.next = self.randomizer.py_next();
+        self.start(Piece::new(letter, 0, self.board.spawn_position()));
+    }
+
+    pub fn r#move(&mut self, x: i32, y: i32) -> bool {
+        if self.is_over {
+            return false;
+        }
+        match self.board.moved(&self.active, x, y) {
+            Some(moved) => {
+                self.active = moved;
+                true
+            }
+            None => false,
+        }
+    }
+
+    pub fn rotate(&mut self, angle: Turn) -> bool {
+        if self.is_over {
+            return false;
+        }
+        match self.board.rotated(&self.active, angle) {
+            Some(rotated) => {
+                self.active = rotated;
+                true
+            }
+            None => false,
+        }
+    }
+
+    /// Move the active tetrimino one row down. Scored even if it has already landed.
+    pub fn soft_drop(&mut self) -> bool {
+        if self.is_over {
+            return false;
+        }
+        self.score += SOFT_DROP_SCORE;
+        self.r#move(0, -1)
+    }
+
+    /// Drop and lock the active tetrimino. Return the number of completed rows.
+    pub fn hard_drop(&mut self) -> usize {
+        if self.is_over {
+            return 0;
+        }
+        let distance = self.board.drop_distance(&self.active);
+        self.active = self.active.offset(0, -distance);
+        self.score += HARD_DROP_SCORE;
+        self.lock()
+    }
+
+    /// Gravity step: move the active tetrimino down, or lock it if it has landed.
+    /// Return `true` if it moved.
+    pub fn step(&mut self) -> bool {
+        if self.is_over {
+            return false;
+        }
+        if self.r#move(0, -1) {
+            return true;
+        }
+        self.lock();
+        false
+    }
+
+    /// Store the active tetrimino, clear the completed rows, then spawn the next one.
+    /// Return the number of completed rows.
+    pub fn lock(&mut self) -> usize {
+        if self.is_over {
+            return 0;
+        }
+        let completed_rows = if self.board.lock(&self.active) {
+            self.board.clear_completed_rows(|_, _| {})
+        } else {
+            0
+        };
+        self.pieces += 1;
+
+        self.score += SCORE_TABLE.get(completed_rows).copied().unwrap_or_default();
+        self.lines += completed_rows as u32;
+        self.can_hold = true;
+
+        self.spawn();
+        completed_rows
+    }
+
+    /// Hard drop the active tetrimino from a reachable position, see `PlacementSearch`.
+    /// Return the number of completed rows.
+    pub fn place(&mut self, piece: Piece) -> usize {
+        if self.is_over {
+            return 0;
+        }
+        self.active = piece;
+        self.hard_drop()
+    }
+
+    pub fn apply(&mut self, input: Input) {
+        match input {
+            Input::Left => {
+                self.r#move(-1, 0);
+            }
+            Input::Right => {
+                self.r#move(1, 0);
+            }
+            Input::SoftDrop => {
+                self.soft_drop();
+            }
+            Input::HardDrop => {
+                self.hard_drop();
+            }
+            Input::RotateLeft => {
+                self.rotate(Turn::Left);
+            }
+            Input::RotateRight => {
+                self.rotate(Turn::Right);
+            }
+            Input::Hold => {
+                self.hold();
+            }
+            Input::Gravity => {
+                self.step();
+            }
+        }
+    }
+
+    /// Store the active tetrimino, once per spawned tetrimino.
+    pub fn hold(&mut self) -> Hold {
+        if self.is_over || !self.can_hold {
+            return Hold::Cant;
+        }
+        self.can_hold = false;
+
+        let active = self.active;
+        match self.held.replace(active) {
+            Some(held) => {
+                self.start(held);
+                Hold::Swap
+            }
+            None => {
+                self.spawn();
+                Hold::Push
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::point::Point;
+
+    #[test]
+    fn test_same_seed_same_game() {
+        let mut a = Engine::new(10, 20, 7);
+        let mut b = Engine::new(10, 20, 7);
+
+        for _ in 0..50 {
+            assert_eq!(a.active(), b.active());
+            assert_eq!(a.hard_drop(), b.hard_drop());
+        }
+        assert_eq!(a.board(), b.board());
+    }
+
+    #[test]
+    fn test_bag() {
+        let mut engine = Engine::new(10, 20, 3);
+        let mut letters: Vec<_> = (0..7)
+            .map(|_| {
+                let letter = engine.active().letter;
+                engine.spawn();
+                letter as usize
+            })
+            .collect();
+        letters.sort();
+        assert_eq!(letters, [0, 1, 2, 3, 4, 5, 6]);
+    }
+
+    #[test]
+    fn test_hold() {
+        let mut engine = Engine::new(10, 20, 0);
+        let first = engine.active().letter;
+        engine.rotate(Turn::Left);
+        let rotation = engine.active().rotation;
+
+        assert_eq!(engine.hold(), Hold::Push);
+        assert_eq!(engine.hold(), Hold::Cant);
+
+        engine.hard_drop();
+        let third = engine.active().letter;
+        assert_eq!(engine.hold(), Hold::Swap);
+        assert_eq!(engine.active().letter, first);
+        assert_eq!(engine.active().rotation, rotation);
+        assert_eq!(engine.active().position, engine.board().spawn_position());
+        assert_eq!(engine.held().map(|p| p.letter), Some(third));
+    }
+
+    #[test]
+    fn test_line_clear_score() {
+        let mut engine = Engine::new(4, 8, 0);
+        engine.active = Piece::new(TetriminoLetter::I, 0, engine.board.spawn_position());
+
+        assert_eq!(engine.hard_drop(), 1);
+        assert_eq!(engine.score(), HARD_DROP_SCORE + SCORE_TABLE[1]);
+        assert_eq!(engine.lines(), 1);
+        assert_eq!(engine.pieces(), 1);
+        assert!(engine.board().bits().is_row_empty(0));
+    }
+
+    #[test]
+    fn test_game_over() {
+        let mut engine = Engine::new(10, 20, 0);
+        let mut count = 0;
+        while !engine.is_over() {
+            engine.hard_drop();
+            count += 1;
+        }
+        assert!(count < 200);
+        assert!(!engine.r#move(1, 0));
+        assert_eq!(engine.hold(), Hold::Cant);
+    }
+
+    #[test]
+    fn test_place() {
+        let mut engine = Engine::new(10, 20, 0);
+        let piece = Piece::new(TetriminoLetter::I, 1, Point::new(0, 2));
+
+        assert_eq!(engine.place(piece), 0);
+        assert_eq!(engine.pieces(), 1);
+        assert_eq!(engine.score(), HARD_DROP_SCORE);
+        assert!((0..4).all(|y| engine.board().bits().get(0, y)));
+    }
+
+    #[test]
+    fn test_level() {
+        let mut engine = Engine::new(10, 20, 0);
+        engine.lines = 25;
+
+        assert_eq!(engine.level(), 2);
+        assert!((engine.time_step() - 0.5 * 0.66 * 0.66).abs() < 1e-9);
+    }
+}
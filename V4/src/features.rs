@@ -0,0 +1,115 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Evaluation features of candidate placements, computed in one call for the bots.
+
+use super::board::{Board, Piece};
+
+pub const FEATURE_COUNT: usize = 6;
+/// Column order of the feature matrices.
+pub const FEATURE_NAMES: [&str; FEATURE_COUNT] =
+    ["holes", "aggregate_height", "bumpiness", "lines", "wells", "row_transitions"];
+
+/// Features of the board left by each piece, appended to `out` as rows of `FEATURE_COUNT` values.
+/// The pieces are locked where they are, without dropping them.
+///
+/// Return the index of the first piece that doesn't fit, `out` is then incomplete.
+pub fn placement_features(board: &Board, pieces: &[Piece], out: &mut Vec<f64>) -> Result<(), usize> {
+    out.reserve(pieces.len() * FEATURE_COUNT);
+    let mut scratch = board.clone();
+
+    for (idx, piece) in pieces.iter().enumerate() {
+        if !board.fits(piece) {
+            return Err(idx);
+        }
+        scratch.clone_from(board);
+        let lines = if scratch.lock(piece) { scratch.clear_completed_rows(|_, _| {}) } else { 0 };
+
+        out.extend(board_features(&scratch, lines));
+    }
+    Ok(())
+}
+
+/// The `FEATURE_NAMES` of a board, after `lines` were cleared.
+pub fn board_features(board: &Board, lines: usize) -> [f64; FEATURE_COUNT] {
+    [
+        board.holes() as f64,
+        board.aggregate_height() as f64,
+        board.bumpiness() as f64,
+        lines as f64,
+        wells(board) as f64,
+        row_transitions(board) as f64,
+    ]
+}
+
+/// Sum of the depths of the columns lower than both their neighbours, the walls being infinitely high.
+/// A grid has at least `MIN_SIZE` columns, so every column has a real neighbour.
+fn wells(board: &Board) -> u32 {
+    let heights = board.heights();
+    (0..heights.len())
+        .map(|x| {
+            let left = if x > 0 { heights[x - 1] } else { u32::MAX };
+            let right = heights.get(x + 1).copied().unwrap_or(u32::MAX);
+            left.min(right).saturating_sub(heights[x])
+        })
+        .sum()
+}
+
+/// Filled and empty changes along the rows of the stack.
+fn row_transitions(board: &Board) -> u32 {
+    (0..board.stack_height()).map(|y| board.bits().row_transitions(y)).sum()
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::point::Point;
+    use crate::tetrimino::TetriminoLetter;
+
+    #[test]
+    fn test_placement_features() {
+        // An I standing in the right column
+        let mut board = Board::new(4, 8);
+        board.lock(&Piece::new(TetriminoLetter::I, 1, Point::new(3, 1)));
+
+        let pieces = [
+            // Completes the bottom row
+            Piece::new(TetriminoLetter::L, 2, Point::new(1, 0)),
+            // On top of a pillar, at the left of a well
+            Piece::new(TetriminoLetter::O, 0, Point::new(0, 5)),
+        ];
+        let mut out = Vec::new();
+        placement_features(&board, &pieces, &mut out).unwrap();
+        assert_eq!(out.len(), 2 * FEATURE_COUNT);
+
+        // Heights [0, 0, 1, 3]
+        assert_eq!(&out[..FEATURE_COUNT], &[0.0, 4.0, 3.0, 1.0, 0.0, 6.0]);
+        // Heights [6, 6, 0, 4]
+        assert_eq!(&out[FEATURE_COUNT..], &[8.0, 16.0, 10.0, 0.0, 4.0, 12.0]);
+    }
+
+    #[test]
+    fn test_piece_outside() {
+        let board = Board::new(4, 8);
+        let pieces = [
+            Piece::new(TetriminoLetter::O, 0, Point::new(0, 1)),
+            Piece::new(TetriminoLetter::O, 0, Point::new(3, 1)),
+        ];
+        assert_eq!(placement_features(&board, &pieces, &mut Vec::new()), Err(1));
+    }
+}
@@ -0,0 +1,101 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Gravity clock of the Maya game, on a native thread.
+
+use std::sync::Arc;
+use std::thread::{self, JoinHandle};
+use std::time::Duration;
+
+use super::clock::Clock;
+use pyo3::exceptions::PyValueError;
+use pyo3::{pyclass, pymethods, Py, PyAny, PyResult, Python};
+use stubgen_macro::stubgen;
+
+/// Gravity steps of the falling tetrimino, timed by a native thread.
+///
+/// The thread waits without the GIL and only takes it to call `on_step` when a step is due. With the `emit` of a
+/// Qt signal connected to the main thread, each step posts a queued event, so the Maya UI only pays for the steps.
+#[stubgen]
+#[pyclass]
+pub struct GravityClock {
+    clock: Arc<Clock>,
+    thread: Option<JoinHandle<()>>,
+}
+
+impl Drop for GravityClock {
+    fn drop(&mut self) {
+        self.clock.cancel();
+    }
+}
+
+/// Call the callback with the GIL, unless the clock was canceled.
+fn call(clock: &Clock, callback: &Py<PyAny>) {
+    Python::with_gil(|py| {
+        // Checked with the GIL held, as `cancel` is called with it: no callback slips in after it returns.
+        if clock.is_canceled() {
+            return;
+        }
+        if let Err(err) = callback.call0(py) {
+            err.write_unraisable(py, Some(callback.bind(py)));
+        }
+    });
+}
+
+#[stubgen]
+#[pymethods]
+impl GravityClock {
+    #[new]
+    fn new() -> Self {
+        GravityClock {
+            clock: Arc::new(Clock::new()),
+            thread: None,
+        }
+    }
+
+    #[getter]
+    fn is_running(&self) -> bool {
+        self.thread.as_ref().is_some_and(|thread| !thread.is_finished())
+    }
+
+    /// Call `on_step` `steps` times, every `time_step` seconds, then `on_finished`, from the clock thread.
+    /// A running clock is canceled first.
+    fn start(&mut self, time_step: f64, steps: usize, on_step: Py<PyAny>, on_finished: Py<PyAny>) -> PyResult<()> {
+        let period = Duration::try_from_secs_f64(time_step)
+            .ok()
+            .filter(|period| !period.is_zero())
+            .ok_or_else(|| PyValueError::new_err(format!("Time step must be positive, got {time_step}")))?;
+        self.cancel();
+
+        let clock = Arc::new(Clock::new());
+        self.clock = Arc::clone(&clock);
+        self.thread = Some(thread::spawn(move || {
+            if clock.run(period, steps, || call(&clock, &on_step)) {
+                call(&clock, &on_finished);
+            }
+        }));
+        Ok(())
+    }
+
+    /// Stop the clock, no callback is called once it returns. The clock thread isn't waited for, it ends on its
+    /// own within a millisecond.
+    fn cancel(&mut self) {
+        self.clock.cancel();
+        self.thread = None;
+    }
+}
@@ -16,120 +16,347 @@
 // You should have received a copy of the GNU General Public License
 // along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-use super::cube::Cube;
+use std::iter;
+
+use super::board::{Board, Piece, RowChange};
+use super::cube_table::{CubeId, CubeTable};
+use super::engine::{self, Input};
 use super::point::{Point, Turn};
+use super::search::PlacementSearch;
 use super::tetrimino::{Tetrimino, TetriminoLetter};
-use super::{math, maya};
-use pyo3::{pyclass, pymethods, Py};
+use super::view::{self, BoardView};
+use super::{maya, rotation};
+use pyo3::exceptions::PyValueError;
+use pyo3::types::PyDict;
+use pyo3::{pyclass, pymethods, Bound, Py, PyResult, Python};
 use stubgen_macro::stubgen;
 
+pub const DEFAULT_COLUMN_COUNT: usize = 10;
+pub const DEFAULT_ROW_COUNT: usize = 20;
+/// Room needed to spawn and rotate any tetrimino.
+pub const MIN_SIZE: usize = 4;
+
+pub fn check_size(column_count: usize, row_count: usize) -> PyResult<()> {
+    if column_count < MIN_SIZE || row_count < MIN_SIZE {
+        return Err(PyValueError::new_err(format!(
+            "Grid must be at least {MIN_SIZE}x{MIN_SIZE}, got {column_count}x{row_count}"
+        )));
+    }
+    Ok(())
+}
+
+/// What is left to the Python side after a `Grid.tick`.
+#[stubgen]
+#[pyclass(frozen, get_all)]
+#[derive(Debug, Default)]
+pub struct Tick {
+    /// Inputs played, the next ones were dropped.
+    pub inputs: usize,
+    /// Gravity steps played.
+    pub gravity_steps: usize,
+    /// Points of the soft drops, the hard drop and the completed rows.
+    pub score: u64,
+    pub completed_rows: usize,
+    /// The active tetrimino was locked, the next one must be spawned.
+    pub landed: bool,
+    /// The last input played is a hold, still to be done.
+    pub hold: bool,
+}
+
 #[stubgen]
 #[pyclass(subclass)]
 pub struct Grid {
-    cells: Vec<Vec<Option<Cube>>>,
+    column_count: usize,
+    row_count: usize,
+    /// Row-major handles of the locked cubes, the names only come out when talking to Maya.
+    cells: Vec<Option<CubeId>>,
+    cubes: CubeTable,
+    board: Board,
+    search: PlacementSearch,
     active_tetrimino: Option<Py<Tetrimino>>,
+    ghost_tetrimino: Option<Py<Tetrimino>>,
+    commands: maya::CommandBuffer,
+    bridge: &'static maya::MayaBridge,
 }
 
 #[stubgen]
 #[pymethods]
 impl Grid {
     #[classattr]
-    const ROW_COUNT: usize = 20;
+    const DEFAULT_COLUMN_COUNT: usize = DEFAULT_COLUMN_COUNT;
     #[classattr]
-    const COLUMN_COUNT: usize = 10;
-
+    const DEFAULT_ROW_COUNT: usize = DEFAULT_ROW_COUNT;
     #[classattr]
-    const TOP: i32 = Self::ROW_COUNT as i32 - 1;
+    const MIN_SIZE: usize = MIN_SIZE;
+
     #[classattr]
     const BOTTOM: i32 = 0;
     #[classattr]
     const LEFT: i32 = 0;
-    #[classattr]
-    const RIGHT: i32 = Self::COLUMN_COUNT as i32 - 1;
-    #[classattr]
-    const NEXT_POS: (f32, f32, f32) = (12.5, 15.0, -1.0);
-    #[classattr]
-    const HOLD_POS: (f32, f32, f32) = (-3.5, 15.0, -1.0);
 
     #[classattr]
-    const JIGGLE_MOVES: [i32; 4] = [-1, 1, -2, 2];
+    const JIGGLE_MOVES: [i32; 4] = rotation::JIGGLE_MOVES;
 
     #[new]
-    fn new() -> Self {
-        let columns = vec![None; Self::COLUMN_COUNT];
-
-        Grid {
-            cells: vec![columns; Self::ROW_COUNT],
+    #[pyo3(signature = (column_count = DEFAULT_COLUMN_COUNT, row_count = DEFAULT_ROW_COUNT))]
+    fn new(py: Python<'_>, column_count: usize, row_count: usize) -> PyResult<Self> {
+        check_size(column_count, row_count)?;
+
+        Ok(Grid {
+            column_count,
+            row_count,
+            cells: vec![None; column_count * row_count],
+            cubes: CubeTable::new(),
+            board: Board::new(column_count, row_count),
+            search: PlacementSearch::new(),
             active_tetrimino: None,
-        }
+            ghost_tetrimino: None,
+            commands: maya::CommandBuffer::default(),
+            bridge: maya::bridge(py)?,
+        })
+    }
+
+    #[getter]
+    pub fn column_count(&self) -> usize {
+        self.column_count
+    }
+
+    #[getter]
+    pub fn row_count(&self) -> usize {
+        self.row_count
+    }
+
+    #[getter]
+    pub fn top(&self) -> i32 {
+        self.row_count as i32 - 1
+    }
+
+    #[getter]
+    pub fn right(&self) -> i32 {
+        self.column_count as i32 - 1
+    }
+
+    /// Center of the next tetrimino preview, on the right of the grid.
+    #[getter]
+    pub fn next_pos(&self) -> (f32, f32, f32) {
+        (self.column_count as f32 + 2.5, self.row_count as f32 - 5.0, -1.0)
+    }
+
+    /// Center of the hold tetrimino preview, on the left of the grid.
+    #[getter]
+    pub fn hold_pos(&self) -> (f32, f32, f32) {
+        (-3.5, self.row_count as f32 - 5.0, -1.0)
+    }
+
+    /// Locked cells for `numpy.asarray(grid)`, see `GameState.__array_interface__`.
+    #[getter(__array_interface__)]
+    fn array_interface<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        view::array_interface(py, &self.board)
+    }
+
+    /// Filled cells of each row, bottom row first.
+    #[getter]
+    pub fn row_fill(&self) -> Vec<u32> {
+        self.board.row_fill().to_vec()
+    }
+
+    /// Row above the highest filled cell of each column.
+    #[getter]
+    pub fn column_heights(&self) -> Vec<u32> {
+        self.board.heights().to_vec()
+    }
+
+    /// Sum of the column heights.
+    #[getter]
+    pub fn aggregate_height(&self) -> usize {
+        self.board.aggregate_height()
+    }
+
+    /// Empty cells under the top of their column.
+    #[getter]
+    pub fn holes(&self) -> usize {
+        self.board.holes()
+    }
+
+    /// Sum of the height differences between neighbour columns.
+    #[getter]
+    pub fn bumpiness(&self) -> usize {
+        self.board.bumpiness()
+    }
+
+    /// Zobrist hash of the locked cells, whatever their type. Key of a `TranspositionTable`.
+    #[getter]
+    pub fn hash(&self) -> u64 {
+        self.board.hash()
     }
 
     /// Move the active tetrimino
     #[pyo3(name = "move")]
-    pub fn py_move(&self, x: i32, y: i32) -> bool {
-        match &self.active_tetrimino {
-            Some(t) => self.r#move(t.get(), &Point::new(x, y)),
-            None => false,
+    pub fn py_move(&mut self, py: Python<'_>, x: i32, y: i32) -> PyResult<bool> {
+        let Some(active) = self.active(py) else {
+            return Ok(false);
+        };
+        let moved = self.r#move(&mut active.bind(py).borrow_mut(), &Point::new(x, y));
+        if moved && x != 0 {
+            self.update_ghost(py);
+        }
+        self.commands.flush(py, self.bridge)?;
+        Ok(moved)
+    }
+
+    /// Drop the active tetrimino to the lowest free position in one move. Return the number of rows it fell.
+    #[pyo3(name = "hard_drop")]
+    pub fn py_hard_drop(&mut self, py: Python<'_>) -> PyResult<i32> {
+        let Some(active) = self.active(py) else {
+            return Ok(0);
+        };
+        let mut tetrimino = active.bind(py).borrow_mut();
+
+        let distance = self.drop_distance(&tetrimino);
+        if distance > 0 {
+            self.r#move(&mut tetrimino, &Point::new(0, -distance));
         }
+        self.commands.flush(py, self.bridge)?;
+        Ok(distance)
     }
 
     /// Rotate the active tetrimino
     #[pyo3(name = "rotate")]
-    pub fn py_rotate(&self, angle: Turn) -> bool {
-        match &self.active_tetrimino {
-            Some(t) => self.rotate(t.get(), angle),
-            None => false,
+    pub fn py_rotate(&mut self, py: Python<'_>, angle: Turn) -> PyResult<bool> {
+        let Some(active) = self.active(py) else {
+            return Ok(false);
+        };
+        let rotated = self.rotate(&mut active.bind(py).borrow_mut(), angle);
+        if rotated {
+            self.update_ghost(py);
         }
+        self.commands.flush(py, self.bridge)?;
+        Ok(rotated)
+    }
+
+    /// Every resting position reachable with the game moves and kicks, as `(x, rotation, y)` root positions.
+    /// By default from the active tetrimino, otherwise from the spawn of `letter`.
+    #[pyo3(signature = (letter = None))]
+    pub fn placements(&mut self, py: Python<'_>, letter: Option<TetriminoLetter>) -> Vec<(i32, usize, i32)> {
+        let start = match (letter, &self.active_tetrimino) {
+            (Some(letter), _) => Piece::new(letter, 0, self.board.spawn_position()),
+            (None, Some(active)) => active.bind(py).borrow().piece(),
+            (None, None) => return Vec::new(),
+        };
+        self.search.search(&self.board, &start).iter().map(Piece::as_placement).collect()
+    }
+
+    /// Frozen copy of the locked cells.
+    pub fn view(&self) -> BoardView {
+        BoardView::new(&self.board)
+    }
+
+    /// Move the active tetrimino straight to one of its `placements`, with a single batch of Maya edits.
+    /// Return `False` and leave it untouched if the placement can't be reached.
+    #[pyo3(name = "place")]
+    pub fn py_place(&mut self, py: Python<'_>, x: i32, rotation: usize, y: i32) -> PyResult<bool> {
+        let Some(active) = self.active(py) else {
+            return Ok(false);
+        };
+        let mut tetrimino = active.bind(py).borrow_mut();
+
+        let current = tetrimino.piece();
+        let target = Piece::new(current.letter, rotation % rotation::ROTATION_COUNT, Point::new(x, y));
+        if !self.search.reaches(&self.board, &current, &target) {
+            return Ok(false);
+        }
+        tetrimino.set_piece(&target);
+
+        if target.rotation != current.rotation {
+            self.turn_cubes(&tetrimino);
+        }
+        let offset = Point::new(target.position.x - current.position.x, target.position.y - current.position.y);
+        self.commands.r#move(&tetrimino.root, offset.x, offset.y, 0, maya::Move::Relative);
+        drop(tetrimino);
+
+        self.update_ghost(py);
+        self.commands.flush(py, self.bridge)?;
+        Ok(true)
     }
 
     /// Check if the active tetrimino collides with another one
     #[pyo3(name = "inplace_collision")]
-    pub fn py_inplace_collision(&self) -> bool {
+    pub fn py_inplace_collision(&self, py: Python<'_>) -> bool {
         match &self.active_tetrimino {
-            Some(t) => self.inplace_collision(t.get()),
+            Some(t) => self.inplace_collision(&t.bind(py).borrow()),
             None => false,
         }
     }
 
     /// Store the active tetrimino cubes in the cell matrix. Should only be called in the post-loop.  
     #[pyo3(name = "update_cells")]
-    pub fn py_update_cells(&mut self) {
-        maya::refresh();
-
-        if let Some(active) = &self.active_tetrimino {
-            let t = active.get();
-            for (cube, point) in t.cubes.iter().zip(t.get_cube_positions().iter()) {
-                self.cells[point.y as usize][point.x as usize] = Some(cube.clone());
-            }
-        };
+    pub fn py_update_cells(&mut self, py: Python<'_>) {
+        self.update_cells(py);
     }
 
     /// Check the grid for completed rows. Delete them and move down the others if possible.
     #[pyo3(name = "process_completed_rows")]
-    pub fn py_process_completed_rows(&mut self) -> i32 {
-        let mut row_idx = 0;
-        let mut completed_rows = 0;
-
-        while row_idx < Self::ROW_COUNT {
-            let is_row_complete = self.cells[row_idx].iter().all(|c| c.is_some());
-
-            if is_row_complete {
-                completed_rows += 1;
-                let cube_names_to_delete = &self.cells[row_idx]
-                    .iter()
-                    .flatten()
-                    .map(|c| c.name.as_str())
-                    .collect();
-                maya::delete(cube_names_to_delete);
-
-                if !self.move_down_rows(row_idx) {
-                    row_idx += 1;
+    pub fn py_process_completed_rows(&mut self, py: Python<'_>) -> PyResult<i32> {
+        let completed_rows = self.process_completed_rows() as i32;
+        self.commands.flush(py, self.bridge)?;
+        Ok(completed_rows)
+    }
+
+    /// Play a frame: the `inputs` then `gravity_steps` gravity steps, with a single batch of Maya edits.
+    ///
+    /// Once the tetrimino lands it's locked and the completed rows are cleared, along with the emptied tetrimino
+    /// groups. The remaining inputs are dropped, as well as the ones after a hold, which is left to the caller.
+    #[pyo3(signature = (inputs, gravity_steps = 0))]
+    pub fn tick(&mut self, py: Python<'_>, inputs: Vec<Input>, gravity_steps: usize) -> PyResult<Tick> {
+        let mut tick = Tick::default();
+        let Some(active) = self.active(py) else {
+            return Ok(tick);
+        };
+
+        let mut moved_sideways = false;
+        {
+            let mut tetrimino = active.bind(py).borrow_mut();
+            for input in inputs.into_iter().chain(iter::repeat_n(Input::Gravity, gravity_steps)) {
+                match input {
+                    Input::Gravity => tick.gravity_steps += 1,
+                    _ => tick.inputs += 1,
+                }
+                match input {
+                    Input::Left => moved_sideways |= self.r#move(&mut tetrimino, &Point::new(-1, 0)),
+                    Input::Right => moved_sideways |= self.r#move(&mut tetrimino, &Point::new(1, 0)),
+                    Input::SoftDrop => {
+                        tick.score += engine::SOFT_DROP_SCORE;
+                        self.r#move(&mut tetrimino, &Point::new(0, -1));
+                    }
+                    Input::HardDrop => {
+                        let distance = self.drop_distance(&tetrimino);
+                        if distance > 0 {
+                            self.r#move(&mut tetrimino, &Point::new(0, -distance));
+                        }
+                        tick.score += engine::HARD_DROP_SCORE;
+                        tick.landed = true;
+                    }
+                    Input::RotateLeft => moved_sideways |= self.rotate(&mut tetrimino, Turn::Left),
+                    Input::RotateRight => moved_sideways |= self.rotate(&mut tetrimino, Turn::Right),
+                    Input::Hold => tick.hold = true,
+                    Input::Gravity => tick.landed = !self.r#move(&mut tetrimino, &Point::new(0, -1)),
+                }
+                if tick.landed || tick.hold {
+                    break;
                 }
-            } else {
-                row_idx += 1;
             }
         }
-        completed_rows
+
+        if moved_sideways {
+            self.update_ghost(py);
+        }
+        if tick.landed {
+            self.update_cells(py);
+            tick.completed_rows = self.process_completed_rows();
+            tick.score += engine::SCORE_TABLE.get(tick.completed_rows).copied().unwrap_or_default();
+        }
+        self.commands.flush(py, self.bridge)?;
+        Ok(tick)
     }
 
     #[setter]
@@ -141,149 +368,152 @@ impl Grid {
     pub fn get_active_tetrimino(&self) -> &Option<Py<Tetrimino>> {
         &self.active_tetrimino
     }
-}
 
-impl Grid {
-    fn is_inside_grid(point: &Point) -> bool {
-        (Self::LEFT <= point.x)
-            && (point.x <= Self::RIGHT)
-            && (Self::BOTTOM <= point.y)
-            && (point.y <= Self::TOP)
-    }
-
-    fn cell_is_available(&self, point: &Point, whitelist: Option<&[&Cube]>) -> bool {
-        let value = &self.cells[point.y as usize][point.x as usize];
-        match value {
-            Some(cube) => match whitelist {
-                Some(whitelist) => whitelist.contains(&cube),
-                None => false,
-            },
-            None => true,
-        }
+    /// Move the ghost tetrimino where the active one would land.
+    #[pyo3(name = "update_ghost")]
+    pub fn py_update_ghost(&mut self, py: Python<'_>) -> PyResult<()> {
+        self.update_ghost(py);
+        self.commands.flush(py, self.bridge)
     }
 
-    fn cells_are_available(
-        &self,
-        points: &[Point; 4],
-        whitelist: Option<&[&Cube]>,
-        offset: &Point,
-    ) -> bool {
-        for point in points {
-            let offset_point = Point::new(point.x + offset.x, point.y + offset.y);
-
-            let is_available_and_inside = Self::is_inside_grid(&offset_point)
-                && self.cell_is_available(&offset_point, whitelist);
-            if !is_available_and_inside {
-                return false;
-            }
+    /// Make `tetrimino` the active one, full size at the top of the grid, with a single batch of Maya edits.
+    /// Its rotation is kept, the way a held tetrimino comes back.
+    pub fn spawn(&mut self, py: Python<'_>, tetrimino: Py<Tetrimino>) -> PyResult<()> {
+        {
+            let mut spawned = tetrimino.bind(py).borrow_mut();
+            let start = self.board.spawn_position();
+            spawned.position = start;
+            self.commands.r#move(&spawned.root, start.x, start.y, 0, maya::Move::Absolute);
+            self.commands.scale(&spawned.root, 1.0);
         }
-        true
+        self.active_tetrimino = Some(tetrimino);
+
+        self.update_ghost(py);
+        self.commands.flush(py, self.bridge)
     }
 
-    fn can_move_to(&self, tetrimino: &Tetrimino, point: &Point) -> bool {
-        let cubes: &[&Cube; 4] = &std::array::from_fn(|i| &tetrimino.cubes[i]);
+    #[setter]
+    pub fn set_ghost_tetrimino(&mut self, ghost_tetrimino: Py<Tetrimino>) {
+        self.ghost_tetrimino = Some(ghost_tetrimino);
+    }
 
-        self.cells_are_available(&tetrimino.get_cube_positions(), Some(cubes), point)
+    #[getter]
+    pub fn get_ghost_tetrimino(&self) -> &Option<Py<Tetrimino>> {
+        &self.ghost_tetrimino
     }
+}
 
-    fn inplace_collision(&self, tetrimino: &Tetrimino) -> bool {
-        !self.can_move_to(tetrimino, &Point::default())
+impl Grid {
+    fn active(&self, py: Python<'_>) -> Option<Py<Tetrimino>> {
+        self.active_tetrimino.as_ref().map(|t| t.clone_ref(py))
     }
 
-    fn r#move(&self, tetrimino: &Tetrimino, point: &Point) -> bool {
-        if self.can_move_to(tetrimino, point) {
-            maya::r#move(&tetrimino.root, point.x, point.y, 0, maya::Move::Relative);
-            maya::refresh();
-            return true;
-        }
-        false
+    fn drop_distance(&self, tetrimino: &Tetrimino) -> i32 {
+        self.board.drop_distance(&tetrimino.piece())
     }
-    fn rotate(&self, tetrimino: &Tetrimino, angle: Turn) -> bool {
-        if tetrimino.r#type == TetriminoLetter::O {
-            return false;
-        }
 
-        let root_position = tetrimino.get_root_position();
+    /// Only the edits that changed since the last update are sent: the ghost doesn't move on gravity steps.
+    fn update_ghost(&mut self, py: Python<'_>) {
+        let (Some(active), Some(ghost)) = (self.active(py), self.ghost_tetrimino.as_ref()) else {
+            return;
+        };
+        let active = active.bind(py).borrow();
+        let mut ghost = ghost.bind(py).borrow_mut();
 
-        let mut rot_cube_positions = tetrimino.get_cube_positions();
-        rot_cube_positions
-            .iter_mut()
-            .for_each(|p| p.rotate(angle, Some(&root_position)));
+        if ghost.r#type != active.r#type || ghost.rotation != active.rotation {
+            ghost.r#type = active.r#type;
+            ghost.rotation = active.rotation;
 
-        let mut global_offset = Point::default();
-        for point in rot_cube_positions.iter() {
-            if !Self::is_inside_grid(point) {
-                let cube_offset_x = point.x.clamp(Self::LEFT, Self::RIGHT) - point.x;
-                let cube_offset_y = point.y.clamp(Self::BOTTOM, Self::TOP) - point.y;
-                global_offset.x = math::absmax(cube_offset_x, global_offset.x);
-                global_offset.y = math::absmax(cube_offset_y, global_offset.y);
+            let shape = rotation::shape(ghost.r#type, ghost.rotation);
+            for (cube, point) in ghost.cubes.iter().zip(shape.iter()) {
+                self.commands.r#move(cube.name.as_str(), point.x, point.y, 0, maya::Move::Local);
             }
         }
 
-        let cubes: &[&Cube; 4] = &std::array::from_fn(|i| &tetrimino.cubes[i]);
+        let landing = Point::new(active.position.x, active.position.y - self.drop_distance(&active));
+        if ghost.position != landing {
+            ghost.position = landing;
+            self.commands.r#move(&ghost.root, landing.x, landing.y, 0, maya::Move::Absolute);
+        }
+    }
 
-        if !self.cells_are_available(&rot_cube_positions, Some(cubes), &global_offset) {
-            let mut broken = false;
+    fn update_cells(&mut self, py: Python<'_>) {
+        if let Some(active) = &self.active_tetrimino {
+            let t = active.bind(py).borrow();
+            let group = self.cubes.insert_group(&t.root);
+            for (cube, point) in t.cubes.iter().zip(t.get_cube_positions().iter()) {
+                let cell = point.y as usize * self.column_count + point.x as usize;
+                self.cells[cell] = Some(self.cubes.insert(&cube.name, group));
+            }
+            self.board.lock(&t.piece());
+        };
+    }
 
-            for ox in Self::JIGGLE_MOVES {
-                let move_offset = Point::new(global_offset.x + ox, global_offset.y);
+    /// Clear the completed rows and queue their Maya edits. Return the number of completed rows.
+    fn process_completed_rows(&mut self) -> usize {
+        // The board drives the compaction, the cubes follow it.
+        let width = self.column_count;
+        let (cells, cubes, commands) = (&mut self.cells, &mut self.cubes, &mut self.commands);
+
+        self.board.clear_completed_rows(|row_idx, change| {
+            let row = row_idx * width..(row_idx + 1) * width;
+            let row_object_names: Vec<&str> = cells[row.clone()].iter().flatten().map(|id| cubes.name(*id)).collect();
+
+            match change {
+                RowChange::Cleared => {
+                    commands.delete(&row_object_names);
+                    for id in cells[row].iter_mut().filter_map(Option::take) {
+                        if let Some(group) = cubes.release(id) {
+                            commands.delete_group(group);
+                        }
+                    }
+                }
+                RowChange::Dropped(distance) => {
+                    commands.moves(&row_object_names, 0, -(distance as i32), 0, maya::Move::Relative);
 
-                if self.cells_are_available(&rot_cube_positions, Some(cubes), &move_offset) {
-                    global_offset.x += ox;
-                    broken = true;
-                    break;
+                    // The destination row is always empty
+                    cells.copy_within(row.clone(), (row_idx - distance) * width);
+                    cells[row].fill(None);
                 }
             }
-            if broken {
-                return false;
-            }
-        }
+        })
+    }
 
-        for (cube, point) in cubes.iter().zip(rot_cube_positions.iter()) {
-            maya::r#move(
-                cube.name.as_str(),
-                point.x,
-                point.y,
-                0,
-                maya::Move::Absolute,
-            );
-        }
-        maya::r#move(
-            &tetrimino.root,
-            global_offset.x,
-            global_offset.y,
-            0,
-            maya::Move::Relative,
-        );
-        maya::refresh();
-        true
+    fn inplace_collision(&self, tetrimino: &Tetrimino) -> bool {
+        !self.board.fits(&tetrimino.piece())
     }
 
-    fn move_down_rows(&mut self, from_row: usize) -> bool {
-        let mut moved_down = false;
-        let mut row_idx = from_row + 1;
+    fn r#move(&mut self, tetrimino: &mut Tetrimino, point: &Point) -> bool {
+        let Some(moved) = self.board.moved(&tetrimino.piece(), point.x, point.y) else {
+            return false;
+        };
+        tetrimino.set_piece(&moved);
 
-        while row_idx < Self::ROW_COUNT {
-            let current_row = &self.cells[row_idx];
-            let row_is_not_empty = current_row.iter().any(|c| c.is_some());
+        self.commands.r#move(&tetrimino.root, point.x, point.y, 0, maya::Move::Relative);
+        true
+    }
 
-            if row_is_not_empty {
-                let row_object_names: Vec<&str> = current_row
-                    .iter()
-                    .flatten()
-                    .map(|c| c.name.as_str())
-                    .collect();
+    fn rotate(&mut self, tetrimino: &mut Tetrimino, angle: Turn) -> bool {
+        let Some(rotated) = self.board.rotated(&tetrimino.piece(), angle) else {
+            return false;
+        };
+        let offset = Point::new(
+            rotated.position.x - tetrimino.position.x,
+            rotated.position.y - tetrimino.position.y,
+        );
+        tetrimino.set_piece(&rotated);
 
-                maya::r#moves(&row_object_names, 0, -1, 0, maya::Move::Relative);
-                self.cells[row_idx - 1] = current_row.clone();
-                moved_down = true;
-            } else {
-                self.cells[row_idx - 1] = vec![None; Self::COLUMN_COUNT];
-            }
-            row_idx += 1;
-        }
+        self.turn_cubes(tetrimino);
+        self.commands.r#move(&tetrimino.root, offset.x, offset.y, 0, maya::Move::Relative);
+        true
+    }
 
-        maya::refresh();
-        moved_down
+    /// Move the cubes around the root to the rotation of the tetrimino.
+    /// Local moves don't depend on the root, so the edits can be sent in any order.
+    fn turn_cubes(&mut self, tetrimino: &Tetrimino) {
+        let shape = rotation::shape(tetrimino.r#type, tetrimino.rotation);
+        for (cube, point) in tetrimino.cubes.iter().zip(shape.iter()) {
+            self.commands.r#move(cube.name.as_str(), point.x, point.y, 0, maya::Move::Local);
+        }
     }
 }
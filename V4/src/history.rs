@@ -0,0 +1,160 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Snapshots of the game at each spawn, for practice undo and searches.
+
+use std::collections::VecDeque;
+use std::sync::Arc;
+
+use super::engine::Engine;
+
+/// Immutable game state: snapshots are never modified, only copied back, so keeping one around is a refcount.
+pub type Snapshot = Arc<Engine>;
+
+/// Full copy of the engine, board included: about 0.3 µs on a 10x20 grid, 9 µs on 200x400 and 0.6 ms on
+/// 1000x1000, mostly allocation. The rows aren't shared copy-on-write since NumPy views need contiguous cells.
+/// The history ring reuses its oldest snapshot, so it only pays the copy.
+pub fn snapshot(engine: &Engine) -> Snapshot {
+    Arc::new(engine.clone())
+}
+
+/// Bounded ring of the last spawn states, to undo the last `capacity` placements.
+#[derive(Debug, Clone, Default)]
+pub struct History {
+    states: VecDeque<Snapshot>,
+    capacity: usize,
+}
+
+impl History {
+    pub fn new(capacity: usize) -> Self {
+        History {
+            states: VecDeque::with_capacity(capacity + 1),
+            capacity,
+        }
+    }
+
+    pub fn capacity(&self) -> usize {
+        self.capacity
+    }
+
+    /// Number of placements that can be undone.
+    pub fn len(&self) -> usize {
+        self.states.len().saturating_sub(1)
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.len() == 0
+    }
+
+    pub fn clear(&mut self) {
+        self.states.clear();
+    }
+
+    /// Store the state of a new tetrimino. The current tetrimino state is kept along the undoable ones.
+    pub fn push(&mut self, engine: &Engine) {
+        if self.capacity == 0 {
+            return;
+        }
+        if self.states.len() <= self.capacity {
+            self.states.push_back(snapshot(engine));
+            return;
+        }
+
+        // Once full, the oldest state is overwritten in place, unless a snapshot of it is still used elsewhere.
+        let mut oldest = self.states.pop_front().unwrap_or_else(|| snapshot(engine));
+        match Arc::get_mut(&mut oldest) {
+            Some(state) => state.clone_from(engine),
+            None => oldest = snapshot(engine),
+        }
+        self.states.push_back(oldest);
+    }
+
+    /// Go back to the spawn of the previous tetrimino.
+    pub fn undo(&mut self, engine: &mut Engine) -> bool {
+        if self.states.len() < 2 {
+            return false;
+        }
+        self.states.pop_back();
+        if let Some(previous) = self.states.back() {
+            engine.clone_from(previous);
+        }
+        true
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_restore_in_place() {
+        let mut engine = Engine::new(10, 20, 0);
+        let start = snapshot(&engine);
+        let cells = engine.board().cells().as_ptr();
+
+        engine.hard_drop();
+        engine.hard_drop();
+        assert_ne!(engine.board(), start.board());
+
+        engine.clone_from(&start);
+        assert_eq!(engine.board(), start.board());
+        assert_eq!(engine.active(), start.active());
+        assert_eq!(engine.board().cells().as_ptr(), cells);
+
+        // The sequence continues as from the start
+        let mut reference = Engine::new(10, 20, 0);
+        assert_eq!(engine.hard_drop(), reference.hard_drop());
+        assert_eq!(engine.next(), reference.next());
+    }
+
+    #[test]
+    fn test_undo_ring() {
+        let mut engine = Engine::new(10, 20, 0);
+        let mut history = History::new(3);
+        history.push(&engine);
+
+        let mut scores = vec![engine.score()];
+        for _ in 0..5 {
+            engine.hard_drop();
+            history.push(&engine);
+            scores.push(engine.score());
+        }
+        assert_eq!(history.len(), 3);
+
+        for expected in scores.iter().rev().skip(1).take(3) {
+            assert!(history.undo(&mut engine));
+            assert_eq!(engine.score(), *expected);
+        }
+        assert!(!history.undo(&mut engine));
+        assert_eq!(engine.pieces(), 2);
+    }
+
+    #[test]
+    fn test_shared_snapshot_is_not_overwritten() {
+        let mut engine = Engine::new(10, 20, 0);
+        let mut history = History::new(1);
+        history.push(&engine);
+        let kept = history.states[0].clone();
+
+        for _ in 0..3 {
+            engine.hard_drop();
+            history.push(&engine);
+        }
+        assert_eq!(kept.pieces(), 0);
+    }
+}
@@ -21,12 +21,35 @@ use pyo3::prelude::*;
 #[cfg(feature = "stubgen")]
 use pyo3_stub_gen::define_stub_info_gatherer;
 
+mod batch;
+mod bitboard;
+mod board;
+mod clock;
 mod cube;
+mod cube_table;
+mod engine;
+mod features;
+mod gravity;
 mod grid;
+mod history;
 mod math;
 mod maya;
+mod parallel;
+mod perfect_clear;
 mod point;
+mod randomizer;
+mod recording;
+mod replay;
+mod rng;
+mod rollout;
+mod rotation;
+mod search;
+mod simulate;
+mod state;
 mod tetrimino;
+mod transposition;
+mod view;
+mod zobrist;
 
 #[pymodule]
 #[pyo3(name = "rlib")]
@@ -36,7 +59,26 @@ fn tetris_maya(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_class::<tetrimino::TetriminoLetter>()?;
     m.add_class::<cube::Cube>()?;
     m.add_class::<grid::Grid>()?;
+    m.add_class::<grid::Tick>()?;
+    m.add_class::<gravity::GravityClock>()?;
     m.add_class::<point::Turn>()?;
+    m.add_class::<state::GameState>()?;
+    m.add_class::<state::PySnapshot>()?;
+    m.add_class::<state::PyPerfectClear>()?;
+    m.add_class::<state::PyLookahead>()?;
+    m.add_class::<state::VecEngine>()?;
+    m.add_class::<view::BoardView>()?;
+    m.add_class::<view::FeatureMatrix>()?;
+    m.add_class::<randomizer::Randomizer>()?;
+    m.add_class::<randomizer::Strategy>()?;
+    m.add_class::<engine::Input>()?;
+    m.add_class::<recording::Recorder>()?;
+    m.add_class::<recording::Replay>()?;
+    m.add_class::<simulate::Policy>()?;
+    m.add_class::<simulate::EndReason>()?;
+    m.add_class::<simulate::GameResult>()?;
+    m.add_class::<transposition::PyTranspositionTable>()?;
+    m.add_function(wrap_pyfunction!(state::simulate_batch, m)?)?;
     Ok(())
 }
 
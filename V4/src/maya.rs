@@ -17,81 +17,242 @@
 // along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 use pyo3::prelude::*;
-use pyo3::types::IntoPyDict;
+use pyo3::sync::GILOnceCell;
+use pyo3::types::{IntoPyDict, PyDict};
 use pyo3::Python;
+use std::collections::{HashMap, HashSet};
 
-fn cmds(py: Python<'_>) -> Bound<PyModule> {
-    PyModule::import(py, "maya.cmds").expect("Failed to import maya.cmds")
+#[derive(PartialEq, Copy, Clone, Debug)]
+pub enum Move {
+    /// World space position
+    Absolute,
+    /// World space translation
+    Relative,
+    /// Position in the parent space
+    Local,
 }
 
-pub fn get_position(name: &str) -> [f32; 3] {
-    Python::with_gil(|py| {
-        let args = (&name,);
-        let kwargs = [("query", true), ("worldSpace", true), ("translation", true)]
-            .into_py_dict(py)
-            .unwrap();
-
-        cmds(py)
-            .getattr("xform")
-            .expect("Cant get xform")
-            .call(args, Some(&kwargs))
-            .expect("xform call failed")
-            .extract::<[f32; 3]>()
-            .expect("xform extraction failed")
-    })
+/// Maya commands resolved once, with their flags already built.
+pub struct MayaBridge {
+    xform: Py<PyAny>,
+    r#move: Py<PyAny>,
+    delete: Py<PyAny>,
+    refresh: Py<PyAny>,
+    scale: Py<PyAny>,
+    absolute_kwargs: Py<PyDict>,
+    relative_kwargs: Py<PyDict>,
+    local_kwargs: Py<PyDict>,
+    scale_kwargs: Py<PyDict>,
 }
 
-pub enum Move {
-    Absolute,
-    Relative,
+static BRIDGE: GILOnceCell<MayaBridge> = GILOnceCell::new();
+
+/// The bridge shared by the whole game, resolved on first use.
+pub fn bridge(py: Python<'_>) -> PyResult<&'static MayaBridge> {
+    BRIDGE.get_or_try_init(py, || MayaBridge::new(py))
 }
 
-pub fn r#move<T>(name: &str, x: T, y: T, z: T, mode: Move)
-where
-    T: num_traits::Signed + for<'py> pyo3::IntoPyObject<'py> + Copy,
-{
-    moves(&vec![name], x, y, z, mode)
+impl MayaBridge {
+    fn new(py: Python<'_>) -> PyResult<Self> {
+        let cmds = PyModule::import(py, "maya.cmds")?;
+
+        Ok(MayaBridge {
+            xform: cmds.getattr("xform")?.unbind(),
+            r#move: cmds.getattr("move")?.unbind(),
+            delete: cmds.getattr("delete")?.unbind(),
+            refresh: cmds.getattr("refresh")?.unbind(),
+            scale: cmds.getattr("scale")?.unbind(),
+            absolute_kwargs: [("worldSpace", true), ("absolute", true)]
+                .into_py_dict(py)?
+                .unbind(),
+            relative_kwargs: [("worldSpace", true), ("relative", true)]
+                .into_py_dict(py)?
+                .unbind(),
+            local_kwargs: [("objectSpace", true)].into_py_dict(py)?.unbind(),
+            scale_kwargs: [("absolute", true)].into_py_dict(py)?.unbind(),
+        })
+    }
+
+    pub fn moves<T>(&self, py: Python<'_>, names: &[&str], x: T, y: T, z: T, mode: Move) -> PyResult<()>
+    where
+        T: num_traits::Signed + for<'py> pyo3::IntoPyObject<'py> + Copy,
+    {
+        match mode {
+            Move::Absolute => self
+                .r#move
+                .bind(py)
+                .call((x, y, z, names), Some(self.absolute_kwargs.bind(py)))?,
+            Move::Relative => self
+                .r#move
+                .bind(py)
+                .call((x, y, z, names), Some(self.relative_kwargs.bind(py)))?,
+            Move::Local => {
+                let kwargs = self.local_kwargs.bind(py).copy()?;
+                kwargs.set_item("translation", (x, y, z))?;
+
+                self.xform.bind(py).call((names,), Some(&kwargs))?
+            }
+        };
+        Ok(())
+    }
+
+    pub fn delete(&self, py: Python<'_>, names: &[&str]) -> PyResult<()> {
+        self.delete.bind(py).call1((names,))?;
+        Ok(())
+    }
+
+    pub fn scale(&self, py: Python<'_>, names: &[&str], factor: f32) -> PyResult<()> {
+        self.scale
+            .bind(py)
+            .call((factor, factor, factor, names), Some(self.scale_kwargs.bind(py)))?;
+        Ok(())
+    }
+
+    pub fn refresh(&self, py: Python<'_>) -> PyResult<()> {
+        self.refresh.bind(py).call0()?;
+        Ok(())
+    }
 }
 
-pub fn r#moves<T>(names: &Vec<&str>, x: T, y: T, z: T, mode: Move)
+/// Move a single node right away, outside of any Grid frame, when building the tetriminos.
+pub fn r#move<T>(py: Python<'_>, name: &str, x: T, y: T, z: T, mode: Move) -> PyResult<()>
 where
     T: num_traits::Signed + for<'py> pyo3::IntoPyObject<'py> + Copy,
 {
-    let mode = match mode {
-        Move::Absolute => "absolute",
-        Move::Relative => "relative",
-    };
-
-    Python::with_gil(|py| {
-        let args = (x, y, z, names);
-        let kwargs = [("worldSpace", true), (mode, true)]
-            .into_py_dict(py)
-            .unwrap();
-
-        cmds(py)
-            .getattr("move")
-            .expect("Cant get move")
-            .call(args, Some(&kwargs))
-            .unwrap();
-    })
+    bridge(py)?.moves(py, &[name], x, y, z, mode)
 }
 
-pub fn refresh() {
-    Python::with_gil(|py| {
-        cmds(py)
-            .getattr("refresh")
-            .expect("Cant get refresh")
-            .call0()
-            .unwrap();
-    })
+struct Edit {
+    name: String,
+    mode: Move,
+    translation: [i32; 3],
 }
 
-pub fn delete(items: &Vec<&str>) {
-    Python::with_gil(|py| {
-        cmds(py)
-            .getattr("delete")
-            .expect("Cant get delete")
-            .call1((items,))
-            .unwrap();
-    })
+/// Collect the scene edits of an engine operation and send them to Maya in as few commands as possible.
+///
+/// The edits are merged per node, then the nodes sharing the same final edit are moved by a single command.
+/// Parents are never rotated nor scaled on the grid, so local and world translations can be summed.
+#[derive(Default)]
+pub struct CommandBuffer {
+    edits: Vec<Edit>,
+    index: HashMap<String, usize>,
+    deletes: HashSet<String>,
+    /// Deleted after the nodes, once their children are gone.
+    group_deletes: HashSet<String>,
+    /// Absolute uniform scales, the last one of each node wins.
+    scales: Vec<(String, f32)>,
+    refresh: bool,
+}
+
+impl CommandBuffer {
+    pub fn r#move(&mut self, name: &str, x: i32, y: i32, z: i32, mode: Move) {
+        let translation = [x, y, z];
+
+        match self.index.get(name) {
+            Some(&idx) => {
+                let edit = &mut self.edits[idx];
+                if mode == Move::Relative {
+                    edit.translation.iter_mut().zip(translation).for_each(|(t, o)| *t += o);
+                } else {
+                    edit.mode = mode;
+                    edit.translation = translation;
+                }
+            }
+            None => {
+                self.index.insert(name.to_string(), self.edits.len());
+                self.edits.push(Edit {
+                    name: name.to_string(),
+                    mode,
+                    translation,
+                });
+            }
+        }
+    }
+
+    pub fn scale(&mut self, name: &str, factor: f32) {
+        self.scales.retain(|(scaled, _)| scaled != name);
+        self.scales.push((name.to_string(), factor));
+    }
+
+    pub fn moves(&mut self, names: &[&str], x: i32, y: i32, z: i32, mode: Move) {
+        names.iter().for_each(|name| self.r#move(name, x, y, z, mode));
+    }
+
+    /// Delete the nodes, their pending edits are dropped.
+    pub fn delete(&mut self, names: &[&str]) {
+        self.deletes.extend(names.iter().map(|name| name.to_string()));
+    }
+
+    /// Delete a group node after the other deletes, so none of them targets a node already gone with its parent.
+    pub fn delete_group(&mut self, name: &str) {
+        self.group_deletes.insert(name.to_string());
+    }
+
+    pub fn refresh(&mut self) {
+        self.refresh = true;
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.edits.is_empty()
+            && self.scales.is_empty()
+            && self.deletes.is_empty()
+            && self.group_deletes.is_empty()
+            && !self.refresh
+    }
+
+    /// Send the pending edits to Maya, then refresh the viewport once.
+    pub fn flush(&mut self, py: Python<'_>, bridge: &MayaBridge) -> PyResult<()> {
+        if self.is_empty() {
+            return Ok(());
+        }
+
+        let mut groups: Vec<(Move, [i32; 3], Vec<&str>)> = Vec::new();
+        for edit in self.edits.iter() {
+            if self.deletes.contains(&edit.name) || edit.mode == Move::Relative && edit.translation == [0; 3] {
+                continue;
+            }
+
+            match groups
+                .iter_mut()
+                .find(|(mode, translation, _)| *mode == edit.mode && *translation == edit.translation)
+            {
+                Some((_, _, names)) => names.push(edit.name.as_str()),
+                None => groups.push((edit.mode, edit.translation, vec![edit.name.as_str()])),
+            }
+        }
+
+        for (mode, [x, y, z], names) in groups.iter() {
+            bridge.moves(py, names, *x, *y, *z, *mode)?;
+        }
+
+        let mut scales: Vec<(f32, Vec<&str>)> = Vec::new();
+        for (name, factor) in self.scales.iter().filter(|(name, _)| !self.deletes.contains(name)) {
+            match scales.iter_mut().find(|(scale, _)| *scale == *factor) {
+                Some((_, names)) => names.push(name.as_str()),
+                None => scales.push((*factor, vec![name.as_str()])),
+            }
+        }
+        for (factor, names) in scales.iter() {
+            bridge.scale(py, names, *factor)?;
+        }
+
+        if !self.deletes.is_empty() {
+            let names: Vec<&str> = self.deletes.iter().map(String::as_str).collect();
+            bridge.delete(py, &names)?;
+        }
+        if !self.group_deletes.is_empty() {
+            let names: Vec<&str> = self.group_deletes.iter().map(String::as_str).collect();
+            bridge.delete(py, &names)?;
+        }
+
+        bridge.refresh(py)?;
+
+        self.edits.clear();
+        self.index.clear();
+        self.scales.clear();
+        self.deletes.clear();
+        self.group_deletes.clear();
+        self.refresh = false;
+        Ok(())
+    }
 }
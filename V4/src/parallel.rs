@@ -0,0 +1,103 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Independent tasks spread over all the cores.
+
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::thread;
+
+/// `task(0..count)` on every available core, the results in the index order.
+pub fn parallel_map<T: Send>(count: usize, task: impl Fn(usize) -> T + Sync) -> Vec<T> {
+    let thread_count = thread::available_parallelism()
+        .map_or(1, |count| count.get())
+        .min(count);
+    if thread_count <= 1 {
+        return (0..count).map(task).collect();
+    }
+
+    // Tasks don't last the same time, so each thread takes the next index when it's done instead of a fixed chunk.
+    let next_idx = AtomicUsize::new(0);
+
+    let mut results: Vec<(usize, T)> = thread::scope(|scope| {
+        let workers: Vec<_> = (0..thread_count)
+            .map(|_| {
+                scope.spawn(|| {
+                    let mut results = Vec::new();
+                    loop {
+                        let idx = next_idx.fetch_add(1, Ordering::Relaxed);
+                        if idx >= count {
+                            return results;
+                        }
+                        results.push((idx, task(idx)));
+                    }
+                })
+            })
+            .collect();
+
+        workers
+            .into_iter()
+            .flat_map(|worker| worker.join().expect("a worker thread panicked"))
+            .collect()
+    });
+
+    results.sort_unstable_by_key(|(idx, _)| *idx);
+    results.into_iter().map(|(_, result)| result).collect()
+}
+
+/// `task(idx, item)` on every item, in contiguous chunks of at least `min_chunk` items spread over the cores.
+/// Meant for short tasks, where handing out the items one by one would cost more than the imbalance.
+pub fn parallel_for_each<T: Send>(items: &mut [T], min_chunk: usize, task: impl Fn(usize, &mut T) + Sync) {
+    let thread_count = thread::available_parallelism()
+        .map_or(1, |count| count.get())
+        .min(items.len() / min_chunk.max(1));
+    if thread_count <= 1 {
+        items.iter_mut().enumerate().for_each(|(idx, item)| task(idx, item));
+        return;
+    }
+
+    let chunk_size = items.len().div_ceil(thread_count);
+    let task = &task;
+    thread::scope(|scope| {
+        for (chunk_idx, chunk) in items.chunks_mut(chunk_size).enumerate() {
+            scope.spawn(move || {
+                for (offset, item) in chunk.iter_mut().enumerate() {
+                    task(chunk_idx * chunk_size + offset, item);
+                }
+            });
+        }
+    });
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_order() {
+        assert_eq!(parallel_map(100, |idx| idx * 2), (0..100).map(|idx| idx * 2).collect::<Vec<_>>());
+        assert!(parallel_map(0, |idx| idx).is_empty());
+    }
+
+    #[test]
+    fn test_for_each() {
+        let mut items = vec![0; 1000];
+        parallel_for_each(&mut items, 10, |idx, item| *item = idx * 2);
+        assert_eq!(items, (0..1000).map(|idx| idx * 2).collect::<Vec<_>>());
+        parallel_for_each(&mut [] as &mut [usize], 10, |_, _| unreachable!());
+    }
+}
@@ -0,0 +1,426 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Placement sequences that empty the board, for low stacks.
+
+use super::board::{Board, Piece};
+use super::rng::mix;
+use super::search::PlacementSearch;
+use super::tetrimino::TetriminoLetter;
+use super::transposition::TranspositionTable;
+
+/// Highest stack considered by default, the usual 4-line perfect clear.
+pub const DEFAULT_MAX_HEIGHT: usize = 4;
+/// Keeps a query on a 10 columns board within a frame. The dead ends found by a query that gave up are
+/// remembered, so asking again on the next frame carries on the search.
+pub const DEFAULT_MAX_NODES: usize = 2000;
+/// Dead ends remembered between queries.
+const FAILURE_CAPACITY: usize = 1 << 16;
+
+const HOLD_SEED: u64 = 0x6A09_E667_F3BC_C909;
+const CAP_SEED: u64 = 0xBB67_AE85_84CA_A73B;
+const QUEUE_SEED: u64 = 0x3C6E_F372_FE94_F82B;
+const ACTIVE_SEED: u64 = 0xA54F_F53A_5F1D_36F1;
+
+/// One tetrimino of a solution, `hold` tells if it comes from the hold slot.
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub struct Step {
+    pub hold: bool,
+    pub piece: Piece,
+}
+
+/// Depth-first search over the queue, placing each tetrimino with `PlacementSearch`.
+///
+/// Positions proven unsolvable are kept in a transposition table keyed by board, the tetriminos that can still be
+/// played, hold and height, so the queries of a game mostly hit the positions explored by the previous ones.
+#[derive(Debug, Clone)]
+pub struct PerfectClearSolver {
+    search: PlacementSearch,
+    failures: TranspositionTable<()>,
+    /// Spare boards and placement lists, one per search depth.
+    boards: Vec<Board>,
+    candidates: Vec<Vec<Piece>>,
+    /// Empty cells flood fill.
+    visited: Vec<bool>,
+    stack: Vec<usize>,
+    active: Piece,
+    queue: Vec<TetriminoLetter>,
+    steps: Vec<Step>,
+    nodes: usize,
+    max_nodes: usize,
+}
+
+impl Default for PerfectClearSolver {
+    fn default() -> Self {
+        Self::new(DEFAULT_MAX_NODES)
+    }
+}
+
+impl PerfectClearSolver {
+    /// `max_nodes` bounds the positions visited by a query, a query reaching it gives up.
+    pub fn new(max_nodes: usize) -> Self {
+        PerfectClearSolver {
+            search: PlacementSearch::new(),
+            failures: TranspositionTable::new(FAILURE_CAPACITY),
+            boards: Vec::new(),
+            candidates: Vec::new(),
+            visited: Vec::new(),
+            stack: Vec::new(),
+            active: Piece::new(TetriminoLetter::T, 0, Default::default()),
+            queue: Vec::new(),
+            steps: Vec::new(),
+            nodes: 0,
+            max_nodes,
+        }
+    }
+
+    /// Positions visited by the last query.
+    pub fn nodes(&self) -> usize {
+        self.nodes
+    }
+
+    /// Placements emptying `board` within `max_height` rows, using the `active` tetrimino, then the ones of
+    /// `queue` in order, and the hold slot. The `active` placements are searched from where it is, the `held`
+    /// tetrimino comes back with its rotation and the others spawn flat.
+    ///
+    /// The fewest lines are tried first. `None` if there is no solution or if the search gave up.
+    pub fn solve(
+        &mut self,
+        board: &Board,
+        active: Piece,
+        queue: &[TetriminoLetter],
+        held: Option<Piece>,
+        can_hold: bool,
+        max_height: usize,
+    ) -> Option<&[Step]> {
+        self.nodes = 0;
+        self.steps.clear();
+        self.failures.new_generation();
+
+        self.active = active;
+        self.queue.clear();
+        self.queue.push(active.letter);
+        self.queue.extend_from_slice(queue);
+
+        let width = board.width();
+        let max_height = max_height.min(board.height());
+        let available = self.queue.len() + held.is_some() as usize;
+
+        for height in board.stack_height().max(1)..=max_height {
+            let missing = height * width - board.row_fill()[..height].iter().sum::<u32>() as usize;
+            if missing % 4 != 0 || missing / 4 > available {
+                continue;
+            }
+
+            if self.place(board, 0, held, can_hold, height, missing / 4) {
+                return Some(&self.steps);
+            }
+            if self.nodes >= self.max_nodes {
+                break;
+            }
+        }
+        None
+    }
+
+    /// Try every placement of the tetriminos that can be played next, with `pieces` left to fill `height` rows.
+    fn place(
+        &mut self,
+        board: &Board,
+        idx: usize,
+        held: Option<Piece>,
+        can_hold: bool,
+        height: usize,
+        pieces: usize,
+    ) -> bool {
+        if pieces == 0 {
+            return board.stack_height() == 0;
+        }
+        if self.nodes >= self.max_nodes {
+            return false;
+        }
+        self.nodes += 1;
+
+        let key = board.hash()
+            ^ self.queue_key(idx, pieces)
+            ^ mix(HOLD_SEED ^ held.map_or(0, Self::held_key) ^ ((can_hold as u64) << 16))
+            ^ mix(CAP_SEED ^ height as u64);
+        if self.failures.get(key).is_some() || !self.is_fillable(board, height) {
+            return false;
+        }
+
+        // (start of the tetrimino, from the hold slot, next queue index, next held)
+        let spawn = |letter, rotation| Piece::new(letter, rotation, board.spawn_position());
+        let mut choices = Vec::with_capacity(2);
+        if let Some(&active) = self.queue.get(idx) {
+            let active = if idx == 0 { self.active } else { spawn(active, 0) };
+            choices.push((active, false, idx + 1, held));
+            if can_hold {
+                match held {
+                    Some(piece) if piece.letter != active.letter => {
+                        choices.push((spawn(piece.letter, piece.rotation), true, idx + 1, Some(active)));
+                    }
+                    Some(_) => {}
+                    None => {
+                        if let Some(&next) = self.queue.get(idx + 1) {
+                            choices.push((spawn(next, 0), true, idx + 2, Some(active)));
+                        }
+                    }
+                }
+            }
+        }
+
+        for (start, hold, next_idx, next_held) in choices {
+            if self.try_piece(board, start, hold, next_idx, next_held, height, pieces) {
+                return true;
+            }
+        }
+
+        if self.nodes < self.max_nodes {
+            self.failures.insert(key, ());
+        }
+        false
+    }
+
+    #[allow(clippy::too_many_arguments)]
+    fn try_piece(
+        &mut self,
+        board: &Board,
+        start: Piece,
+        hold: bool,
+        next_idx: usize,
+        next_held: Option<Piece>,
+        height: usize,
+        pieces: usize,
+    ) -> bool {
+        let mut candidates = self.candidates.pop().unwrap_or_default();
+        candidates.clear();
+        candidates.extend(
+            self.search
+                .search(board, &start)
+                .iter()
+                .filter(|piece| piece.cells().iter().all(|cell| (cell.y as usize) < height)),
+        );
+        // Placements covering no empty cell, then the low ones, are tried first.
+        candidates.sort_by_key(|piece| {
+            let top = piece.cells().iter().map(|cell| cell.y).max();
+            (Self::covered_cells(board, piece), top)
+        });
+
+        let mut next = self.boards.pop().unwrap_or_else(|| board.clone());
+        let mut solved = false;
+
+        for piece in candidates.iter() {
+            next.clone_from(board);
+            let cleared = if next.lock(piece) { next.clear_completed_rows(|_, _| {}) } else { 0 };
+
+            self.steps.push(Step { hold, piece: *piece });
+            if self.place(&next, next_idx, next_held, true, height - cleared, pieces - 1) {
+                solved = true;
+                break;
+            }
+            self.steps.pop();
+        }
+
+        self.boards.push(next);
+        self.candidates.push(candidates);
+        solved
+    }
+
+    /// Hash of the tetriminos that can still be played from `idx`: `pieces` of them, plus one put in the hold slot.
+    /// The rest of the queue can't change the outcome, so the dead ends stay valid as the queue goes on.
+    fn queue_key(&self, idx: usize, pieces: usize) -> u64 {
+        let end = (idx + pieces + 1).min(self.queue.len());
+        let key = self.queue[idx..end]
+            .iter()
+            .fold(QUEUE_SEED, |key, letter| mix(key ^ (*letter as u64 + 1)));
+        if idx > 0 {
+            return key;
+        }
+        // The active tetrimino may have moved from its spawn.
+        let position = self.active.position;
+        let (x, y) = (position.x as u16 as u64, position.y as u16 as u64);
+        key ^ mix(ACTIVE_SEED ^ self.active.rotation as u64 ^ (x << 8) ^ (y << 24))
+    }
+
+    /// The held tetrimino and its rotation, its position doesn't matter.
+    fn held_key(piece: Piece) -> u64 {
+        (piece.letter as u64 + 1) | ((piece.rotation as u64) << 8)
+    }
+
+    /// Empty cells left under the piece, negative when it is tucked under an overhang.
+    fn covered_cells(board: &Board, piece: &Piece) -> i32 {
+        let cells = piece.cells();
+        cells
+            .iter()
+            .filter(|cell| !cells.iter().any(|other| other.x == cell.x && other.y < cell.y))
+            .map(|cell| cell.y - board.heights()[cell.x as usize] as i32)
+            .sum()
+    }
+
+    /// Every group of empty cells below `height` must be made of whole tetriminos.
+    fn is_fillable(&mut self, board: &Board, height: usize) -> bool {
+        let width = board.width();
+        let bits = board.bits();
+        self.visited.clear();
+        self.visited.resize(width * height, false);
+
+        for first in 0..width * height {
+            if self.visited[first] || bits.get(first % width, first / width) {
+                continue;
+            }
+
+            let mut size = 0;
+            self.visited[first] = true;
+            self.stack.push(first);
+            while let Some(cell) = self.stack.pop() {
+                size += 1;
+                let (x, y) = (cell % width, cell / width);
+                let neighbours = [
+                    (x > 0).then(|| cell - 1),
+                    (x + 1 < width).then(|| cell + 1),
+                    (y > 0).then(|| cell - width),
+                    (y + 1 < height).then(|| cell + width),
+                ];
+                for neighbour in neighbours.into_iter().flatten() {
+                    if !self.visited[neighbour] && !bits.get(neighbour % width, neighbour / width) {
+                        self.visited[neighbour] = true;
+                        self.stack.push(neighbour);
+                    }
+                }
+            }
+            if size % 4 != 0 {
+                return false;
+            }
+        }
+        true
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::point::Point;
+    use TetriminoLetter::*;
+
+    fn spawn(board: &Board, letter: TetriminoLetter) -> Piece {
+        Piece::new(letter, 0, board.spawn_position())
+    }
+
+    /// Replay the steps on the board, the way the engine would.
+    fn play(board: &Board, steps: &[Step]) -> Board {
+        let mut board = board.clone();
+        for step in steps {
+            assert!(board.fits(&step.piece));
+            assert_eq!(board.drop_distance(&step.piece), 0);
+            if board.lock(&step.piece) {
+                board.clear_completed_rows(|_, _| {});
+            }
+        }
+        board
+    }
+
+    #[test]
+    fn test_two_lines() {
+        // Gaps for an O on the left and for a flat I on the right of the second row.
+        let mut board = Board::new(10, 20);
+        board.lock(&Piece::new(I, 0, Point::new(3, 0)));
+        board.lock(&Piece::new(I, 0, Point::new(7, 0)));
+        board.lock(&Piece::new(I, 0, Point::new(3, 1)));
+
+        let mut solver = PerfectClearSolver::default();
+        let steps = solver.solve(&board, spawn(&board, O), &[I, T], None, true, 4).expect("solvable").to_vec();
+
+        assert_eq!(steps.len(), 2);
+        assert!(steps.iter().all(|step| !step.hold));
+        assert_eq!(play(&board, &steps).stack_height(), 0);
+    }
+
+    #[test]
+    fn test_uses_hold() {
+        // Only the held I fills a single row.
+        let board = Board::new(4, 20);
+        let held = Piece::new(I, 0, board.spawn_position());
+        let mut solver = PerfectClearSolver::default();
+
+        let steps = solver.solve(&board, spawn(&board, T), &[O], Some(held), true, 4).expect("solvable").to_vec();
+        assert_eq!(steps.len(), 1);
+        assert!(steps[0].hold && steps[0].piece.letter == I);
+        assert_eq!(play(&board, &steps).stack_height(), 0);
+
+        assert!(solver.solve(&board, spawn(&board, T), &[O], Some(held), false, 4).is_none());
+    }
+
+    #[test]
+    fn test_held_rotation() {
+        // The held I comes back upside down, sticking out of the 4 columns: it can't be swapped in.
+        let board = Board::new(4, 20);
+        let held = Piece::new(I, 2, board.spawn_position());
+        let mut solver = PerfectClearSolver::default();
+        assert!(solver.solve(&board, spawn(&board, T), &[O], Some(held), true, 4).is_none());
+
+        // On a wider grid it spawns upside down, and its placements are searched from there.
+        let mut board = Board::new(8, 20);
+        board.lock(&Piece::new(I, 0, Point::new(5, 0)));
+        let held = Piece::new(I, 2, board.spawn_position());
+
+        let steps = solver.solve(&board, spawn(&board, T), &[O], Some(held), true, 4).expect("solvable").to_vec();
+        assert!(steps[0].hold && steps[0].piece.letter == I);
+        assert!(PlacementSearch::new().search(&board, &held).contains(&steps[0].piece));
+    }
+
+    #[test]
+    fn test_active_rotation() {
+        // Swapped in from the hold slot, the active I is upside down and sticks out of the 4 columns.
+        let board = Board::new(4, 20);
+        let active = Piece::new(I, 2, board.spawn_position());
+        let mut solver = PerfectClearSolver::default();
+        assert!(solver.solve(&board, active, &[T], None, false, 4).is_none());
+
+        let mut board = Board::new(8, 20);
+        board.lock(&Piece::new(I, 0, Point::new(5, 0)));
+        let active = Piece::new(I, 2, board.spawn_position());
+
+        let steps = solver.solve(&board, active, &[T], None, false, 4).expect("solvable").to_vec();
+        assert!(!steps[0].hold);
+        assert!(PlacementSearch::new().search(&board, &active).contains(&steps[0].piece));
+    }
+
+    #[test]
+    fn test_memoized_failures() {
+        let board = Board::new(10, 20);
+        let mut solver = PerfectClearSolver::new(usize::MAX);
+
+        assert!(solver.solve(&board, spawn(&board, S), &[S, S, S, S, S], None, false, 2).is_none());
+        assert!(solver.nodes() > 1);
+
+        // A longer queue doesn't matter, the 5 tetriminos are played before its end.
+        assert!(solver.solve(&board, spawn(&board, S), &[S, S, S, S, S, T], None, false, 2).is_none());
+        assert_eq!(solver.nodes(), 1);
+    }
+
+    #[test]
+    fn test_isolated_cell() {
+        // The T leaves a single empty cell in the corner
+        let mut board = Board::new(10, 20);
+        board.lock(&Piece::new(T, 0, Point::new(1, 1)));
+
+        let mut solver = PerfectClearSolver::default();
+        assert!(solver.solve(&board, spawn(&board, I), &[I, I, I], None, true, 2).is_none());
+        assert_eq!(solver.nodes(), 1);
+    }
+}
@@ -27,7 +27,7 @@ pub enum Turn {
     Right = -90,
 }
 
-#[derive(Debug, Default, Clone)]
+#[derive(Debug, Default, Clone, Copy)]
 pub struct Point {
     pub x: i32,
     pub y: i32,
@@ -52,7 +52,7 @@ impl From<[f32; 3]> for Point {
 }
 
 impl Point {
-    pub fn new(x: i32, y: i32) -> Self {
+    pub const fn new(x: i32, y: i32) -> Self {
         Point { x, y }
     }
 
@@ -60,18 +60,21 @@ impl Point {
         (self.x as f32, self.y as f32)
     }
 
+    /// Quarter turn around the origin.
+    pub const fn turned(&self, angle: Turn) -> Point {
+        match angle {
+            Turn::Left => Point::new(-self.y, self.x),
+            Turn::Right => Point::new(self.y, -self.x),
+        }
+    }
+
     /// 2D rotation
     pub fn rotate(&mut self, angle: Turn, origin: Option<&Point>) {
-        let (ox, oy) = origin.unwrap_or(&Point::default()).as_f32_tuple();
-        let (px, py) = self.as_f32_tuple();
-
-        let rad_angle = (angle as i32 as f32).to_radians();
+        let origin = origin.copied().unwrap_or_default();
+        let turned = Point::new(self.x - origin.x, self.y - origin.y).turned(angle);
 
-        let rx = ox + rad_angle.cos() * (px - ox) - rad_angle.sin() * (py - oy);
-        let ry = oy + rad_angle.sin() * (px - ox) + rad_angle.cos() * (py - oy);
-
-        self.x = rx.round() as i32;
-        self.y = ry.round() as i32;
+        self.x = origin.x + turned.x;
+        self.y = origin.y + turned.y;
     }
 }
 
@@ -97,4 +100,13 @@ mod tests {
         let expect = Point::new(1, 2);
         assert_eq!(p, expect);
     }
+
+    #[test]
+    fn test_rotate_right() {
+        let mut p = Point::new(2, 1);
+        p.rotate(Turn::Right, None);
+
+        let expect = Point::new(1, -2);
+        assert_eq!(p, expect);
+    }
 }
@@ -0,0 +1,228 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Seeded tetrimino sequences, so every game can be replayed from its seed.
+
+use std::collections::VecDeque;
+use std::time::{SystemTime, UNIX_EPOCH};
+
+use super::rng::Rng;
+use super::tetrimino::TetriminoLetter;
+use pyo3::{pyclass, pymethods};
+use stubgen_macro::stubgen;
+
+const HISTORY_SIZE: usize = 4;
+const HISTORY_ROLLS: usize = 6;
+
+#[stubgen]
+#[pyclass(eq, eq_int)]
+#[derive(PartialEq, Clone, Copy, Debug)]
+pub enum Strategy {
+    /// Shuffled bags of the 7 tetriminos.
+    Bag,
+    /// Every tetrimino is equally likely, independently of the previous ones.
+    Random,
+    /// Rerolls the tetriminos found in the last 4 ones, up to 6 times.
+    History,
+}
+
+/// Generate the tetriminos ahead of time in a ring buffer, `peek` and `next` are constant time.
+#[stubgen]
+#[pyclass]
+#[derive(Debug, Clone)]
+pub struct Randomizer {
+    seed: u64,
+    strategy: Strategy,
+    rng: Rng,
+    queue: VecDeque<TetriminoLetter>,
+    history: [TetriminoLetter; HISTORY_SIZE],
+}
+
+#[stubgen]
+#[pymethods]
+impl Randomizer {
+    /// Without a seed, one is picked from the clock and can be read back from `seed`.
+    #[new]
+    #[pyo3(signature = (seed = None, strategy = Strategy::Bag))]
+    pub fn new(seed: Option<u64>, strategy: Strategy) -> Self {
+        let seed = seed.unwrap_or_else(|| {
+            SystemTime::now()
+                .duration_since(UNIX_EPOCH)
+                .map_or(0, |duration| duration.as_nanos() as u64)
+        });
+
+        Randomizer {
+            seed,
+            strategy,
+            rng: Rng::new(seed),
+            queue: VecDeque::with_capacity(2 * TetriminoLetter::ALL.len()),
+            history: [TetriminoLetter::Z, TetriminoLetter::S, TetriminoLetter::S, TetriminoLetter::Z],
+        }
+    }
+
+    #[getter]
+    pub fn seed(&self) -> u64 {
+        self.seed
+    }
+
+    #[getter]
+    pub fn strategy(&self) -> Strategy {
+        self.strategy
+    }
+
+    /// Tetrimino coming after `n` others, without consuming it.
+    pub fn peek(&mut self, n: usize) -> TetriminoLetter {
+        while self.queue.len() <= n {
+            self.generate();
+        }
+        self.queue[n]
+    }
+
+    /// The `count` coming tetriminos.
+    pub fn preview(&mut self, count: usize) -> Vec<TetriminoLetter> {
+        if count > 0 {
+            self.peek(count - 1);
+        }
+        self.queue.iter().take(count).copied().collect()
+    }
+
+    #[pyo3(name = "next")]
+    pub fn py_next(&mut self) -> TetriminoLetter {
+        self.peek(0);
+        self.queue.pop_front().unwrap_or(TetriminoLetter::T)
+    }
+}
+
+impl Randomizer {
+    /// Another draw of what is still hidden, from `seed`: what the strategy remembers is kept, but not the order of
+    /// the queued tetriminos. With bags, the rest of the current bag is shuffled again.
+    pub fn resample(&self, seed: u64) -> Self {
+        let mut sample = Randomizer {
+            seed,
+            rng: Rng::new(seed),
+            queue: VecDeque::with_capacity(self.queue.capacity()),
+            ..*self
+        };
+        if self.strategy == Strategy::Bag {
+            let mut rest: Vec<TetriminoLetter> =
+                self.queue.iter().take(self.queue.len() % TetriminoLetter::ALL.len()).copied().collect();
+            sample.rng.shuffle(&mut rest);
+            sample.queue.extend(rest);
+        }
+        sample
+    }
+
+    fn random_letter(&mut self) -> TetriminoLetter {
+        TetriminoLetter::ALL[self.rng.below(TetriminoLetter::ALL.len())]
+    }
+
+    /// Append at least one tetrimino to the queue.
+    fn generate(&mut self) {
+        match self.strategy {
+            Strategy::Bag => {
+                let mut bag = TetriminoLetter::ALL;
+                self.rng.shuffle(&mut bag);
+                self.queue.extend(bag);
+            }
+            Strategy::Random => {
+                let letter = self.random_letter();
+                self.queue.push_back(letter);
+            }
+            Strategy::History => {
+                let mut letter = self.random_letter();
+                for _ in 1..HISTORY_ROLLS {
+                    if !self.history.contains(&letter) {
+                        break;
+                    }
+                    letter = self.random_letter();
+                }
+                self.history.rotate_left(1);
+                self.history[HISTORY_SIZE - 1] = letter;
+                self.queue.push_back(letter);
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn sequence(strategy: Strategy, seed: u64, count: usize) -> Vec<TetriminoLetter> {
+        let mut randomizer = Randomizer::new(Some(seed), strategy);
+        (0..count).map(|_| randomizer.py_next()).collect()
+    }
+
+    #[test]
+    fn test_reproducible() {
+        for strategy in [Strategy::Bag, Strategy::Random, Strategy::History] {
+            assert_eq!(sequence(strategy, 9, 100), sequence(strategy, 9, 100));
+            assert_ne!(sequence(strategy, 9, 100), sequence(strategy, 10, 100));
+        }
+    }
+
+    #[test]
+    fn test_peek() {
+        let mut randomizer = Randomizer::new(Some(3), Strategy::Random);
+        let preview = randomizer.preview(20);
+
+        assert_eq!(randomizer.peek(19), preview[19]);
+        assert_eq!((0..20).map(|_| randomizer.py_next()).collect::<Vec<_>>(), preview);
+    }
+
+    #[test]
+    fn test_bag() {
+        let letters = sequence(Strategy::Bag, 5, 70);
+
+        for bag in letters.chunks(7) {
+            let mut bag: Vec<_> = bag.iter().map(|l| *l as usize).collect();
+            bag.sort();
+            assert_eq!(bag, [0, 1, 2, 3, 4, 5, 6]);
+        }
+    }
+
+    #[test]
+    fn test_resample() {
+        let mut randomizer = Randomizer::new(Some(5), Strategy::Bag);
+        let drawn: Vec<_> = (0..3).map(|_| randomizer.py_next()).collect();
+        let mut rest = randomizer.preview(4);
+
+        let samples: Vec<Vec<_>> = (0..20).map(|seed| randomizer.resample(seed).preview(11)).collect();
+        rest.sort_by_key(|letter| *letter as usize);
+        for sample in samples.iter() {
+            // The rest of the first bag, then a whole one.
+            let mut first = sample[..4].to_vec();
+            first.sort_by_key(|letter| *letter as usize);
+            assert_eq!(first, rest);
+            assert!(sample[..4].iter().all(|letter| !drawn.contains(letter)));
+            let mut bag: Vec<_> = sample[4..].iter().map(|letter| *letter as usize).collect();
+            bag.sort();
+            assert_eq!(bag, [0, 1, 2, 3, 4, 5, 6]);
+        }
+        assert!(samples.iter().any(|sample| sample[..4] != samples[0][..4]));
+    }
+
+    #[test]
+    fn test_history() {
+        let letters = sequence(Strategy::History, 5, 1000);
+        let repeats = letters.windows(2).filter(|pair| pair[0] == pair[1]).count();
+
+        // A pure random sequence would repeat about 1000 / 7 times
+        assert!(repeats < 30, "{repeats}");
+    }
+}
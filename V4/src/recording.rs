@@ -0,0 +1,153 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+use std::fs::File;
+use std::io::{self, BufReader, BufWriter};
+use std::path::{Path, PathBuf};
+use std::time::Instant;
+
+use super::engine::{Engine, Input};
+use super::grid::{self, DEFAULT_COLUMN_COUNT, DEFAULT_ROW_COUNT};
+use super::randomizer::{Randomizer, Strategy};
+use super::replay::{Decoder, Encoder, Header};
+use super::state::GameState;
+use pyo3::exceptions::PyValueError;
+use pyo3::{pyclass, pymethods, PyResult, Python};
+use stubgen_macro::stubgen;
+
+/// Stream the inputs of a game to a replay file.
+#[stubgen]
+#[pyclass]
+pub struct Recorder {
+    encoder: Option<Encoder<BufWriter<File>>>,
+    start: Instant,
+}
+
+#[stubgen]
+#[pymethods]
+impl Recorder {
+    #[new]
+    #[pyo3(signature = (
+        path,
+        seed,
+        column_count = DEFAULT_COLUMN_COUNT,
+        row_count = DEFAULT_ROW_COUNT,
+        strategy = Strategy::Bag,
+    ))]
+    fn new(path: PathBuf, seed: u64, column_count: usize, row_count: usize, strategy: Strategy) -> PyResult<Self> {
+        let header = Header {
+            seed,
+            strategy,
+            column_count,
+            row_count,
+        };
+
+        Ok(Recorder {
+            encoder: Some(Encoder::new(BufWriter::new(File::create(path)?), &header)?),
+            start: Instant::now(),
+        })
+    }
+
+    /// Append the input, timed from the creation of the recorder.
+    fn record(&mut self, value: Input) -> PyResult<()> {
+        let Some(encoder) = self.encoder.as_mut() else {
+            return Err(PyValueError::new_err("The recorder is closed"));
+        };
+        encoder.write(self.start.elapsed().as_micros() as u64, value)?;
+        Ok(())
+    }
+
+    /// Write the remaining inputs and close the file.
+    fn close(&mut self) -> PyResult<()> {
+        if let Some(mut encoder) = self.encoder.take() {
+            encoder.flush()?;
+        }
+        Ok(())
+    }
+}
+
+/// Replay file, read as a stream so large recordings are never loaded at once.
+#[stubgen]
+#[pyclass(frozen)]
+pub struct Replay {
+    path: PathBuf,
+    header: Header,
+}
+
+#[stubgen]
+#[pymethods]
+impl Replay {
+    #[new]
+    fn new(path: PathBuf) -> PyResult<Self> {
+        let header = *Self::decoder(&path)?.header();
+        grid::check_size(header.column_count, header.row_count)?;
+
+        Ok(Replay { path, header })
+    }
+
+    #[getter]
+    fn seed(&self) -> u64 {
+        self.header.seed
+    }
+
+    #[getter]
+    fn strategy(&self) -> Strategy {
+        self.header.strategy
+    }
+
+    #[getter]
+    fn column_count(&self) -> usize {
+        self.header.column_count
+    }
+
+    #[getter]
+    fn row_count(&self) -> usize {
+        self.header.row_count
+    }
+
+    /// Inputs with their time in microseconds since the start of the game.
+    fn events(&self) -> PyResult<Vec<(u64, Input)>> {
+        let events = Self::decoder(&self.path)?
+            .map(|event| event.map(|event| (event.time, event.input)))
+            .collect::<io::Result<_>>()?;
+        Ok(events)
+    }
+
+    /// Play the inputs on a new game, without the GIL. The final state matches the recorded game.
+    fn play(&self, py: Python<'_>) -> PyResult<GameState> {
+        let decoder = Self::decoder(&self.path)?;
+        let header = self.header;
+
+        let engine = py.allow_threads(|| -> io::Result<Engine> {
+            let randomizer = Randomizer::new(Some(header.seed), header.strategy);
+            let mut engine = Engine::with_randomizer(header.column_count, header.row_count, randomizer);
+
+            for event in decoder {
+                engine.apply(event?.input);
+            }
+            Ok(engine)
+        })?;
+        Ok(GameState::from_engine(engine))
+    }
+}
+
+impl Replay {
+    fn decoder(path: &Path) -> io::Result<Decoder<BufReader<File>>> {
+        Decoder::new(BufReader::new(File::open(path)?))
+    }
+}
@@ -0,0 +1,264 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Binary game recordings: a header, then one varint per input.
+//!
+//! ```text
+//! "TFMR" version:u8 seed strategy column_count row_count (varints)
+//! (time_delta << 3 | input) (varint, repeated until the end of the stream)
+//! ```
+//! Times are microseconds since the previous input, varints are unsigned LEB128.
+
+use std::io::{self, Read, Write};
+
+use super::engine::Input;
+use super::randomizer::Strategy;
+
+const MAGIC: &[u8; 4] = b"TFMR";
+const VERSION: u8 = 1;
+const INPUT_BITS: u32 = 3;
+
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub struct Header {
+    pub seed: u64,
+    pub strategy: Strategy,
+    pub column_count: usize,
+    pub row_count: usize,
+}
+
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub struct Event {
+    /// Microseconds since the start of the recording.
+    pub time: u64,
+    pub input: Input,
+}
+
+fn invalid_data(message: &str) -> io::Error {
+    io::Error::new(io::ErrorKind::InvalidData, message)
+}
+
+fn write_varint(writer: &mut impl Write, mut value: u64) -> io::Result<()> {
+    let mut buffer = [0; 10];
+    let mut len = 0;
+    loop {
+        let byte = (value & 0x7F) as u8;
+        value >>= 7;
+        if value == 0 {
+            buffer[len] = byte;
+            len += 1;
+            break;
+        }
+        buffer[len] = byte | 0x80;
+        len += 1;
+    }
+    writer.write_all(&buffer[..len])
+}
+
+/// `None` at the end of the stream, if it ends between two varints.
+fn read_varint(reader: &mut impl Read) -> io::Result<Option<u64>> {
+    let mut value = 0;
+    let mut byte = [0];
+
+    for shift in (0..64).step_by(7) {
+        if reader.read(&mut byte)? == 0 {
+            return match shift {
+                0 => Ok(None),
+                _ => Err(io::ErrorKind::UnexpectedEof.into()),
+            };
+        }
+        value |= u64::from(byte[0] & 0x7F) << shift;
+        if byte[0] & 0x80 == 0 {
+            return Ok(Some(value));
+        }
+    }
+    Err(invalid_data("varint is too long"))
+}
+
+fn read_header_varint(reader: &mut impl Read) -> io::Result<u64> {
+    read_varint(reader)?.ok_or_else(|| io::ErrorKind::UnexpectedEof.into())
+}
+
+pub struct Encoder<W: Write> {
+    writer: W,
+    time: u64,
+}
+
+impl<W: Write> Encoder<W> {
+    pub fn new(mut writer: W, header: &Header) -> io::Result<Self> {
+        writer.write_all(MAGIC)?;
+        writer.write_all(&[VERSION])?;
+        write_varint(&mut writer, header.seed)?;
+        write_varint(&mut writer, header.strategy as u64)?;
+        write_varint(&mut writer, header.column_count as u64)?;
+        write_varint(&mut writer, header.row_count as u64)?;
+
+        Ok(Encoder { writer, time: 0 })
+    }
+
+    /// `time` is in microseconds since the start of the recording, and never goes back.
+    pub fn write(&mut self, time: u64, input: Input) -> io::Result<()> {
+        let delta = time.saturating_sub(self.time);
+        self.time = self.time.max(time);
+
+        write_varint(&mut self.writer, delta << INPUT_BITS | input as u64)
+    }
+
+    pub fn flush(&mut self) -> io::Result<()> {
+        self.writer.flush()
+    }
+}
+
+/// Decode the events one by one, so a recording never has to be loaded at once.
+pub struct Decoder<R: Read> {
+    reader: R,
+    header: Header,
+    time: u64,
+}
+
+impl<R: Read> Decoder<R> {
+    pub fn new(mut reader: R) -> io::Result<Self> {
+        let mut magic = [0; 5];
+        reader.read_exact(&mut magic)?;
+        if &magic[..4] != MAGIC {
+            return Err(invalid_data("not a Tetris For Maya replay"));
+        }
+        if magic[4] != VERSION {
+            return Err(invalid_data("unsupported replay version"));
+        }
+
+        let seed = read_header_varint(&mut reader)?;
+        let strategy = match read_header_varint(&mut reader)? {
+            0 => Strategy::Bag,
+            1 => Strategy::Random,
+            2 => Strategy::History,
+            _ => return Err(invalid_data("unknown randomizer strategy")),
+        };
+        let column_count = read_header_varint(&mut reader)? as usize;
+        let row_count = read_header_varint(&mut reader)? as usize;
+
+        Ok(Decoder {
+            reader,
+            header: Header {
+                seed,
+                strategy,
+                column_count,
+                row_count,
+            },
+            time: 0,
+        })
+    }
+
+    pub fn header(&self) -> &Header {
+        &self.header
+    }
+}
+
+impl<R: Read> Iterator for Decoder<R> {
+    type Item = io::Result<Event>;
+
+    fn next(&mut self) -> Option<Self::Item> {
+        let value = match read_varint(&mut self.reader) {
+            Ok(value) => value?,
+            Err(error) => return Some(Err(error)),
+        };
+        self.time += value >> INPUT_BITS;
+
+        let input = Input::ALL[(value & ((1 << INPUT_BITS) - 1)) as usize];
+        Some(Ok(Event { time: self.time, input }))
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::engine::Engine;
+    use crate::randomizer::Randomizer;
+    use crate::rng::Rng;
+
+    const HEADER: Header = Header {
+        seed: 123456789,
+        strategy: Strategy::History,
+        column_count: 10,
+        row_count: 20,
+    };
+
+    #[test]
+    fn test_varint() {
+        let mut buffer = Vec::new();
+        for value in [0, 1, 127, 128, 300, u64::MAX] {
+            write_varint(&mut buffer, value).unwrap();
+        }
+        assert_eq!(&buffer[..6], &[0, 1, 127, 0x80, 1, 0xAC]);
+
+        let mut reader = buffer.as_slice();
+        for value in [0, 1, 127, 128, 300, u64::MAX] {
+            assert_eq!(read_varint(&mut reader).unwrap(), Some(value));
+        }
+        assert_eq!(read_varint(&mut reader).unwrap(), None);
+        assert!(read_varint(&mut [0x80].as_slice()).is_err());
+    }
+
+    #[test]
+    fn test_round_trip() {
+        let events: Vec<Event> = (0..200u64)
+            .map(|idx| Event {
+                time: idx * idx * 1000,
+                input: Input::ALL[(idx * 5 % 8) as usize],
+            })
+            .collect();
+
+        let mut encoder = Encoder::new(Vec::new(), &HEADER).unwrap();
+        for event in &events {
+            encoder.write(event.time, event.input).unwrap();
+        }
+        let buffer = encoder.writer;
+
+        let decoder = Decoder::new(buffer.as_slice()).unwrap();
+        assert_eq!(*decoder.header(), HEADER);
+        assert_eq!(decoder.collect::<io::Result<Vec<_>>>().unwrap(), events);
+    }
+
+    #[test]
+    fn test_replay_reproduces_the_game() {
+        let randomizer = || Randomizer::new(Some(HEADER.seed), HEADER.strategy);
+        let mut engine = Engine::with_randomizer(10, 20, randomizer());
+        let mut encoder = Encoder::new(Vec::new(), &HEADER).unwrap();
+
+        let mut rng = Rng::new(1);
+        for idx in 0..2000u64 {
+            let input = Input::ALL[rng.below(Input::ALL.len())];
+            engine.apply(input);
+            encoder.write(idx * 16_000, input).unwrap();
+        }
+
+        let mut replayed = Engine::with_randomizer(10, 20, randomizer());
+        for event in Decoder::new(encoder.writer.as_slice()).unwrap() {
+            replayed.apply(event.unwrap().input);
+        }
+        assert_eq!(replayed.board(), engine.board());
+        assert_eq!(replayed.score(), engine.score());
+        assert!(engine.pieces() > 1);
+    }
+
+    #[test]
+    fn test_invalid_header() {
+        assert!(Decoder::new(b"TFMX\x01".as_slice()).is_err());
+        assert!(Decoder::new(b"TFMR\x02".as_slice()).is_err());
+        assert!(Decoder::new(b"TFMR\x01\x00".as_slice()).is_err());
+    }
+}
@@ -0,0 +1,217 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Expected value of placements over sampled continuations of the piece sequence.
+
+use std::sync::atomic::{AtomicBool, Ordering};
+
+use super::board::{Board, Piece};
+use super::parallel::parallel_map;
+use super::randomizer::Randomizer;
+use super::rng::mix;
+use super::search::PlacementSearch;
+use super::simulate::{best_placement, evaluate};
+use super::tetrimino::TetriminoLetter;
+
+pub const DEFAULT_ROLLOUTS: usize = 32;
+/// Tetriminos played after the candidate placement, the visible next one included.
+pub const DEFAULT_DEPTH: usize = 3;
+/// Value of a continuation where a tetrimino doesn't fit at the top, below any board evaluation.
+pub const TOP_OUT_VALUE: f64 = -1000.0;
+
+const SAMPLE_SEED: u64 = 0x3C6E_F372_FE94_F82B;
+
+#[derive(Debug, Clone, Copy, PartialEq)]
+pub struct Lookahead {
+    pub rollouts: usize,
+    pub depth: usize,
+    pub seed: u64,
+}
+
+impl Lookahead {
+    /// Mean value of each placement, in the placements order.
+    ///
+    /// Every continuation starts with `next`, the following tetriminos are a `Randomizer::resample` of the game
+    /// `randomizer`: with bags, the rest of the current one comes first. All the placements are played against the
+    /// same continuations, so the sampling noise mostly cancels out when comparing them. Each continuation is played
+    /// greedily with the `simulate` heuristic, then scored by `evaluate` with all the rows cleared along the way.
+    pub fn expected_values(
+        &self,
+        board: &Board,
+        placements: &[Piece],
+        next: TetriminoLetter,
+        randomizer: &Randomizer,
+    ) -> Vec<f64> {
+        let never = AtomicBool::new(false);
+        self.expected_values_unless(board, placements, next, randomizer, &never).unwrap_or_default()
+    }
+
+    /// Like `expected_values`, but gives up within a continuation once `canceled` is set, and returns `None`.
+    pub fn expected_values_unless(
+        &self,
+        board: &Board,
+        placements: &[Piece],
+        next: TetriminoLetter,
+        randomizer: &Randomizer,
+        canceled: &AtomicBool,
+    ) -> Option<Vec<f64>> {
+        let continuations = self.continuations(next, randomizer);
+
+        parallel_map(placements.len(), |idx| {
+            let mut start = board.clone();
+            let completed_rows = if start.lock(&placements[idx]) { start.clear_completed_rows(|_, _| {}) } else { 0 };
+
+            let mut rollout = Rollout::new(&start);
+            let mut total = 0.0;
+            for continuation in continuations.iter() {
+                if canceled.load(Ordering::Relaxed) {
+                    return None;
+                }
+                total += rollout.play(&start, completed_rows, continuation);
+            }
+            Some(total / continuations.len() as f64)
+        })
+        .into_iter()
+        .collect()
+    }
+
+    fn continuations(&self, next: TetriminoLetter, randomizer: &Randomizer) -> Vec<Vec<TetriminoLetter>> {
+        (0..self.rollouts.max(1) as u64)
+            .map(|idx| {
+                let seed = mix(self.seed ^ idx.wrapping_mul(SAMPLE_SEED));
+                let mut sample = randomizer.resample(seed);
+                let mut continuation = vec![next];
+                continuation.extend(sample.preview(self.depth.saturating_sub(1)));
+                continuation.truncate(self.depth);
+                continuation
+            })
+            .collect()
+    }
+}
+
+/// Boards and search reused by the continuations of one placement.
+struct Rollout {
+    board: Board,
+    scratch: Board,
+    search: PlacementSearch,
+}
+
+impl Rollout {
+    fn new(board: &Board) -> Self {
+        Rollout {
+            board: board.clone(),
+            scratch: board.clone(),
+            search: PlacementSearch::new(),
+        }
+    }
+
+    fn play(&mut self, start: &Board, completed_rows: usize, continuation: &[TetriminoLetter]) -> f64 {
+        self.board.clone_from(start);
+        let mut completed_rows = completed_rows;
+
+        for &letter in continuation {
+            let piece = Piece::new(letter, 0, self.board.spawn_position());
+            if !self.board.fits(&piece) {
+                return TOP_OUT_VALUE;
+            }
+
+            let placements = self.search.search(&self.board, &piece);
+            let best = best_placement(&self.board, placements, &mut self.scratch);
+            if self.board.lock(&best) {
+                completed_rows += self.board.clear_completed_rows(|_, _| {});
+            }
+        }
+        evaluate(&self.board, completed_rows)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::point::Point;
+    use crate::randomizer::Strategy;
+
+    fn lookahead(rollouts: usize, depth: usize) -> Lookahead {
+        Lookahead {
+            rollouts,
+            depth,
+            seed: 7,
+        }
+    }
+
+    fn randomizer() -> Randomizer {
+        Randomizer::new(Some(3), Strategy::Bag)
+    }
+
+    #[test]
+    fn test_rest_of_the_bag() {
+        // Once 6 tetriminos of a bag are drawn, the last one is known.
+        let mut randomizer = randomizer();
+        let next = randomizer.py_next();
+        for _ in 0..5 {
+            randomizer.py_next();
+        }
+        let last = randomizer.peek(0);
+
+        let continuations = lookahead(16, 2).continuations(next, &randomizer);
+        assert!(continuations.iter().all(|continuation| *continuation == [next, last]));
+    }
+
+    #[test]
+    fn test_depth_zero() {
+        let board = Board::new(10, 20);
+        let start = Piece::new(TetriminoLetter::I, 0, board.spawn_position());
+        let placements = PlacementSearch::new().search(&board, &start).to_vec();
+
+        let values = lookahead(4, 0).expected_values(&board, &placements, TetriminoLetter::O, &randomizer());
+        let mut scratch = board.clone();
+        for (piece, value) in placements.iter().zip(values) {
+            scratch.clone_from(&board);
+            scratch.lock(piece);
+            assert_eq!(value, evaluate(&scratch, 0));
+        }
+    }
+
+    #[test]
+    fn test_avoids_the_hole() {
+        // A flat S on the floor covers a hole, an upright one doesn't.
+        let board = Board::new(10, 20);
+        let dropped = |piece: Piece| piece.offset(0, -board.drop_distance(&piece));
+        let flat = dropped(Piece::new(TetriminoLetter::S, 0, Point::new(4, 10)));
+        let upright = dropped(Piece::new(TetriminoLetter::S, 1, Point::new(4, 10)));
+
+        let placements = [flat, upright];
+        let values = lookahead(16, 3).expected_values(&board, &placements, TetriminoLetter::T, &randomizer());
+        assert!(values[1] > values[0], "{values:?}");
+
+        // Same seed, same samples.
+        assert_eq!(values, lookahead(16, 3).expected_values(&board, &placements, TetriminoLetter::T, &randomizer()));
+    }
+
+    #[test]
+    fn test_canceled() {
+        let board = Board::new(10, 20);
+        let start = Piece::new(TetriminoLetter::T, 0, board.spawn_position());
+        let placements = PlacementSearch::new().search(&board, &start).to_vec();
+
+        let (canceled, randomizer) = (AtomicBool::new(true), randomizer());
+        let next = TetriminoLetter::O;
+        let values = lookahead(1000, 10).expected_values_unless(&board, &placements, next, &randomizer, &canceled);
+        assert!(values.is_none());
+    }
+}
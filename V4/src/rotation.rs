@@ -0,0 +1,218 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Rotation states and wall kicks of every tetrimino, built at compile time.
+
+use super::bitboard::PieceMask;
+use super::point::{Point, Turn};
+use super::tetrimino::TetriminoLetter;
+
+pub const ROTATION_COUNT: usize = 4;
+pub const JIGGLE_MOVES: [i32; 4] = [-1, 1, -2, 2];
+pub const KICK_COUNT: usize = JIGGLE_MOVES.len() + 1;
+
+type Shape = [Point; 4];
+
+/// Cube offsets of the spawn state, in the `TetriminoLetter` order.
+/// The first cube is the root, every rotation is done around it.
+const SPAWN_SHAPES: [Shape; 7] = [
+    // T
+    [Point::new(0, 0), Point::new(1, 0), Point::new(-1, 0), Point::new(0, -1)],
+    // O
+    [Point::new(0, 0), Point::new(0, -1), Point::new(1, 0), Point::new(1, -1)],
+    // L
+    [Point::new(0, 0), Point::new(-1, -1), Point::new(1, 0), Point::new(-1, 0)],
+    // J
+    [Point::new(0, 0), Point::new(1, -1), Point::new(1, 0), Point::new(-1, 0)],
+    // Z
+    [Point::new(0, 0), Point::new(0, -1), Point::new(-1, 0), Point::new(1, -1)],
+    // S
+    [Point::new(0, 0), Point::new(0, -1), Point::new(1, 0), Point::new(-1, -1)],
+    // I
+    [Point::new(0, 0), Point::new(-1, 0), Point::new(1, 0), Point::new(2, 0)],
+];
+
+/// `SHAPES[letter][rotation]`, rotation `n` being `n` left quarter turns from the spawn state.
+static SHAPES: [[Shape; ROTATION_COUNT]; 7] = build_shapes();
+static MASKS: [[PieceMask; ROTATION_COUNT]; 7] = build_masks();
+static KICKS: [[Point; KICK_COUNT]; 7] = build_kicks();
+
+const fn build_shapes() -> [[Shape; ROTATION_COUNT]; 7] {
+    let mut shapes = [[[Point::new(0, 0); 4]; ROTATION_COUNT]; 7];
+
+    let mut letter = 0;
+    while letter < 7 {
+        shapes[letter][0] = SPAWN_SHAPES[letter];
+
+        let mut rotation = 1;
+        while rotation < ROTATION_COUNT {
+            let mut cube = 0;
+            while cube < 4 {
+                shapes[letter][rotation][cube] = shapes[letter][rotation - 1][cube].turned(Turn::Left);
+                cube += 1;
+            }
+            rotation += 1;
+        }
+        letter += 1;
+    }
+    shapes
+}
+
+const fn build_mask(shape: &Shape) -> PieceMask {
+    let (mut left, mut bottom, mut right, mut top) = (i32::MAX, i32::MAX, i32::MIN, i32::MIN);
+
+    let mut cube = 0;
+    while cube < 4 {
+        let point = shape[cube];
+        if point.x < left {
+            left = point.x;
+        }
+        if point.x > right {
+            right = point.x;
+        }
+        if point.y < bottom {
+            bottom = point.y;
+        }
+        if point.y > top {
+            top = point.y;
+        }
+        cube += 1;
+    }
+
+    let mut rows = [0; 4];
+    cube = 0;
+    while cube < 4 {
+        let point = shape[cube];
+        rows[(point.y - bottom) as usize] |= 1 << (point.x - left);
+        cube += 1;
+    }
+
+    PieceMask {
+        left,
+        bottom,
+        width: right - left + 1,
+        height: top - bottom + 1,
+        rows,
+    }
+}
+
+const fn build_masks() -> [[PieceMask; ROTATION_COUNT]; 7] {
+    let shapes = build_shapes();
+    let mut masks = [[PieceMask {
+        left: 0,
+        bottom: 0,
+        width: 0,
+        height: 0,
+        rows: [0; 4],
+    }; ROTATION_COUNT]; 7];
+
+    let mut letter = 0;
+    while letter < 7 {
+        let mut rotation = 0;
+        while rotation < ROTATION_COUNT {
+            masks[letter][rotation] = build_mask(&shapes[letter][rotation]);
+            rotation += 1;
+        }
+        letter += 1;
+    }
+    masks
+}
+
+/// The rotation is first tried in place, then jiggled horizontally.
+const fn build_kicks() -> [[Point; KICK_COUNT]; 7] {
+    let mut kicks = [[Point::new(0, 0); KICK_COUNT]; 7];
+
+    let mut letter = 0;
+    while letter < 7 {
+        let mut idx = 0;
+        while idx < JIGGLE_MOVES.len() {
+            kicks[letter][idx + 1] = Point::new(JIGGLE_MOVES[idx], 0);
+            idx += 1;
+        }
+        letter += 1;
+    }
+    kicks
+}
+
+/// Rotation state reached from `rotation` after turning by `angle`.
+pub fn turn(rotation: usize, angle: Turn) -> usize {
+    match angle {
+        Turn::Left => (rotation + 1) % ROTATION_COUNT,
+        Turn::Right => (rotation + ROTATION_COUNT - 1) % ROTATION_COUNT,
+    }
+}
+
+pub fn shape(letter: TetriminoLetter, rotation: usize) -> &'static Shape {
+    &SHAPES[letter as usize][rotation]
+}
+
+pub fn mask(letter: TetriminoLetter, rotation: usize) -> &'static PieceMask {
+    &MASKS[letter as usize][rotation]
+}
+
+/// Ordered offsets to try when turning from one rotation state to another.
+/// The O tetrimino can't rotate, so it has none.
+pub fn kicks(letter: TetriminoLetter, from: usize, to: usize) -> &'static [Point] {
+    if letter == TetriminoLetter::O || from == to {
+        return &[];
+    }
+    &KICKS[letter as usize]
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_shapes_match_point_rotation() {
+        for letter in 0..7 {
+            let mut expect = SPAWN_SHAPES[letter];
+
+            for rotation in 0..ROTATION_COUNT {
+                assert_eq!(SHAPES[letter][rotation], expect);
+                expect.iter_mut().for_each(|p| p.rotate(Turn::Left, None));
+            }
+        }
+    }
+
+    #[test]
+    fn test_turn() {
+        assert_eq!(turn(0, Turn::Left), 1);
+        assert_eq!(turn(0, Turn::Right), 3);
+        assert_eq!(turn(3, Turn::Left), 0);
+    }
+
+    #[test]
+    fn test_masks() {
+        let i_mask = mask(TetriminoLetter::I, 1);
+        assert_eq!((i_mask.left, i_mask.bottom, i_mask.width, i_mask.height), (0, -1, 1, 4));
+        assert_eq!(i_mask.rows, [1, 1, 1, 1]);
+
+        let t_mask = mask(TetriminoLetter::T, 0);
+        assert_eq!(*t_mask, PieceMask::from_points(shape(TetriminoLetter::T, 0)));
+    }
+
+    #[test]
+    fn test_kicks() {
+        assert!(kicks(TetriminoLetter::O, 0, 1).is_empty());
+
+        let kicks = kicks(TetriminoLetter::T, 0, 1);
+        assert_eq!(kicks[0], Point::default());
+        assert_eq!(kicks[1..].iter().map(|p| p.x).collect::<Vec<_>>(), JIGGLE_MOVES);
+    }
+}
@@ -0,0 +1,212 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Every final position a tetrimino can reach with the moves and kicks of the game.
+
+use std::collections::HashSet;
+
+use super::board::{Board, Piece};
+use super::point::Turn;
+use super::rotation::ROTATION_COUNT;
+
+const WORD_BITS: usize = u64::BITS as usize;
+
+/// Breadth-first search over the `(x, y, rotation)` states of a tetrimino.
+///
+/// The buffers are kept between searches, so only the first search on a board size allocates.
+#[derive(Debug, Default, Clone)]
+pub struct PlacementSearch {
+    /// One bit per state. The root cube is always inside the grid, so the root position indexes it.
+    visited: Vec<u64>,
+    queue: Vec<Piece>,
+    placements: Vec<Piece>,
+    /// Cells covered by the placements found so far, see `cell_key`.
+    covered: HashSet<u64>,
+}
+
+impl PlacementSearch {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Word and bit of a state. The piece must be inside the grid.
+    fn state_bit(board: &Board, piece: &Piece) -> (usize, u64) {
+        let idx =
+            (piece.rotation * board.height() + piece.position.y as usize) * board.width() + piece.position.x as usize;
+        (idx / WORD_BITS, 1 << (idx % WORD_BITS))
+    }
+
+    /// Sorted indexes of the cells covered by a piece resting inside the grid, packed in 16 bits each.
+    ///
+    /// Some rotations cover the same cells from another root (all the O rotations, the two flat I), the key
+    /// tells these placements apart from the ones leaving a different board.
+    fn cell_key(board: &Board, piece: &Piece) -> u64 {
+        let mut indexes = piece.cells().map(|cell| cell.y as u64 * board.width() as u64 + cell.x as u64);
+        indexes.sort_unstable();
+        indexes.iter().fold(0, |key, idx| key << 16 | idx)
+    }
+
+    /// Queue the state if it fits and wasn't visited yet.
+    fn push(&mut self, board: &Board, piece: Piece) {
+        // Moves are only tested against the board once per state: a cheap bounds check comes first.
+        let (x, y) = (piece.position.x, piece.position.y);
+        if x < 0 || y < 0 || x as usize >= board.width() || y as usize >= board.height() {
+            return;
+        }
+        let (word, bit) = Self::state_bit(board, &piece);
+        if self.visited[word] & bit == 0 && board.fits(&piece) {
+            self.visited[word] |= bit;
+            self.queue.push(piece);
+        }
+    }
+
+    /// Queue a rotated state, already tested by the kicks.
+    fn push_fitting(&mut self, board: &Board, piece: Option<Piece>) {
+        let Some(piece) = piece else {
+            return;
+        };
+        let (word, bit) = Self::state_bit(board, &piece);
+        if self.visited[word] & bit == 0 {
+            self.visited[word] |= bit;
+            self.queue.push(piece);
+        }
+    }
+
+    /// Move the start down to just above the stack. Above it any position and rotation can be reached,
+    /// so the search doesn't need to walk through the empty rows.
+    fn lower_start(board: &Board, start: &Piece) -> Piece {
+        let stack_height = board.stack_height() as i32;
+
+        // Every rotation of every tetrimino stays within 2 cells of its root.
+        let free_y = stack_height + 2;
+        if free_y + 2 < board.height() as i32 && free_y < start.position.y {
+            start.offset(0, free_y - start.position.y)
+        } else {
+            *start
+        }
+    }
+
+    /// Resting positions reachable from `start` by moving left, right, down and turning, in discovery order.
+    ///
+    /// Placements covering the same cells are only returned once, from the first state reaching them.
+    pub fn search(&mut self, board: &Board, start: &Piece) -> &[Piece] {
+        let state_count = board.width() * board.height() * ROTATION_COUNT;
+        self.visited.clear();
+        self.visited.resize(state_count.div_ceil(WORD_BITS), 0);
+        self.queue.clear();
+        self.placements.clear();
+        self.covered.clear();
+
+        if !board.fits(start) {
+            return &self.placements;
+        }
+        self.push_fitting(board, Some(Self::lower_start(board, start)));
+
+        let mut head = 0;
+        while let Some(piece) = self.queue.get(head).copied() {
+            head += 1;
+
+            if board.fits(&piece.offset(0, -1)) {
+                self.push(board, piece.offset(0, -1));
+            } else if self.covered.insert(Self::cell_key(board, &piece)) {
+                self.placements.push(piece);
+            }
+            self.push(board, piece.offset(-1, 0));
+            self.push(board, piece.offset(1, 0));
+            self.push_fitting(board, board.rotated(&piece, Turn::Left));
+            self.push_fitting(board, board.rotated(&piece, Turn::Right));
+        }
+        &self.placements
+    }
+
+    /// Whether `target` rests on the same cells as one of the placements reachable from `start`.
+    pub fn reaches(&mut self, board: &Board, start: &Piece, target: &Piece) -> bool {
+        let key = Self::cell_key(board, target);
+        self.search(board, start).iter().any(|piece| Self::cell_key(board, piece) == key)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::point::Point;
+    use crate::tetrimino::TetriminoLetter;
+
+    #[test]
+    fn test_empty_board() {
+        let board = Board::new(10, 20);
+        let mut search = PlacementSearch::new();
+
+        let start = Piece::new(TetriminoLetter::I, 0, board.spawn_position());
+        let placements = search.search(&board, &start);
+        // 7 horizontal and 10 vertical positions
+        assert_eq!(placements.len(), 17);
+        assert!(placements.iter().all(|p| board.drop_distance(p) == 0));
+
+        let start = Piece::new(TetriminoLetter::O, 0, board.spawn_position());
+        assert_eq!(search.search(&board, &start).len(), 9);
+    }
+
+    #[test]
+    fn test_tuck_under_overhang() {
+        // A roof on row 2 from x = 2 to 9, the space below is only reachable from the left.
+        let mut board = Board::new(10, 20);
+        board.lock(&Piece::new(TetriminoLetter::I, 0, Point::new(3, 2)));
+        board.lock(&Piece::new(TetriminoLetter::I, 0, Point::new(7, 2)));
+
+        let mut search = PlacementSearch::new();
+        let start = Piece::new(TetriminoLetter::O, 0, board.spawn_position());
+        let placements = search.search(&board, &start);
+
+        assert!(placements.contains(&Piece::new(TetriminoLetter::O, 0, Point::new(5, 1))));
+        assert!(placements.contains(&Piece::new(TetriminoLetter::O, 0, Point::new(5, 4))));
+        assert_eq!(placements.len(), 9 + 8);
+    }
+
+    #[test]
+    fn test_blocked_start() {
+        let mut board = Board::new(4, 4);
+        let start = Piece::new(TetriminoLetter::O, 0, board.spawn_position());
+        board.lock(&start);
+
+        assert!(PlacementSearch::new().search(&board, &start).is_empty());
+    }
+
+    #[test]
+    fn test_same_cells_once() {
+        let board = Board::new(10, 20);
+        let mut search = PlacementSearch::new();
+
+        for letter in [TetriminoLetter::I, TetriminoLetter::O, TetriminoLetter::S, TetriminoLetter::T] {
+            let start = Piece::new(letter, 0, board.spawn_position());
+            let placements = search.search(&board, &start).to_vec();
+            for (i, piece) in placements.iter().enumerate() {
+                let key = PlacementSearch::cell_key(&board, piece);
+                assert!(placements[i + 1..].iter().all(|other| PlacementSearch::cell_key(&board, other) != key));
+            }
+        }
+
+        // The other flat I covers the cells of a returned placement, so it can still be reached.
+        let start = Piece::new(TetriminoLetter::I, 0, board.spawn_position());
+        let flat = *search.search(&board, &start).iter().find(|p| p.rotation == 0).expect("flat I");
+        let turned = Piece::new(TetriminoLetter::I, 2, flat.position).offset(1, 0);
+        assert_eq!(PlacementSearch::cell_key(&board, &turned), PlacementSearch::cell_key(&board, &flat));
+        assert!(!search.search(&board, &start).contains(&turned));
+        assert!(search.reaches(&board, &start, &turned));
+    }
+}
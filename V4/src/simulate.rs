@@ -0,0 +1,170 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Many independent games played by a built-in policy, spread over all the cores.
+
+use super::board::{Board, Piece};
+use super::engine::Engine;
+use super::parallel::parallel_map;
+use super::randomizer::{Randomizer, Strategy};
+use super::rng::Rng;
+use super::search::PlacementSearch;
+use pyo3::pyclass;
+use stubgen_macro::stubgen;
+
+/// Mixed into the game seed, so the policy choices don't depend on the piece sequence generator.
+const POLICY_SEED: u64 = 0xA076_1D64_78BD_642F;
+
+/// Weights of the placement evaluation, from <https://codemyroad.wordpress.com/2013/04/14/tetris-ai-the-near-perfect-player/>.
+const HEIGHT_WEIGHT: f64 = -0.510066;
+const LINES_WEIGHT: f64 = 0.760666;
+const HOLES_WEIGHT: f64 = -0.35663;
+const BUMPINESS_WEIGHT: f64 = -0.184483;
+
+/// How a simulated game chooses where to drop each tetrimino.
+#[stubgen]
+#[pyclass(eq, eq_int)]
+#[derive(PartialEq, Clone, Copy, Debug)]
+pub enum Policy {
+    /// Any landing position, uniformly.
+    Random,
+    /// The landing position with the best height, holes, bumpiness and lines evaluation.
+    Heuristic,
+}
+
+#[stubgen]
+#[pyclass(eq, eq_int)]
+#[derive(PartialEq, Clone, Copy, Debug)]
+pub enum EndReason {
+    /// `max_pieces` tetriminos were locked.
+    PieceLimit,
+    /// A new tetrimino didn't fit at the top of the grid.
+    BlockOut,
+}
+
+#[stubgen]
+#[pyclass(frozen, get_all)]
+#[derive(Debug, Clone, PartialEq)]
+pub struct GameResult {
+    pub seed: u64,
+    pub score: u64,
+    pub lines: u32,
+    pub pieces: u64,
+    pub end_reason: EndReason,
+}
+
+/// Aggregate height, holes and bumpiness of the board, weighted with the completed rows.
+pub fn evaluate(board: &Board, completed_rows: usize) -> f64 {
+    HEIGHT_WEIGHT * board.aggregate_height() as f64
+        + LINES_WEIGHT * completed_rows as f64
+        + HOLES_WEIGHT * board.holes() as f64
+        + BUMPINESS_WEIGHT * board.bumpiness() as f64
+}
+
+/// Placement with the best `evaluate`, there must be at least one.
+pub fn best_placement(board: &Board, placements: &[Piece], scratch: &mut Board) -> Piece {
+    let mut best = (f64::NEG_INFINITY, placements[0]);
+
+    for piece in placements {
+        scratch.clone_from(board);
+        let completed_rows = if scratch.lock(piece) { scratch.clear_completed_rows(|_, _| {}) } else { 0 };
+
+        let value = evaluate(scratch, completed_rows);
+        if value > best.0 {
+            best = (value, *piece);
+        }
+    }
+    best.1
+}
+
+pub fn simulate(
+    seed: u64,
+    policy: Policy,
+    max_pieces: u64,
+    width: usize,
+    height: usize,
+    strategy: Strategy,
+) -> GameResult {
+    let mut engine = Engine::with_randomizer(width, height, Randomizer::new(Some(seed), strategy));
+    let mut rng = Rng::new(seed ^ POLICY_SEED);
+    let mut scratch = engine.board().clone();
+    let mut search = PlacementSearch::new();
+
+    while !engine.is_over() && engine.pieces() < max_pieces {
+        let placements = search.search(engine.board(), engine.active());
+
+        let piece = match policy {
+            Policy::Random => placements[rng.below(placements.len())],
+            Policy::Heuristic => best_placement(engine.board(), placements, &mut scratch),
+        };
+        engine.place(piece);
+    }
+
+    GameResult {
+        seed,
+        score: engine.score(),
+        lines: engine.lines(),
+        pieces: engine.pieces(),
+        end_reason: if engine.is_over() { EndReason::BlockOut } else { EndReason::PieceLimit },
+    }
+}
+
+/// Play one game per seed on every available core. The results are in the seeds order.
+pub fn simulate_batch(
+    seeds: &[u64],
+    policy: Policy,
+    max_pieces: u64,
+    width: usize,
+    height: usize,
+    strategy: Strategy,
+) -> Vec<GameResult> {
+    parallel_map(seeds.len(), |idx| simulate(seeds[idx], policy, max_pieces, width, height, strategy))
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_piece_limit() {
+        let result = simulate(1, Policy::Heuristic, 200, 10, 20, Strategy::Bag);
+
+        assert_eq!(result.end_reason, EndReason::PieceLimit);
+        assert_eq!(result.pieces, 200);
+        assert!(result.lines > 50);
+    }
+
+    #[test]
+    fn test_block_out() {
+        let result = simulate(1, Policy::Random, 10_000, 10, 20, Strategy::Bag);
+
+        assert_eq!(result.end_reason, EndReason::BlockOut);
+        assert!(result.pieces < 10_000);
+    }
+
+    #[test]
+    fn test_batch_matches_serial() {
+        let seeds: Vec<u64> = (0..16).collect();
+        let results = simulate_batch(&seeds, Policy::Random, 500, 10, 20, Strategy::History);
+
+        assert_eq!(results.len(), seeds.len());
+        for (seed, result) in seeds.iter().zip(&results) {
+            assert_eq!(*result, simulate(*seed, Policy::Random, 500, 10, 20, Strategy::History));
+        }
+    }
+}
@@ -0,0 +1,684 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+use std::sync::atomic::{AtomicBool, Ordering};
+use std::sync::Arc;
+use std::thread::{self, JoinHandle};
+
+use super::batch::{self, EngineBatch};
+use super::engine::{self, Engine, Hold};
+use super::grid::{self, DEFAULT_COLUMN_COUNT, DEFAULT_ROW_COUNT};
+use super::history::{self, History};
+use super::perfect_clear::{self, PerfectClearSolver};
+use super::board::{Board, Piece};
+use super::point::{Point, Turn};
+use super::randomizer::{Randomizer, Strategy};
+use super::rng::mix;
+use super::rollout::{self, Lookahead};
+use super::rotation::ROTATION_COUNT;
+use super::search::PlacementSearch;
+use super::simulate::{self, GameResult, Policy};
+use super::tetrimino::TetriminoLetter;
+use super::view::{self, BoardView, FeatureMatrix};
+use pyo3::exceptions::{PyRuntimeError, PyValueError};
+use pyo3::types::{PyBytes, PyDict};
+use pyo3::{pyclass, pyfunction, pymethods, Bound, PyResult, Python};
+use stubgen_macro::stubgen;
+
+/// Full game without any Maya dependency, driven by a seed.
+#[stubgen]
+#[pyclass]
+#[derive(Clone)]
+pub struct GameState {
+    engine: Engine,
+    search: PlacementSearch,
+    history: History,
+}
+
+/// Frozen game state from `GameState.snapshot`, shared until it is restored.
+#[stubgen]
+#[pyclass(frozen, name = "Snapshot")]
+pub struct PySnapshot {
+    state: history::Snapshot,
+}
+
+#[stubgen]
+#[pymethods]
+impl PySnapshot {
+    #[getter]
+    fn score(&self) -> u64 {
+        self.state.score()
+    }
+
+    /// Number of locked tetriminos.
+    #[getter]
+    fn pieces(&self) -> u64 {
+        self.state.pieces()
+    }
+}
+
+/// Perfect clear hints, see `solve`. Keep one per game: the dead ends found by a query speed up the next ones.
+#[stubgen]
+#[pyclass(name = "PerfectClear")]
+pub struct PyPerfectClear {
+    solver: PerfectClearSolver,
+}
+
+#[stubgen]
+#[pymethods]
+impl PyPerfectClear {
+    /// `max_nodes` bounds the positions visited by a query, the default keeps it within a frame.
+    #[new]
+    #[pyo3(signature = (max_nodes = perfect_clear::DEFAULT_MAX_NODES))]
+    fn new(max_nodes: usize) -> Self {
+        PyPerfectClear {
+            solver: PerfectClearSolver::new(max_nodes),
+        }
+    }
+
+    /// Positions visited by the last query.
+    #[getter]
+    fn nodes(&self) -> usize {
+        self.solver.nodes()
+    }
+
+    /// Placements emptying the board within `max_height` rows, with the active tetrimino, the held one and
+    /// the `preview` next ones, as `(hold, letter, (x, rotation, y))`. `hold` means the tetrimino is played
+    /// after pressing hold. `None` if there is no solution, or none was found within `max_nodes`:
+    /// asking again carries on the search.
+    #[pyo3(signature = (state, preview = 6, max_height = perfect_clear::DEFAULT_MAX_HEIGHT))]
+    fn solve(
+        &mut self,
+        state: &mut GameState,
+        preview: usize,
+        max_height: usize,
+    ) -> Option<Vec<(bool, TetriminoLetter, (i32, usize, i32))>> {
+        let engine = &mut state.engine;
+        if engine.is_over() {
+            return None;
+        }
+        let queue = engine.preview(preview);
+        let (active, held) = (*engine.active(), engine.held().copied());
+
+        let steps = self.solver.solve(engine.board(), active, &queue, held, engine.can_hold(), max_height)?;
+        Some(
+            steps
+                .iter()
+                .map(|step| (step.hold, step.piece.letter, step.piece.as_placement()))
+                .collect(),
+        )
+    }
+}
+
+/// Expected value of placements over sampled continuations of the piece sequence, see `submit`.
+/// The rollouts are played on native threads without the GIL, so the Maya UI keeps running meanwhile.
+#[stubgen]
+#[pyclass(name = "Lookahead")]
+pub struct PyLookahead {
+    lookahead: Lookahead,
+    submitted: u64,
+    job: Option<LookaheadJob>,
+}
+
+/// Rollouts played on their own thread, canceled when dropped.
+struct LookaheadJob {
+    canceled: Arc<AtomicBool>,
+    thread: Option<JoinHandle<Option<Vec<f64>>>>,
+}
+
+impl LookaheadJob {
+    fn spawn(
+        lookahead: Lookahead,
+        board: Board,
+        pieces: Vec<Piece>,
+        next: TetriminoLetter,
+        randomizer: Randomizer,
+    ) -> Self {
+        let canceled = Arc::new(AtomicBool::new(false));
+        let flag = Arc::clone(&canceled);
+        let thread =
+            thread::spawn(move || lookahead.expected_values_unless(&board, &pieces, next, &randomizer, &flag));
+        LookaheadJob {
+            canceled,
+            thread: Some(thread),
+        }
+    }
+
+    fn is_finished(&self) -> bool {
+        self.thread.as_ref().is_none_or(JoinHandle::is_finished)
+    }
+
+    fn join(mut self) -> PyResult<Vec<f64>> {
+        // Never canceled before being dropped, so no values means the thread panicked.
+        self.thread
+            .take()
+            .and_then(|thread| thread.join().ok().flatten())
+            .ok_or_else(|| PyRuntimeError::new_err("The lookahead rollouts panicked"))
+    }
+}
+
+impl Drop for LookaheadJob {
+    fn drop(&mut self) {
+        self.canceled.store(true, Ordering::Relaxed);
+    }
+}
+
+#[stubgen]
+#[pymethods]
+impl PyLookahead {
+    /// Each placement is valued over `rollouts` continuations of `depth` tetriminos, the next one included.
+    /// The continuations are drawn again from the hidden state of the game randomizer, from `seed`.
+    /// Without a seed one is picked from the clock.
+    #[new]
+    #[pyo3(signature = (rollouts = rollout::DEFAULT_ROLLOUTS, depth = rollout::DEFAULT_DEPTH, seed = None))]
+    fn new(rollouts: usize, depth: usize, seed: Option<u64>) -> PyResult<Self> {
+        if rollouts == 0 {
+            return Err(PyValueError::new_err("At least one rollout is needed"));
+        }
+        let seed = seed.unwrap_or_else(|| Randomizer::new(None, Strategy::Bag).seed());
+
+        Ok(PyLookahead {
+            lookahead: Lookahead { rollouts, depth, seed },
+            submitted: 0,
+            job: None,
+        })
+    }
+
+    #[getter]
+    fn rollouts(&self) -> usize {
+        self.lookahead.rollouts
+    }
+
+    #[getter]
+    fn depth(&self) -> usize {
+        self.lookahead.depth
+    }
+
+    #[getter]
+    fn seed(&self) -> u64 {
+        self.lookahead.seed
+    }
+
+    /// Check if the last submitted placements are still being played.
+    #[getter]
+    fn is_running(&self) -> bool {
+        self.job.as_ref().is_some_and(|job| !job.is_finished())
+    }
+
+    /// Start valuing the `(x, rotation, y)` placements of the active tetrimino and return at once.
+    /// A previous submission still running is canceled. A placement that doesn't fit raises a `ValueError`.
+    fn submit(&mut self, state: &GameState, placements: Vec<(i32, usize, i32)>) -> PyResult<()> {
+        let engine = &state.engine;
+        let board = engine.board().clone();
+        let letter = engine.active().letter;
+
+        let pieces = placements
+            .iter()
+            .map(|&(x, rotation, y)| {
+                let piece = Piece::new(letter, rotation % ROTATION_COUNT, Point::new(x, y));
+                if !board.fits(&piece) {
+                    return Err(PyValueError::new_err(format!(
+                        "Placement {:?} doesn't fit in the grid",
+                        (x, rotation, y)
+                    )));
+                }
+                Ok(piece)
+            })
+            .collect::<PyResult<Vec<Piece>>>()?;
+
+        // Fresh continuations for each submission, still reproducible from the seed.
+        let lookahead = Lookahead {
+            seed: mix(self.lookahead.seed.wrapping_add(self.submitted)),
+            ..self.lookahead
+        };
+        self.submitted += 1;
+
+        let randomizer = engine.randomizer().clone();
+        self.job = Some(LookaheadJob::spawn(lookahead, board, pieces, engine.next(), randomizer));
+        Ok(())
+    }
+
+    /// Values of the last submitted placements, in their order.
+    /// `None` while they are being played, or once they were returned.
+    fn poll(&mut self) -> PyResult<Option<Vec<f64>>> {
+        match self.job.take_if(|job| job.is_finished()) {
+            Some(job) => job.join().map(Some),
+            None => Ok(None),
+        }
+    }
+
+    /// Like `poll`, but waits for the values with the GIL released.
+    fn wait(&mut self, py: Python<'_>) -> PyResult<Option<Vec<f64>>> {
+        match self.job.take() {
+            Some(job) => py.allow_threads(|| job.join()).map(Some),
+            None => Ok(None),
+        }
+    }
+}
+
+#[stubgen]
+#[pymethods]
+impl GameState {
+    #[classattr]
+    const SCORE_TABLE: [u64; 5] = engine::SCORE_TABLE;
+    #[classattr]
+    const SOFT_DROP_SCORE: u64 = engine::SOFT_DROP_SCORE;
+    #[classattr]
+    const HARD_DROP_SCORE: u64 = engine::HARD_DROP_SCORE;
+
+    #[new]
+    #[pyo3(signature = (
+        column_count = DEFAULT_COLUMN_COUNT,
+        row_count = DEFAULT_ROW_COUNT,
+        seed = 0,
+        strategy = Strategy::Bag,
+        undo_limit = 0,
+    ))]
+    fn new(column_count: usize, row_count: usize, seed: u64, strategy: Strategy, undo_limit: usize) -> PyResult<Self> {
+        grid::check_size(column_count, row_count)?;
+
+        let engine = Engine::with_randomizer(column_count, row_count, Randomizer::new(Some(seed), strategy));
+        let mut history = History::new(undo_limit);
+        history.push(&engine);
+
+        Ok(GameState {
+            engine,
+            search: PlacementSearch::new(),
+            history,
+        })
+    }
+
+    fn copy(&self) -> Self {
+        self.clone()
+    }
+
+    /// Copy of the game state, immutable so it can be kept and restored any number of times.
+    fn snapshot(&self) -> PySnapshot {
+        PySnapshot {
+            state: history::snapshot(&self.engine),
+        }
+    }
+
+    /// Go back to a snapshot of this game. The undo history is reset.
+    fn restore(&mut self, snapshot: &PySnapshot) -> PyResult<()> {
+        let board = snapshot.state.board();
+        if board.width() != self.column_count() || board.height() != self.row_count() {
+            return Err(PyValueError::new_err("The snapshot comes from a grid of another size"));
+        }
+
+        self.engine.clone_from(&snapshot.state);
+        self.history.clear();
+        self.history.push(&self.engine);
+        Ok(())
+    }
+
+    /// Go back to the spawn of the previous tetrimino, up to `undo_limit` times. Return `False` if there is none.
+    fn undo(&mut self) -> bool {
+        self.history.undo(&mut self.engine)
+    }
+
+    /// Number of placements that can be undone.
+    #[getter]
+    fn undo_count(&self) -> usize {
+        self.history.len()
+    }
+
+    #[getter]
+    fn seed(&self) -> u64 {
+        self.engine.seed()
+    }
+
+    #[getter]
+    fn column_count(&self) -> usize {
+        self.engine.board().width()
+    }
+
+    #[getter]
+    fn row_count(&self) -> usize {
+        self.engine.board().height()
+    }
+
+    #[getter]
+    fn score(&self) -> u64 {
+        self.engine.score()
+    }
+
+    #[getter]
+    fn lines(&self) -> u32 {
+        self.engine.lines()
+    }
+
+    /// Starts at 0.
+    #[getter]
+    fn level(&self) -> u32 {
+        self.engine.level()
+    }
+
+    /// Number of locked tetriminos.
+    #[getter]
+    fn pieces(&self) -> u64 {
+        self.engine.pieces()
+    }
+
+    #[getter]
+    fn is_over(&self) -> bool {
+        self.engine.is_over()
+    }
+
+    /// Gravity delay of the current level, in seconds.
+    #[getter]
+    fn time_step(&self) -> f64 {
+        self.engine.time_step()
+    }
+
+    /// Type, rotation and root position of the active tetrimino.
+    #[getter]
+    fn active(&self) -> (TetriminoLetter, usize, (i32, i32)) {
+        let piece = self.engine.active();
+        (piece.letter, piece.rotation, (piece.position.x, piece.position.y))
+    }
+
+    /// Grid coordinates of the active tetrimino cubes.
+    #[getter]
+    fn active_cells(&self) -> Vec<(i32, i32)> {
+        self.engine.active().cells().iter().map(|p| (p.x, p.y)).collect()
+    }
+
+    #[getter]
+    fn next(&self) -> TetriminoLetter {
+        self.engine.next()
+    }
+
+    /// The `count` coming tetriminos, starting with `next`.
+    fn preview(&mut self, count: usize) -> Vec<TetriminoLetter> {
+        self.engine.preview(count)
+    }
+
+    #[getter]
+    fn held(&self) -> Option<TetriminoLetter> {
+        self.engine.held().map(|piece| piece.letter)
+    }
+
+    /// Row-major locked cells, bottom row first. `0` is empty, otherwise the `TetriminoLetter` value + 1.
+    #[getter]
+    fn cells(&self) -> Vec<u8> {
+        self.engine.board().cells().to_vec()
+    }
+
+    /// Filled cells of each row, bottom row first.
+    #[getter]
+    fn row_fill(&self) -> Vec<u32> {
+        self.engine.board().row_fill().to_vec()
+    }
+
+    /// Row above the highest filled cell of each column.
+    #[getter]
+    fn column_heights(&self) -> Vec<u32> {
+        self.engine.board().heights().to_vec()
+    }
+
+    /// Sum of the column heights.
+    #[getter]
+    fn aggregate_height(&self) -> usize {
+        self.engine.board().aggregate_height()
+    }
+
+    /// Empty cells under the top of their column.
+    #[getter]
+    fn holes(&self) -> usize {
+        self.engine.board().holes()
+    }
+
+    /// Sum of the height differences between neighbour columns.
+    #[getter]
+    fn bumpiness(&self) -> usize {
+        self.engine.board().bumpiness()
+    }
+
+    /// Zobrist hash of the locked cells, whatever their type. Key of a `TranspositionTable`.
+    #[getter]
+    fn hash(&self) -> u64 {
+        self.engine.board().hash()
+    }
+
+    /// Live read-only view of the locked cells: `numpy.asarray(state)` is a `uint8` matrix indexed `[y, x]`,
+    /// bottom row first, without any copy. `0` is empty, otherwise the `TetriminoLetter` value + 1,
+    /// so `numpy.asarray(state) > 0` is the occupancy.
+    #[getter(__array_interface__)]
+    fn array_interface<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        view::array_interface(py, self.engine.board())
+    }
+
+    /// Frozen copy of the locked cells.
+    fn view(&self) -> BoardView {
+        BoardView::new(self.engine.board())
+    }
+
+    /// Every resting position reachable with the game moves and kicks, as `(x, rotation, y)` root positions.
+    /// By default from the active tetrimino, otherwise from the spawn of `letter`.
+    #[pyo3(signature = (letter = None))]
+    fn placements(&mut self, letter: Option<TetriminoLetter>) -> Vec<(i32, usize, i32)> {
+        let board = self.engine.board();
+        let start = match letter {
+            Some(letter) => Piece::new(letter, 0, board.spawn_position()),
+            None => *self.engine.active(),
+        };
+        self.search.search(board, &start).iter().map(Piece::as_placement).collect()
+    }
+
+    /// Evaluation features of the `(x, rotation, y)` placements, see `FeatureMatrix`.
+    /// By default of the active tetrimino, otherwise of `letter`.
+    /// A placement that doesn't fit raises a `ValueError`.
+    #[pyo3(signature = (placements, letter = None))]
+    fn features(
+        &self,
+        placements: Vec<(i32, usize, i32)>,
+        letter: Option<TetriminoLetter>,
+    ) -> PyResult<FeatureMatrix> {
+        let letter = letter.unwrap_or(self.engine.active().letter);
+        FeatureMatrix::new(self.engine.board(), letter, &placements)
+    }
+
+    /// Move the active tetrimino
+    #[pyo3(name = "move")]
+    fn py_move(&mut self, x: i32, y: i32) -> bool {
+        self.engine.r#move(x, y)
+    }
+
+    /// Rotate the active tetrimino
+    fn rotate(&mut self, angle: Turn) -> bool {
+        self.engine.rotate(angle)
+    }
+
+    /// Move the active tetrimino one row down, for `SOFT_DROP_SCORE` points.
+    fn soft_drop(&mut self) -> bool {
+        self.engine.soft_drop()
+    }
+
+    /// Drop and lock the active tetrimino, for `HARD_DROP_SCORE` points. Return the number of completed rows.
+    fn hard_drop(&mut self) -> usize {
+        let pieces = self.engine.pieces();
+        let completed_rows = self.engine.hard_drop();
+        self.track(pieces);
+        completed_rows
+    }
+
+    /// Gravity step: move the active tetrimino down, or lock it if it has landed. Return `True` if it moved.
+    fn step(&mut self) -> bool {
+        let pieces = self.engine.pieces();
+        let moved = self.engine.step();
+        self.track(pieces);
+        moved
+    }
+
+    /// Store the active tetrimino where it is. Return the number of completed rows.
+    fn lock(&mut self) -> usize {
+        let pieces = self.engine.pieces();
+        let completed_rows = self.engine.lock();
+        self.track(pieces);
+        completed_rows
+    }
+
+    /// Store the active tetrimino, once per spawned tetrimino. Return a `grid.Hold` value.
+    fn hold(&mut self) -> u8 {
+        match self.engine.hold() {
+            Hold::Cant => 0,
+            Hold::Push => 1,
+            Hold::Swap => 2,
+        }
+    }
+}
+
+impl GameState {
+    pub fn from_engine(engine: Engine) -> Self {
+        GameState {
+            engine,
+            search: PlacementSearch::new(),
+            history: History::default(),
+        }
+    }
+
+    /// Keep the state of the new tetrimino for `undo`, if one was locked since `pieces`.
+    fn track(&mut self, pieces: u64) {
+        if self.engine.pieces() != pieces {
+            self.history.push(&self.engine);
+        }
+    }
+}
+
+/// Games stepped together, one placement per step, see `tetris_maya.env.VecEnv`.
+/// The arrays are exchanged as native-endian `bytes`, so a step doesn't create any object per game.
+#[stubgen]
+#[pyclass]
+pub struct VecEngine {
+    batch: EngineBatch,
+    buffer: Vec<u8>,
+}
+
+#[stubgen]
+#[pymethods]
+impl VecEngine {
+    #[classattr]
+    const PIECE_COLUMNS: usize = batch::PIECE_COLUMNS;
+
+    /// One game per seed.
+    #[new]
+    #[pyo3(signature = (
+        seeds,
+        column_count = DEFAULT_COLUMN_COUNT,
+        row_count = DEFAULT_ROW_COUNT,
+        strategy = Strategy::Bag,
+    ))]
+    fn new(seeds: Vec<u64>, column_count: usize, row_count: usize, strategy: Strategy) -> PyResult<Self> {
+        grid::check_size(column_count, row_count)?;
+        Ok(VecEngine {
+            batch: EngineBatch::new(&seeds, column_count, row_count, strategy),
+            buffer: Vec::new(),
+        })
+    }
+
+    fn __len__(&self) -> usize {
+        self.batch.len()
+    }
+
+    /// `rotation * column_count + x`, see `step`.
+    #[getter]
+    fn action_count(&self) -> usize {
+        self.batch.action_count()
+    }
+
+    /// Restart the games from new seeds, their number can change.
+    fn reset(&mut self, seeds: Vec<u64>) {
+        self.batch.reset(&seeds);
+    }
+
+    /// Play one `int64` action per game, without the GIL. The active tetrimino is turned `rotation` times left,
+    /// moved towards the `x` root column as far as it goes, then hard dropped.
+    /// A game that ends is restarted at once, from a seed derived from the previous one.
+    fn step(&mut self, py: Python<'_>, actions: &[u8]) -> PyResult<()> {
+        let action_count = self.batch.action_count();
+        let actions: Vec<usize> = actions
+            .chunks_exact(size_of::<i64>())
+            .map(|bytes| i64::from_ne_bytes(bytes.try_into().unwrap_or_default()))
+            .filter_map(|action| usize::try_from(action).ok().filter(|&action| action < action_count))
+            .collect();
+        if actions.len() != self.batch.len() {
+            return Err(PyValueError::new_err(format!(
+                "Expected {} actions in 0..{action_count}",
+                self.batch.len()
+            )));
+        }
+
+        let batch = &mut self.batch;
+        py.allow_threads(|| batch.step(&actions));
+        Ok(())
+    }
+
+    /// `uint8` locked cells, `[game, y, x]` with the bottom row first.
+    fn cells<'py>(&mut self, py: Python<'py>) -> Bound<'py, PyBytes> {
+        self.batch.cells(&mut self.buffer);
+        PyBytes::new(py, &self.buffer)
+    }
+
+    /// `uint8` active, next and held tetriminos, `[game, PIECE_COLUMNS]`.
+    /// Like the cells, a tetrimino is its letter value plus one and 0 is an empty hold.
+    fn pieces<'py>(&mut self, py: Python<'py>) -> Bound<'py, PyBytes> {
+        self.batch.pieces(&mut self.buffer);
+        PyBytes::new(py, &self.buffer)
+    }
+
+    /// `float64` score earned by each game during the last step, the hard drop included.
+    fn rewards<'py>(&self, py: Python<'py>) -> Bound<'py, PyBytes> {
+        let rewards: Vec<u8> = self.batch.rewards().iter().flat_map(|reward| reward.to_ne_bytes()).collect();
+        PyBytes::new(py, &rewards)
+    }
+
+    /// `bool` games that ended during the last step, they have been restarted since.
+    fn dones<'py>(&self, py: Python<'py>) -> Bound<'py, PyBytes> {
+        let dones: Vec<u8> = self.batch.dones().iter().map(|&done| done as u8).collect();
+        PyBytes::new(py, &dones)
+    }
+}
+
+/// Play one game per seed with a built-in policy, on all the cores and without the GIL.
+/// The results are in the seeds order.
+#[stubgen]
+#[pyfunction]
+#[pyo3(signature = (
+    seeds,
+    policy = Policy::Heuristic,
+    max_pieces = 1000,
+    column_count = DEFAULT_COLUMN_COUNT,
+    row_count = DEFAULT_ROW_COUNT,
+    strategy = Strategy::Bag,
+))]
+pub fn simulate_batch(
+    py: Python<'_>,
+    seeds: Vec<u64>,
+    policy: Policy,
+    max_pieces: u64,
+    column_count: usize,
+    row_count: usize,
+    strategy: Strategy,
+) -> PyResult<Vec<GameResult>> {
+    grid::check_size(column_count, row_count)?;
+
+    Ok(py.allow_threads(|| {
+        simulate::simulate_batch(&seeds, policy, max_pieces, column_count, row_count, strategy)
+    }))
+}
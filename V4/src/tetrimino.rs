@@ -16,16 +16,16 @@
 // You should have received a copy of the GNU General Public License
 // along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+use super::board::Piece;
 use super::cube::Cube;
-use super::maya;
 use super::point::Point;
-use pyo3::{pyclass, pymethods, Py, Python};
-use std::array;
+use super::{maya, rotation};
+use pyo3::{pyclass, pymethods, Py, PyResult, Python};
 use stubgen_macro::stubgen;
 
 #[stubgen]
 #[pyclass(eq, eq_int)]
-#[derive(PartialEq, Clone, Debug)]
+#[derive(PartialEq, Eq, Hash, Clone, Copy, Debug)]
 pub enum TetriminoLetter {
     T,
     O,
@@ -43,14 +43,36 @@ impl TetriminoLetter {
     fn name(&self) -> String {
         format!("{:?}", self)
     }
+
+    /// Cube offsets of the spawn state, the first one being the root.
+    #[getter]
+    fn cells(&self) -> Vec<(i32, i32)> {
+        rotation::shape(*self, 0).iter().map(|p| (p.x, p.y)).collect()
+    }
+}
+
+impl TetriminoLetter {
+    pub const ALL: [TetriminoLetter; 7] = [
+        TetriminoLetter::T,
+        TetriminoLetter::O,
+        TetriminoLetter::L,
+        TetriminoLetter::J,
+        TetriminoLetter::Z,
+        TetriminoLetter::S,
+        TetriminoLetter::I,
+    ];
 }
 
 #[stubgen]
-#[pyclass(frozen)]
+#[pyclass]
 pub struct Tetrimino {
     pub r#type: TetriminoLetter,
     pub root: String,
     pub cubes: [Cube; 4],
+    /// Grid coordinates of the root, the display is only updated from it.
+    pub position: Point,
+    /// Left quarter turns from the spawn state.
+    pub rotation: usize,
 }
 
 #[stubgen]
@@ -63,17 +85,25 @@ impl Tetrimino {
         cubes: [Cube; 4],
         py: Python<'_>,
     ) -> Py<Tetrimino> {
+        // The cubes are built around the root, at the origin, in their spawn state.
         Py::new(
             py,
             Tetrimino {
                 r#type,
                 root,
                 cubes,
+                position: Point::default(),
+                rotation: 0,
             },
         )
             .unwrap()
     }
 
+    #[getter(type)]
+    fn get_type(&self) -> TetriminoLetter {
+        self.r#type
+    }
+
     #[getter]
     fn root(&self) -> String {
         self.root.clone()
@@ -83,14 +113,31 @@ impl Tetrimino {
     fn get_position(&self) -> (f32, f32) {
         self.get_root_position().as_f32_tuple()
     }
+
+    /// Move the tetrimino root to the desired grid coordinates.
+    pub fn place(&mut self, py: Python<'_>, x: i32, y: i32) -> PyResult<()> {
+        self.position = Point::new(x, y);
+        maya::r#move(py, &self.root, x, y, 0, maya::Move::Absolute)
+    }
 }
 
 impl Tetrimino {
     pub fn get_root_position(&self) -> Point {
-        Point::from(maya::get_position(&self.root))
+        self.position
     }
 
     pub fn get_cube_positions(&self) -> [Point; 4] {
-        array::from_fn(|i| self.cubes[i].get_position())
+        self.piece().cells()
+    }
+
+    pub fn piece(&self) -> Piece {
+        Piece::new(self.r#type, self.rotation, self.position)
+    }
+
+    /// Only the logical state is updated, the display is left to the caller.
+    pub fn set_piece(&mut self, piece: &Piece) {
+        self.r#type = piece.letter;
+        self.rotation = piece.rotation;
+        self.position = piece.position;
     }
 }
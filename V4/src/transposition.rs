@@ -0,0 +1,214 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Fixed-size cache of search results, indexed by board hash.
+
+use pyo3::{pyclass, pymethods};
+use stubgen_macro::stubgen;
+
+const BUCKET_SIZE: usize = 4;
+
+#[derive(Debug, Clone, Copy)]
+struct Entry<V> {
+    key: u64,
+    generation: u8,
+    value: Option<V>,
+}
+
+impl<V> Default for Entry<V> {
+    fn default() -> Self {
+        Entry {
+            key: 0,
+            generation: 0,
+            value: None,
+        }
+    }
+}
+
+/// Hash table that never grows: each key maps to a bucket of 4 entries.
+///
+/// When a bucket is full, the entry left untouched for the most generations is replaced, so starting a
+/// new generation for each search keeps the recent positions while the old ones are recycled.
+#[derive(Debug, Clone)]
+pub struct TranspositionTable<V> {
+    buckets: Vec<[Entry<V>; BUCKET_SIZE]>,
+    generation: u8,
+    len: usize,
+}
+
+impl<V: Copy> TranspositionTable<V> {
+    /// Room for at least `capacity` entries, rounded up to a power of two.
+    pub fn new(capacity: usize) -> Self {
+        let bucket_count = capacity.div_ceil(BUCKET_SIZE).max(1).next_power_of_two();
+
+        TranspositionTable {
+            buckets: vec![[Entry::default(); BUCKET_SIZE]; bucket_count],
+            generation: 0,
+            len: 0,
+        }
+    }
+
+    pub fn capacity(&self) -> usize {
+        self.buckets.len() * BUCKET_SIZE
+    }
+
+    pub fn len(&self) -> usize {
+        self.len
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.len == 0
+    }
+
+    fn bucket(&mut self, key: u64) -> &mut [Entry<V>; BUCKET_SIZE] {
+        let mask = self.buckets.len() - 1;
+        &mut self.buckets[key as usize & mask]
+    }
+
+    /// A hit is moved to the current generation.
+    pub fn get(&mut self, key: u64) -> Option<V> {
+        let generation = self.generation;
+        let entry = self
+            .bucket(key)
+            .iter_mut()
+            .find(|entry| entry.value.is_some() && entry.key == key)?;
+
+        entry.generation = generation;
+        entry.value
+    }
+
+    pub fn insert(&mut self, key: u64, value: V) {
+        let generation = self.generation;
+        let bucket = self.bucket(key);
+
+        let idx = match bucket.iter().position(|entry| entry.value.is_some() && entry.key == key) {
+            Some(idx) => idx,
+            None => bucket
+                .iter()
+                .enumerate()
+                .max_by_key(|(_, entry)| match entry.value {
+                    None => u16::MAX,
+                    Some(_) => generation.wrapping_sub(entry.generation) as u16,
+                })
+                .map_or(0, |(idx, _)| idx),
+        };
+
+        let added = bucket[idx].value.is_none();
+        bucket[idx] = Entry {
+            key,
+            generation,
+            value: Some(value),
+        };
+        self.len += added as usize;
+    }
+
+    /// Age the stored entries by one, they are replaced first once a bucket is full.
+    pub fn new_generation(&mut self) {
+        self.generation = self.generation.wrapping_add(1);
+    }
+
+    pub fn clear(&mut self) {
+        self.buckets.iter_mut().for_each(|bucket| bucket.fill(Entry::default()));
+        self.generation = 0;
+        self.len = 0;
+    }
+}
+
+/// Evaluations cached by `GameState.hash`, for lookahead searches written in Python.
+#[stubgen]
+#[pyclass(name = "TranspositionTable")]
+pub struct PyTranspositionTable {
+    table: TranspositionTable<f64>,
+}
+
+#[stubgen]
+#[pymethods]
+impl PyTranspositionTable {
+    /// Room for at least `capacity` entries, rounded up to a power of two.
+    #[new]
+    #[pyo3(signature = (capacity = 1 << 20))]
+    fn new(capacity: usize) -> Self {
+        PyTranspositionTable {
+            table: TranspositionTable::new(capacity),
+        }
+    }
+
+    #[getter]
+    fn capacity(&self) -> usize {
+        self.table.capacity()
+    }
+
+    fn __len__(&self) -> usize {
+        self.table.len()
+    }
+
+    fn get(&mut self, key: u64) -> Option<f64> {
+        self.table.get(key)
+    }
+
+    fn insert(&mut self, key: u64, value: f64) {
+        self.table.insert(key, value)
+    }
+
+    /// Age the stored entries by one, they are replaced first once a bucket is full.
+    fn new_generation(&mut self) {
+        self.table.new_generation()
+    }
+
+    fn clear(&mut self) {
+        self.table.clear()
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_insert_and_get() {
+        let mut table = TranspositionTable::new(10);
+        assert_eq!(table.capacity(), 16);
+
+        table.insert(0, 1.0);
+        table.insert(42, 2.0);
+        table.insert(42, 3.0);
+
+        assert_eq!(table.len(), 2);
+        assert_eq!(table.get(0), Some(1.0));
+        assert_eq!(table.get(42), Some(3.0));
+        assert_eq!(table.get(7), None);
+    }
+
+    #[test]
+    fn test_replace_oldest() {
+        // A single bucket
+        let mut table = TranspositionTable::new(BUCKET_SIZE);
+        for key in 0..BUCKET_SIZE as u64 {
+            table.insert(key, key);
+            table.new_generation();
+        }
+        // Refreshed by the hit, the key 1 becomes the oldest
+        assert_eq!(table.get(0), Some(0));
+
+        table.insert(10, 10);
+        assert_eq!(table.len(), BUCKET_SIZE);
+        assert_eq!(table.get(1), None);
+        assert_eq!(table.get(0), Some(0));
+        assert_eq!(table.get(10), Some(10));
+    }
+}
@@ -0,0 +1,183 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Zero-copy views of the boards for NumPy.
+//!
+//! The crate is built against the abi3-py37 stable ABI, which only gained the buffer protocol in 3.11,
+//! so the cells are exposed through the NumPy array interface instead.
+//! See <https://numpy.org/doc/stable/reference/arrays.interface.html>.
+
+use super::board::{Board, Piece};
+use super::features::{self, FEATURE_COUNT};
+use super::point::Point;
+use super::rotation::ROTATION_COUNT;
+use super::search::PlacementSearch;
+use super::tetrimino::TetriminoLetter;
+use pyo3::exceptions::PyValueError;
+use pyo3::types::{PyDict, PyDictMethods};
+use pyo3::{pyclass, pymethods, Bound, PyResult, Python};
+use stubgen_macro::stubgen;
+
+/// Read-only `uint8` matrix of the locked cells, indexed `[y, x]` with the bottom row first.
+///
+/// The array points to the board memory, which is never reallocated, and keeps its owner alive.
+pub fn array_interface<'py>(py: Python<'py>, board: &Board) -> PyResult<Bound<'py, PyDict>> {
+    interface(py, (board.height(), board.width()), "|u1", board.cells().as_ptr() as usize)
+}
+
+fn interface<'py>(
+    py: Python<'py>,
+    shape: (usize, usize),
+    typestr: &str,
+    data: usize,
+) -> PyResult<Bound<'py, PyDict>> {
+    let interface = PyDict::new(py);
+    interface.set_item("version", 3)?;
+    interface.set_item("shape", shape)?;
+    interface.set_item("typestr", typestr)?;
+    interface.set_item("data", (data, true))?;
+    Ok(interface)
+}
+
+/// Evaluation features of candidate placements, one row per placement in the `NAMES` order.
+/// `numpy.asarray(matrix)` is a read-only `float64` array, without any copy.
+#[stubgen]
+#[pyclass(frozen)]
+pub struct FeatureMatrix {
+    values: Vec<f64>,
+}
+
+impl FeatureMatrix {
+    /// Features of the `(x, rotation, y)` placements of `letter`, locked where they are.
+    pub fn new(board: &Board, letter: TetriminoLetter, placements: &[(i32, usize, i32)]) -> PyResult<Self> {
+        let pieces: Vec<Piece> = placements
+            .iter()
+            .map(|(x, rotation, y)| Piece::new(letter, rotation % ROTATION_COUNT, Point::new(*x, *y)))
+            .collect();
+
+        let mut values = Vec::new();
+        features::placement_features(board, &pieces, &mut values).map_err(|idx| {
+            PyValueError::new_err(format!("Placement {:?} doesn't fit in the grid", placements[idx]))
+        })?;
+        Ok(FeatureMatrix { values })
+    }
+}
+
+#[stubgen]
+#[pymethods]
+impl FeatureMatrix {
+    #[classattr]
+    const NAMES: [&'static str; FEATURE_COUNT] = features::FEATURE_NAMES;
+
+    fn __len__(&self) -> usize {
+        self.values.len() / FEATURE_COUNT
+    }
+
+    #[getter(__array_interface__)]
+    fn py_array_interface<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let typestr = if cfg!(target_endian = "little") { "<f8" } else { ">f8" };
+        interface(py, (self.__len__(), FEATURE_COUNT), typestr, self.values.as_ptr() as usize)
+    }
+}
+
+/// Frozen copy of the locked cells, handed to the bot policies: `numpy.asarray(view)` is a read-only
+/// matrix of the cells, see `GameState.__array_interface__`.
+#[stubgen]
+#[pyclass(frozen)]
+pub struct BoardView {
+    board: Board,
+}
+
+impl BoardView {
+    pub fn new(board: &Board) -> Self {
+        BoardView { board: board.clone() }
+    }
+}
+
+#[stubgen]
+#[pymethods]
+impl BoardView {
+    #[getter]
+    fn column_count(&self) -> usize {
+        self.board.width()
+    }
+
+    #[getter]
+    fn row_count(&self) -> usize {
+        self.board.height()
+    }
+
+    #[getter(__array_interface__)]
+    fn py_array_interface<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        array_interface(py, &self.board)
+    }
+
+    /// Filled cells of each row, bottom row first.
+    #[getter]
+    fn row_fill(&self) -> Vec<u32> {
+        self.board.row_fill().to_vec()
+    }
+
+    /// Row above the highest filled cell of each column.
+    #[getter]
+    fn column_heights(&self) -> Vec<u32> {
+        self.board.heights().to_vec()
+    }
+
+    /// Sum of the column heights.
+    #[getter]
+    fn aggregate_height(&self) -> usize {
+        self.board.aggregate_height()
+    }
+
+    /// Empty cells under the top of their column.
+    #[getter]
+    fn holes(&self) -> usize {
+        self.board.holes()
+    }
+
+    /// Sum of the height differences between neighbour columns.
+    #[getter]
+    fn bumpiness(&self) -> usize {
+        self.board.bumpiness()
+    }
+
+    /// Zobrist hash of the locked cells, whatever their type. Key of a `TranspositionTable`.
+    #[getter]
+    fn hash(&self) -> u64 {
+        self.board.hash()
+    }
+
+    /// Check if the tetrimino fits at the `(x, rotation, y)` root position.
+    fn fits(&self, letter: TetriminoLetter, x: i32, rotation: usize, y: i32) -> bool {
+        let piece = Piece::new(letter, rotation % ROTATION_COUNT, Point::new(x, y));
+        self.board.fits(&piece)
+    }
+
+    /// Every resting position of `letter` reachable from its spawn, as `(x, rotation, y)` root positions.
+    fn placements(&self, letter: TetriminoLetter) -> Vec<(i32, usize, i32)> {
+        let start = Piece::new(letter, 0, self.board.spawn_position());
+        PlacementSearch::new().search(&self.board, &start).iter().map(Piece::as_placement).collect()
+    }
+
+    /// Evaluation features of the `(x, rotation, y)` placements of `letter`, see `FeatureMatrix`.
+    /// A placement that doesn't fit raises a `ValueError`.
+    fn features(&self, letter: TetriminoLetter, placements: Vec<(i32, usize, i32)>) -> PyResult<FeatureMatrix> {
+        FeatureMatrix::new(&self.board, letter, &placements)
+    }
+}
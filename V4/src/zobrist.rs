@@ -0,0 +1,56 @@
+// Copyright (c) 2025 Mathieu Bouzard.
+//
+// This file is part of Tetris For Maya
+// (see https://gitlab.com/mathbou/TetrisMaya).
+//
+// This program is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// any later version.
+//
+// This program is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+//! Zobrist keys of the board occupancy.
+//!
+//! Each row hashes to the XOR of the keys of its filled columns, so a lock only flips a few bits.
+//! The board hash mixes every row hash with its index, so shifting the rows of a line clear only
+//! rehashes the stack, without touching the cells.
+
+use super::rng::mix;
+
+const CELL_SEED: u64 = 0x2545_F491_4F6C_DD1D;
+const ROW_SEED: u64 = 0x9FB2_1C65_1E98_DF25;
+
+/// Key of a filled cell in the column `x`, independent of its row.
+pub fn cell_key(x: usize) -> u64 {
+    mix(CELL_SEED.wrapping_add(x as u64))
+}
+
+/// Contribution of the row `y` to the board hash. Empty rows don't contribute,
+/// so the hash doesn't depend on the empty space above the stack.
+pub fn row_key(y: usize, row_hash: u64) -> u64 {
+    if row_hash == 0 {
+        return 0;
+    }
+    mix(row_hash ^ mix(ROW_SEED.wrapping_add(y as u64)))
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_row_key_depends_on_row() {
+        let row_hash = cell_key(0) ^ cell_key(3);
+
+        assert_eq!(row_key(4, 0), 0);
+        assert_ne!(row_key(0, row_hash), row_key(1, row_hash));
+        assert_ne!(row_key(0, row_hash), row_key(0, cell_key(0)));
+    }
+}
@@ -0,0 +1,130 @@
+# Copyright (c) 2025 Mathieu Bouzard.
+#
+# This file is part of Tetris For Maya
+# (see https://gitlab.com/mathbou/TetrisMaya).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+
+from tetris_maya.constants import Hold
+from tetris_maya.policy import Placement, PolicyPlayer
+from tetris_maya.rlib import TetriminoLetter
+
+
+@dataclass
+class FakeGrid:
+    """Spawn and hold rules of `grid.Grid` without Maya: `queue` feeds the next preview."""
+
+    queue: list[TetriminoLetter]
+    active_tetrimino: SimpleNamespace | None = None
+    next_tetrimino: SimpleNamespace | None = None
+    held_tetrimino: SimpleNamespace | None = None
+    can_hold: bool = True
+    spawns: int = 0
+    placed: list[tuple[TetriminoLetter, Placement]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.next_tetrimino = SimpleNamespace(type=self.queue.pop(0))
+        self.spawn()
+
+    def spawn(self):
+        self.active_tetrimino, self.next_tetrimino = self.next_tetrimino, SimpleNamespace(type=self.queue.pop(0))
+        self.spawns += 1
+
+    def view(self):
+        return None
+
+    def hold(self) -> Hold:
+        if not self.can_hold:
+            return Hold.CANT
+        self.can_hold = False
+        if self.held_tetrimino is None:
+            self.active_tetrimino, self.held_tetrimino = None, self.active_tetrimino
+            return Hold.PUSH
+        self.active_tetrimino, self.held_tetrimino = self.held_tetrimino, self.active_tetrimino
+        return Hold.SWAP
+
+    def lock(self, placement: Placement):
+        """Drop the active tetrimino, the hold is allowed again like after `Grid.reset_hold`."""
+        self.placed.append((self.active_tetrimino.type, placement))
+        self.can_hold = True
+
+
+class ScriptedPolicy:
+    def __init__(self, *decisions: Placement):
+        self.decisions = list(decisions)
+        self.calls: list[TetriminoLetter] = []
+
+    def __call__(self, board, active, next, held, budget):  # noqa: A002
+        self.calls.append(active)
+        return self.decisions.pop(0)
+
+
+def play(grid: FakeGrid, player: PolicyPlayer, spawns: int):
+    """Game loop of `Game.play_policy`: a decision per spawn, a new spawn once the tetrimino is dropped or pushed."""
+    while grid.spawns <= spawns:
+        placement = player.decide(grid)
+        if placement is not None:
+            grid.lock(placement)
+        grid.spawn()
+
+
+def test_one_decision_per_spawn():
+    push = Placement(0, 0, 0, hold=True)
+    swap = Placement(4, 1, 0, hold=True)
+    drop = Placement(2, 0, 0)
+    policy = ScriptedPolicy(push, drop, swap, drop)
+    grid = FakeGrid(
+        [
+            TetriminoLetter.T,
+            TetriminoLetter.O,
+            TetriminoLetter.I,
+            TetriminoLetter.L,
+            TetriminoLetter.J,
+            TetriminoLetter.S,
+        ]
+    )
+    player = PolicyPlayer(policy, budget=1.0)
+    spawns = 4
+
+    play(grid, player, spawns)
+
+    # The held T is swapped for the I and dropped with the same decision, the L gets its own.
+    assert policy.calls == [TetriminoLetter.T, TetriminoLetter.O, TetriminoLetter.I, TetriminoLetter.L]
+    assert grid.placed == [(TetriminoLetter.O, drop), (TetriminoLetter.T, swap), (TetriminoLetter.L, drop)]
+    assert len(player.decision_times) == spawns
+
+
+def test_hold_once_per_lock():
+    push = Placement(0, 0, 0, hold=True)
+    hold_again = Placement(4, 1, 0, hold=True)
+    policy = ScriptedPolicy(push, hold_again)
+    grid = FakeGrid([TetriminoLetter.T, TetriminoLetter.O, TetriminoLetter.I, TetriminoLetter.L])
+
+    play(grid, PolicyPlayer(policy, budget=1.0), spawns=2)
+
+    # The O can't be held right after the T, it is dropped in place.
+    assert grid.placed == [(TetriminoLetter.O, hold_again)]
+    assert grid.held_tetrimino.type is TetriminoLetter.T
+
+
+def test_tuple_decision():
+    policy = ScriptedPolicy((3, 2, 1))
+    grid = FakeGrid([TetriminoLetter.S, TetriminoLetter.Z])
+
+    assert PolicyPlayer(policy, budget=1.0).decide(grid) == Placement(3, 2, 1)